@@ -1,25 +1,437 @@
 """Alert and Dispatch Agents (96-100)"""
 
 from app.agents.base import BaseAgent
-from typing import Dict, Any
+from typing import Dict, Any, Deque, Hashable, Iterable, List, Optional, Tuple
+from abc import ABC, abstractmethod
+from collections import deque
+import asyncio
+import itertools
+import logging
+import time
+import httpx
+from app.core.config import settings
+from app.core.dispatcher import SEVERITY_PRIORITY
+
+logger = logging.getLogger(__name__)
+
+MAX_SEND_ATTEMPTS = 3
+BURST_FRACTION = 0.1  # Share of a channel's per-second limit that may go out at once
+
+
+class Alert:
+    """One notification to one recipient on one channel"""
+
+    __slots__ = ("channel", "recipient", "area", "message", "severity", "created", "merged", "attempts")
+
+    def __init__(self, channel: str, recipient: str, area: str, message: str, severity: str = "medium"):
+        self.channel = channel
+        self.recipient = recipient
+        self.area = area
+        self.message = message
+        self.severity = severity
+        self.created = time.monotonic()
+        self.merged = 0  # Later alerts folded into this one
+        self.attempts = 0
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return self.channel, self.recipient, self.area
+
+    @property
+    def priority(self) -> int:
+        return SEVERITY_PRIORITY.get(self.severity, SEVERITY_PRIORITY["medium"])
+
+
+class TokenBucket:
+    """Allows `rate` units per second on average, up to `burst` at once"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waited = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, n: float = 1.0):
+        """Wait until n tokens are available and take them; callers are served in order"""
+        n = min(n, self.burst)
+        async with self._lock:
+            self._refill()
+            if self.tokens < n:
+                delay = (n - self.tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+                self._refill()
+            self.tokens -= n
+
+
+class AlertSink(ABC):
+    """Delivers batches of alerts for a channel provider"""
+
+    @abstractmethod
+    async def send(self, channel: str, alerts: List[Alert]):
+        """Deliver one batch; raising fails the whole batch"""
+
+    async def close(self):
+        pass
+
+
+class WebhookSink(AlertSink):
+    """Posts each batch as JSON to a provider gateway (SMS aggregator, mail relay, push service, radio bridge)
+
+    The body is {"channel", "alerts": [{"recipient", "area", "message",
+    "severity"}]}; a non-2xx response fails the batch, which is retried.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = 10.0,
+        headers: Optional[Dict[str, str]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout, headers=self.headers, transport=self.transport)
+        return self._client
+
+    async def send(self, channel: str, alerts: List[Alert]):
+        response = await self.client.post(self.url, json={
+            "channel": channel,
+            "alerts": [
+                {"recipient": a.recipient, "area": a.area, "message": a.message, "severity": a.severity}
+                for a in alerts
+            ]
+        })
+        response.raise_for_status()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class StubSink(AlertSink):
+    """Local sink that records what it receives instead of contacting a provider"""
+
+    def __init__(self, latency: float = 0.0, history: int = 1000):
+        self.latency = latency
+        self.batches = 0
+        self.messages = 0
+        self.recent: Deque[Tuple[float, str, str, str]] = deque(maxlen=history)
+
+    async def send(self, channel: str, alerts: List[Alert]):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        now = time.monotonic()
+        self.batches += 1
+        self.messages += len(alerts)
+        self.recent.extend((now, channel, alert.recipient, alert.area) for alert in alerts)
+
+
+class ChannelStats:
+    """Counters for one channel"""
+
+    def __init__(self):
+        self.queued = 0
+        self.coalesced = 0
+        self.suppressed = 0
+        self.sent = 0
+        self.batches = 0
+        self.failed = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "coalesced": self.coalesced,
+            "suppressed": self.suppressed,
+            "sent": self.sent,
+            "batches": self.batches,
+            "failed": self.failed,
+            "avg_batch_size": round(self.sent / self.batches, 2) if self.batches else 0.0
+        }
+
+
+class AlertDispatcher:
+    """Coalescing, rate-limited delivery of alerts over several channels
+
+    Each channel has its own severity-ordered queue, token bucket and
+    pool of async workers. A worker takes up to batch_size alerts (no
+    more than the bucket's burst), waits for that many tokens, and sends
+    them to the channel's sink in one call. The bucket holds a tenth of
+    the limit and refills at the other nine tenths, so no one-second
+    window ever carries more than the limit, however many workers are
+    draining.
+
+    Alerts for the same (channel, recipient, area) are coalesced: one
+    arriving while another is still queued replaces its message and
+    severity in place, and one arriving within coalesce_window seconds
+    of a send is suppressed unless it is more severe. A queued alert
+    upgraded to a higher severity is queued again at its new priority;
+    the stale entry is skipped when a worker reaches it.
+    """
+
+    def __init__(
+        self,
+        rate_limits: Dict[str, float],
+        sinks: Optional[Dict[str, AlertSink]] = None,
+        batch_size: int = 100,
+        workers_per_channel: int = 4,
+        coalesce_window: float = 300.0,
+        queue_size: int = 100000,
+    ):
+        self.channels = tuple(rate_limits)
+        self.buckets = {}
+        for channel, rate in rate_limits.items():
+            burst = max(1.0, rate * BURST_FRACTION)
+            self.buckets[channel] = TokenBucket(max(rate - burst, rate / 2), burst)
+        self.rate_limits = dict(rate_limits)
+        unknown = set(sinks or {}) - set(self.channels)
+        if unknown:
+            raise ValueError(f"Sinks for unknown alert channels: {', '.join(sorted(unknown))}")
+        self.sinks: Dict[str, AlertSink] = {channel: StubSink() for channel in self.channels}
+        self.sinks.update(sinks or {})
+        self.batch_size = batch_size
+        self.workers_per_channel = workers_per_channel
+        self.coalesce_window = coalesce_window
+        self.queue_size = queue_size
+
+        self.queues: Dict[str, asyncio.PriorityQueue] = {}
+        self._seq = itertools.count()
+        self._pending: Dict[Hashable, Alert] = {}
+        # Last send per key, as (time, priority), expired in send order
+        self._sent: Dict[Hashable, Tuple[float, int]] = {}
+        self._sent_order: Deque[Tuple[float, Hashable]] = deque()
+        self._workers: List[asyncio.Task] = []
+        self.stats = {channel: ChannelStats() for channel in self.channels}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self):
+        """Start the worker pools (on the running loop)"""
+        if self._workers:
+            return
+        for channel in self.channels:
+            self.queues[channel] = asyncio.PriorityQueue(self.queue_size)
+            self._workers.extend(
+                asyncio.create_task(self._worker(channel)) for _ in range(self.workers_per_channel)
+            )
+        logger.info(f"Alert dispatcher started with {len(self._workers)} workers")
+
+    async def stop(self):
+        """Stop the workers; alerts still queued are dropped"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self.queues = {}
+        self._pending.clear()
+        for sink in self.sinks.values():
+            await sink.close()
+
+    async def submit(self, alerts: Iterable[Alert]) -> Dict[str, int]:
+        """Queue alerts, coalescing duplicates; waits while a channel's queue is full
+
+        Raises ValueError, before queuing any of them, if an alert is for an unknown channel.
+        """
+        alerts = list(alerts)
+        unknown = {alert.channel for alert in alerts} - set(self.buckets)
+        if unknown:
+            raise ValueError(f"Unknown alert channels: {', '.join(sorted(unknown))}")
+        self.start()
+        self._expire_sent()
+        counts = {"queued": 0, "coalesced": 0, "suppressed": 0}
+        for alert in alerts:
+            stats = self.stats[alert.channel]
+            key = alert.key
+            queued = self._pending.get(key)
+            if queued is not None:
+                # Same recipient and area still waiting: send the newest message, at the highest severity
+                queued.message = alert.message
+                queued.merged += 1
+                stats.coalesced += 1
+                counts["coalesced"] += 1
+                if alert.priority < queued.priority:
+                    queued.severity = alert.severity
+                    await self.queues[alert.channel].put((queued.priority, next(self._seq), queued))
+                continue
+            sent = self._sent.get(key)
+            if sent is not None and alert.priority >= sent[1]:
+                stats.suppressed += 1
+                counts["suppressed"] += 1
+                continue
+            self._pending[key] = alert
+            await self.queues[alert.channel].put((alert.priority, next(self._seq), alert))
+            stats.queued += 1
+            counts["queued"] += 1
+        return counts
+
+    def _expire_sent(self):
+        cutoff = time.monotonic() - self.coalesce_window
+        while self._sent_order and self._sent_order[0][0] < cutoff:
+            sent_at, key = self._sent_order.popleft()
+            if self._sent.get(key, (None,))[0] == sent_at:
+                del self._sent[key]
+
+    async def join(self):
+        """Wait until every queued alert has been sent or has failed"""
+        await asyncio.gather(*(queue.join() for queue in self.queues.values()))
+
+    async def _worker(self, channel: str):
+        queue = self.queues[channel]
+        bucket = self.buckets[channel]
+        limit = max(1, min(self.batch_size, int(bucket.burst)))
+        while True:
+            batch: List[Alert] = []
+            stale = 0
+            item = await queue.get()
+            while True:
+                priority, _, alert = item
+                # Entries left behind by a severity upgrade, or for an alert already taken, are skipped
+                if self._pending.get(alert.key) is alert and priority == alert.priority and alert not in batch:
+                    batch.append(alert)
+                else:
+                    stale += 1
+                if len(batch) >= limit or queue.empty():
+                    break
+                item = queue.get_nowait()
+            for _ in range(stale):
+                queue.task_done()
+            if not batch:
+                continue
+
+            # From here on, duplicates are suppressed rather than queued behind this batch
+            now = time.monotonic()
+            for alert in batch:
+                del self._pending[alert.key]
+                self._sent[alert.key] = (now, alert.priority)
+                self._sent_order.append((now, alert.key))
+            try:
+                await bucket.acquire(len(batch))
+                await self._send(channel, batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _send(self, channel: str, batch: List[Alert]):
+        stats = self.stats[channel]
+        try:
+            await self.sinks[channel].send(channel, batch)
+        except Exception as e:
+            logger.error(f"Sending {len(batch)} {channel} alerts failed: {e}")
+            for alert in batch:
+                self._sent.pop(alert.key, None)
+                alert.attempts += 1
+                if alert.key in self._pending:
+                    # A newer alert for the same recipient and area is already queued
+                    stats.coalesced += 1
+                    continue
+                if alert.attempts >= MAX_SEND_ATTEMPTS or self.queues[channel].full():
+                    stats.failed += 1
+                    continue
+                self._pending[alert.key] = alert
+                self.queues[channel].put_nowait((alert.priority, next(self._seq), alert))
+            return
+        stats.sent += len(batch)
+        stats.batches += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "channels": {
+                channel: {
+                    **self.stats[channel].to_dict(),
+                    "queue_depth": self.queues[channel].qsize() if channel in self.queues else 0,
+                    "rate_limit": self.rate_limits[channel],
+                    "throttled_seconds": round(self.buckets[channel].waited, 3)
+                }
+                for channel in self.channels
+            },
+            "workers": len(self._workers),
+            "recently_sent_keys": len(self._sent)
+        }
+
+
+# Shared by all alert agents so rate limits and coalescing span the whole swarm
+alert_dispatcher = AlertDispatcher(
+    rate_limits=settings.alert_rate_limits,
+    sinks={
+        channel: WebhookSink(url, timeout=settings.alert_webhook_timeout)
+        for channel, url in settings.alert_webhooks.items()
+    },
+    batch_size=settings.alert_batch_size,
+    workers_per_channel=settings.alert_workers_per_channel,
+    coalesce_window=settings.alert_coalesce_window,
+    queue_size=settings.alert_queue_size,
+)
 
 
 class AlertAgent(BaseAgent):
     """Dispatches alerts and notifications"""
-    
+
     def __init__(self, agent_id: int):
         super().__init__(agent_id, "alert")
-        self.channels = ["sms", "email", "push", "radio"]
-        
+        self.dispatcher = alert_dispatcher
+        # Channels configured in alert_rate_limits
+        self.channels = list(self.dispatcher.channels)
+
+    @classmethod
+    async def initialize_shared(cls):
+        alert_dispatcher.start()
+
+    @classmethod
+    async def shutdown_shared(cls):
+        await alert_dispatcher.stop()
+
     async def initialize(self):
         """Initialize alert channels"""
         print(f"🚨 Alert Agent {self.agent_id} initialized")
-        
+
     async def process_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
-        """Send emergency alerts"""
+        """Send emergency alerts
+
+        Takes explicit "alerts" ([{"channel", "recipient", "area",
+        "message", "severity"}]) and/or "recipients" to notify with one
+        "message" on each of "channels" (all configured channels by
+        default). The area defaults to the task's disaster. A task naming
+        an unconfigured channel is rejected without queuing any alerts.
+        """
+        area = str(task.get("area") or task.get("disaster_id") or task.get("location") or "")
+        severity = task.get("severity", "medium")
+        alerts = [
+            Alert(
+                a.get("channel", "push"), str(a["recipient"]), str(a.get("area", area)),
+                a.get("message", task.get("message", "")), a.get("severity", severity)
+            )
+            for a in task.get("alerts", [])
+        ]
+        for channel in task.get("channels") or self.channels:
+            alerts.extend(
+                Alert(channel, str(recipient), area, task.get("message", ""), severity)
+                for recipient in task.get("recipients", [])
+            )
+
+        counts = await self.dispatcher.submit(alerts)
         return {
             "agent_id": self.agent_id,
             "type": "alert",
             "result": "alerts_dispatched",
-            "notifications_sent": 0
+            **counts,
+            # Delivery happens asynchronously; these are the dispatcher's running totals per channel
+            "sent_total": {channel: stats.sent for channel, stats in self.dispatcher.stats.items()},
+            "failed_total": {channel: stats.failed for channel, stats in self.dispatcher.stats.items()}
         }
@@ -4,6 +4,8 @@ from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 from datetime import datetime
 from enum import Enum
+import time
+from app.core.metrics import AGENT_TASK_SECONDS
 
 
 class AgentStatus(Enum):
@@ -25,6 +27,16 @@ class BaseAgent(ABC):
         self.last_activity = datetime.utcnow()
         self.tasks_completed = 0
         self.current_task: Optional[Dict[str, Any]] = None
+        self.initialized = False
+        self.task_started: Optional[float] = None
+        
+    @classmethod
+    async def initialize_shared(cls):
+        """Set up resources shared by every agent of this class (run once per process)"""
+        
+    @classmethod
+    async def shutdown_shared(cls):
+        """Release the resources shared by agents of this class"""
         
     @abstractmethod
     async def process_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
@@ -37,10 +49,12 @@ class BaseAgent(ABC):
         pass
         
     async def activate(self):
-        """Activate agent from standby"""
+        """Activate agent from standby, initializing it the first time"""
+        if not self.initialized:
+            await self.initialize()
+            self.initialized = True
         self.status = AgentStatus.ACTIVE
         self.last_activity = datetime.utcnow()
-        await self.initialize()
         
     async def deactivate(self):
         """Return agent to standby"""
@@ -59,7 +73,13 @@ class BaseAgent(ABC):
         }
         
     async def update_status(self, status: AgentStatus, task: Optional[Dict] = None):
-        """Update agent status"""
+        """Update agent status, recording task latency when processing ends"""
+        if status == AgentStatus.PROCESSING:
+            self.task_started = time.perf_counter()
+        elif self.task_started is not None:
+            outcome = "error" if status == AgentStatus.ERROR else "ok"
+            AGENT_TASK_SECONDS.labels(self.agent_type, outcome).observe(time.perf_counter() - self.task_started)
+            self.task_started = None
         self.status = status
         self.last_activity = datetime.utcnow()
         if task:
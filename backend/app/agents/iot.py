@@ -1,27 +1,271 @@
 """IoT Sensor Monitoring Agents (31-40)"""
 
 from app.agents.base import BaseAgent
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Sequence
+from datetime import datetime
+import time
+import numpy as np
+from app.core.config import settings
+
+SENSOR_TYPES = ["seismic", "weather", "water_level", "air_quality"]
+SENSOR_TYPE_CODES = {sensor_type: code for code, sensor_type in enumerate(SENSOR_TYPES)}
+
+# Hard (low, high) limits per sensor type; readings outside are anomalies regardless of history
+SENSOR_LIMITS = np.array([
+    (-0.3, 0.3),        # seismic: peak ground acceleration (g)
+    (0.0, 33.0),        # weather: wind speed (m/s), hurricane force above
+    (-np.inf, 5.0),     # water_level: metres above flood stage
+    (0.0, 300.0),       # air_quality: AQI, hazardous above
+], dtype=np.float32)
+
+# Disaster type reported for anomalies from each sensor type
+SENSOR_DISASTERS = ["earthquake", "storm", "flood", "wildfire"]
+
+ANOMALY_KINDS = ("zscore", "threshold")
+
+
+class SensorStore:
+    """Fixed-memory ring buffers and streaming detectors for many sensors
+
+    Every sensor owns one preallocated row of `window` slots in a single
+    (max_sensors, window) array, written as a ring. An exponentially
+    weighted mean and variance per sensor give a z-score for each new
+    reading before it is folded in. Batches are applied in rounds, one
+    reading per sensor per round, so each round is a handful of NumPy
+    operations across every sensor in it, and results match applying
+    the readings one at a time.
+    """
+
+    def __init__(
+        self,
+        max_sensors: int = 10000,
+        window: int = 128,
+        alpha: float = 0.05,
+        z_threshold: float = 4.0,
+        warmup: int = 30,
+        cooldown: float = 60.0,
+    ):
+        self.max_sensors = max_sensors
+        self.window = window
+        self.alpha = np.float32(alpha)
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self.cooldown = cooldown
+
+        self.values = np.zeros((max_sensors, window), dtype=np.float32)
+        self.timestamps = np.zeros((max_sensors, window), dtype=np.float64)
+        self.head = np.zeros(max_sensors, dtype=np.int64)  # Total readings written
+        self.types = np.zeros(max_sensors, dtype=np.uint8)
+        self.mean = np.zeros(max_sensors, dtype=np.float32)
+        self.var = np.zeros(max_sensors, dtype=np.float32)
+        self.last_anomaly = np.full(max_sensors, -np.inf, dtype=np.float64)
+
+        self.sensor_ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self.readings_ingested = 0
+        self.anomalies_detected = 0
+
+    def __len__(self) -> int:
+        return len(self.sensor_ids)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.values.nbytes + self.timestamps.nbytes
+
+    def row(self, sensor_id: str, sensor_type: str = "weather") -> int:
+        """Get a sensor's row, registering it on first sight"""
+        row = self._rows.get(sensor_id)
+        if row is None:
+            if len(self.sensor_ids) >= self.max_sensors:
+                raise ValueError(f"Sensor store is full ({self.max_sensors} sensors)")
+            row = len(self.sensor_ids)
+            self._rows[sensor_id] = row
+            self.sensor_ids.append(sensor_id)
+            self.types[row] = SENSOR_TYPE_CODES.get(sensor_type, SENSOR_TYPE_CODES["weather"])
+        return row
+
+    def rows(self, sensor_ids: Sequence[str], sensor_types: Sequence[str]) -> np.ndarray:
+        get = self._rows.get
+        return np.fromiter(
+            (get(s) if s in self._rows else self.row(s, t) for s, t in zip(sensor_ids, sensor_types)),
+            dtype=np.int64, count=len(sensor_ids),
+        )
+
+    def ingest(
+        self,
+        rows: np.ndarray,
+        values: np.ndarray,
+        timestamps: Optional[np.ndarray] = None,
+        now: Optional[float] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Append a batch of readings and run the detectors over it
+
+        Returns the anomalies as parallel arrays (row, value, zscore, kind,
+        timestamp), leaving out sensors still inside their alert cooldown.
+        """
+        now = time.time() if now is None else now
+        rows = np.asarray(rows, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float32)
+        timestamps = np.full(len(rows), now) if timestamps is None else np.asarray(timestamps, dtype=np.float64)
+
+        # Order by sensor, keeping arrival order, and number each sensor's readings 0, 1, 2...
+        order = np.argsort(rows, kind="stable")
+        rows, values, timestamps = rows[order], values[order], timestamps[order]
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        sizes = np.diff(np.r_[starts, len(rows)])
+        rank = np.arange(len(rows)) - np.repeat(starts, sizes)
+
+        found = []
+        for r in range(int(sizes.max()) if len(rows) else 0):
+            sel = np.flatnonzero(rank == r) if r else starts
+            found.append(self._step(rows[sel], values[sel], timestamps[sel]))
+        self.readings_ingested += len(rows)
+
+        anomalies = {
+            key: np.concatenate([f[key] for f in found]) if found else np.empty(0)
+            for key in ("row", "value", "zscore", "kind", "timestamp")
+        }
+        # Report each sensor at most once per cooldown
+        if len(anomalies["row"]):
+            first = np.unique(anomalies["row"], return_index=True)[1]
+            keep = first[now - self.last_anomaly[anomalies["row"][first]] >= self.cooldown]
+            anomalies = {key: value[keep] for key, value in anomalies.items()}
+            self.last_anomaly[anomalies["row"]] = now
+            self.anomalies_detected += len(keep)
+        return anomalies
+
+    def _step(self, rows: np.ndarray, x: np.ndarray, ts: np.ndarray) -> Dict[str, np.ndarray]:
+        """Write and score at most one reading per sensor"""
+        head = self.head[rows]
+        slot = head % self.window
+        self.values[rows, slot] = x
+        self.timestamps[rows, slot] = ts
+
+        mean, var = self.mean[rows], self.var[rows]
+        # First reading seeds the mean
+        mean = np.where(head == 0, x, mean)
+        diff = x - mean
+        std = np.sqrt(var)
+        zscore = np.divide(diff, std, out=np.zeros_like(diff), where=std > 0)
+
+        limits = SENSOR_LIMITS[self.types[rows]]
+        out_of_range = (x < limits[:, 0]) | (x > limits[:, 1])
+        outlier = (head >= self.warmup) & (np.abs(zscore) > self.z_threshold)
+
+        increment = self.alpha * diff
+        self.mean[rows] = mean + increment
+        self.var[rows] = (1 - self.alpha) * (var + diff * increment)
+        self.head[rows] = head + 1
+
+        hit = np.flatnonzero(out_of_range | outlier)
+        return {
+            "row": rows[hit],
+            "value": x[hit],
+            "zscore": zscore[hit],
+            "kind": out_of_range[hit].astype(np.uint8),  # Index into ANOMALY_KINDS
+            "timestamp": ts[hit],
+        }
+
+    def recent(self, sensor_id: str, n: Optional[int] = None) -> Dict[str, List[float]]:
+        """Last n readings of a sensor, oldest first"""
+        row = self._rows[sensor_id]
+        count = min(int(self.head[row]), self.window, n or self.window)
+        slots = (self.head[row] - count + np.arange(count)) % self.window
+        return {
+            "values": self.values[row, slots].tolist(),
+            "timestamps": self.timestamps[row, slots].tolist()
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "sensors": len(self),
+            "readings_ingested": self.readings_ingested,
+            "anomalies_detected": self.anomalies_detected,
+            "memory_bytes": self.memory_bytes
+        }
+
+
+# Shared by all IoT agents so every sensor has exactly one ring buffer
+sensor_store = SensorStore(
+    max_sensors=settings.iot_max_sensors,
+    window=settings.iot_window,
+    alpha=settings.iot_ewma_alpha,
+    z_threshold=settings.iot_z_threshold,
+    warmup=settings.iot_warmup,
+    cooldown=settings.iot_anomaly_cooldown,
+)
 
 
 class IoTAgent(BaseAgent):
     """Monitors IoT sensors for real-time disaster data"""
-    
+
     def __init__(self, agent_id: int):
         super().__init__(agent_id, "iot")
-        self.sensor_types = ["seismic", "weather", "water_level", "air_quality"]
-        
+        self.sensor_types = SENSOR_TYPES
+        self.store = sensor_store
+
     async def initialize(self):
         """Initialize IoT sensor connections"""
         print(f"📡 IoT Agent {self.agent_id} initialized")
         # TODO: Connect to IoT platforms
-        
+
     async def process_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
-        """Monitor IoT sensors for anomalies"""
-        # TODO: Implement sensor monitoring
+        """Monitor IoT sensors for anomalies
+
+        Readings arrive either columnar ("sensor_ids", "values", optional
+        "timestamps" and "sensor_types"/"sensor_type") or as a "readings"
+        list of {"sensor_id", "sensor_type", "value", "timestamp"} dicts.
+        """
+        if task.get("readings"):
+            readings = task["readings"]
+            sensor_ids = [r["sensor_id"] for r in readings]
+            sensor_types = [r.get("sensor_type", "weather") for r in readings]
+            values = [r["value"] for r in readings]
+            timestamps = [r.get("timestamp", time.time()) for r in readings]
+        else:
+            sensor_ids = task.get("sensor_ids", [])
+            values = task.get("values", [])
+            timestamps = task.get("timestamps")
+            sensor_types = task.get("sensor_types") or [task.get("sensor_type", "weather")] * len(sensor_ids)
+
+        anomalies = []
+        if sensor_ids:
+            found = self.store.ingest(self.store.rows(sensor_ids, sensor_types), values, timestamps)
+            anomalies = self._to_reports(found)
+            if anomalies:
+                from app.core.orchestrator import orchestrator
+
+                # Never wait on the task queue from inside a dispatcher worker
+                await orchestrator.ingest_reports(anomalies, wait=False)
+
         return {
             "agent_id": self.agent_id,
             "type": "iot",
             "result": "monitoring_active",
-            "sensors_monitored": 0
+            "sensors_monitored": len(self.store),
+            "readings_processed": len(sensor_ids),
+            "anomalies": len(anomalies)
         }
+
+    def _to_reports(self, anomalies: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """Turn detected anomalies into disaster reports for classification"""
+        reports = []
+        for row, value, zscore, kind, ts in zip(
+            anomalies["row"].tolist(), anomalies["value"].tolist(), anomalies["zscore"].tolist(),
+            anomalies["kind"].tolist(), anomalies["timestamp"].tolist()
+        ):
+            type_code = int(self.store.types[row])
+            sensor_id = self.store.sensor_ids[row]
+            severity = "high" if ANOMALY_KINDS[kind] == "threshold" else "medium"
+            reports.append({
+                "type": SENSOR_DISASTERS[type_code],
+                "severity": severity,
+                "source": f"iot:{SENSOR_TYPES[type_code]}",
+                "description": (
+                    f"Sensor {sensor_id} {ANOMALY_KINDS[kind]} anomaly: "
+                    f"value {value:.3f} (z={zscore:.1f})"
+                ),
+                "sensor_id": sensor_id,
+                "observed_at": datetime.utcfromtimestamp(ts).isoformat()
+            })
+        return reports
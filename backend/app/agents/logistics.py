@@ -1,24 +1,407 @@
 """Logistics and Route Optimization Agents (61-70)"""
 
 from app.agents.base import BaseAgent
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Sequence, Set, Tuple
+from collections import OrderedDict
+from heapq import heappop, heappush
+from pathlib import Path
+import asyncio
+import math
+import threading
+import time
+import numpy as np
+from app.core.config import settings
+from app.core.spatial import KM_PER_DEGREE, haversine_km, parse_location
+
+INF = float("inf")
+ACTIVE_LANDMARKS = 4  # Landmarks consulted per query, picked for the source/target pair
+
+
+class RoadGraph:
+    """Undirected road network in CSR form
+
+    Node u's outgoing edges are indices[indptr[u]:indptr[u + 1]] with travel
+    times (seconds) in weights; every road is stored once per direction.
+    lat/lng give node positions. Saved and loaded as a single .npz, including
+    the landmark distances used by the A* heuristic once computed.
+    """
+
+    def __init__(
+        self,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        weights: np.ndarray,
+        lat: np.ndarray,
+        lng: np.ndarray,
+        landmark_dist: Optional[np.ndarray] = None,
+    ):
+        self.indptr = np.ascontiguousarray(indptr, dtype=np.int64)
+        self.indices = np.ascontiguousarray(indices, dtype=np.int32)
+        self.weights = np.ascontiguousarray(weights, dtype=np.float32)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lng = np.asarray(lng, dtype=np.float64)
+        # Source node of every edge, for vectorized closure lookups
+        self.edge_src = np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.indptr))
+        # (landmarks, nodes) travel times from each landmark
+        self.landmark_dist = None if landmark_dist is None else np.ascontiguousarray(landmark_dist, dtype=np.float32)
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.indices)
+
+    @classmethod
+    def from_edges(
+        cls, src: Sequence[int], dst: Sequence[int], seconds: Sequence[float],
+        lat: Sequence[float], lng: Sequence[float],
+    ) -> "RoadGraph":
+        """Build from an undirected edge list, adding both directions"""
+        src, dst = np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64)
+        seconds = np.asarray(seconds, dtype=np.float32)
+        tails = np.concatenate((src, dst))
+        heads = np.concatenate((dst, src))
+        order = np.argsort(tails, kind="stable")
+        indptr = np.zeros(len(lat) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tails, minlength=len(lat)), out=indptr[1:])
+        return cls(indptr, heads[order], np.concatenate((seconds, seconds))[order], lat, lng)
+
+    @classmethod
+    def load(cls, path: str) -> "RoadGraph":
+        with np.load(path) as data:
+            return cls(
+                data["indptr"], data["indices"], data["weights"], data["lat"], data["lng"],
+                data["landmark_dist"] if "landmark_dist" in data else None,
+            )
+
+    def save(self, path: str):
+        arrays = dict(indptr=self.indptr, indices=self.indices, weights=self.weights,
+                      lat=self.lat, lng=self.lng)
+        if self.landmark_dist is not None:
+            arrays["landmark_dist"] = self.landmark_dist
+        np.savez(path, **arrays)
+
+    def shortest_times(self, source: int) -> np.ndarray:
+        """Dijkstra travel times from one node to all others"""
+        indptr, indices, weights = self.indptr.tolist(), self.indices.tolist(), self.weights.tolist()
+        dist = [INF] * self.num_nodes
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heappop(heap)
+            if d > dist[u]:
+                continue
+            for e in range(indptr[u], indptr[u + 1]):
+                nd = d + weights[e]
+                v = indices[e]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    heappush(heap, (nd, v))
+        return np.array(dist, dtype=np.float32)
+
+    def compute_landmarks(self, count: int = 8):
+        """Pick landmarks by farthest-point selection and store their distance tables
+
+        Closing roads only makes paths longer, so these tables stay valid
+        lower bounds however many closures are applied later.
+        """
+        tables = []
+        landmark = 0
+        nearest = np.full(self.num_nodes, np.inf, dtype=np.float32)
+        for _ in range(min(count, self.num_nodes)):
+            table = self.shortest_times(landmark)
+            tables.append(table)
+            # Unreachable nodes never become landmarks
+            np.minimum(nearest, np.where(np.isinf(table), -1, table), out=nearest)
+            landmark = int(np.argmax(nearest))
+        self.landmark_dist = np.stack(tables)
+
+    def nearest_node(self, lat: float, lng: float) -> int:
+        """Node closest to a point (equirectangular approximation)"""
+        dx = (self.lng - lng) * math.cos(math.radians(lat))
+        dy = self.lat - lat
+        return int(np.argmin(dx * dx + dy * dy))
+
+    def edges_in_bbox(self, bbox: Sequence[float]) -> np.ndarray:
+        """Edges with either end inside [min_lat, min_lng, max_lat, max_lng]"""
+        min_lat, min_lng, max_lat, max_lng = bbox
+        inside = (self.lat >= min_lat) & (self.lat <= max_lat) & (self.lng >= min_lng) & (self.lng <= max_lng)
+        return np.flatnonzero(inside[self.edge_src] | inside[self.indices])
+
+
+class RoutingEngine:
+    """A* point-to-point routing with landmark (ALT) lower bounds and a route cache
+
+    Closures are counted per edge, so overlapping closures reopen correctly
+    and applying one costs only the edges it touches. Cached routes are
+    indexed by the edges they use, so a closure evicts just the routes it
+    breaks; a reopening evicts just the routes the landmark bounds say the
+    reopened roads could shorten.
+    """
+
+    def __init__(self, graph: RoadGraph, cache_size: int = 4096, landmarks: int = 8):
+        if graph.landmark_dist is None:
+            graph.compute_landmarks(landmarks)
+        self.graph = graph
+        self.blocked = np.zeros(graph.num_edges, dtype=np.uint16)
+        # Zero-copy views: cheap per-element access from the Python search loop
+        self._indptr = memoryview(graph.indptr)
+        self._indices = memoryview(graph.indices)
+        self._weights = memoryview(graph.weights)
+        self._blocked = memoryview(self.blocked)
+
+        self.closures: Dict[str, np.ndarray] = {}
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[int, int], Optional[Dict[str, Any]]]" = OrderedDict()
+        self._routes_by_edge: Dict[int, Set[Tuple[int, int]]] = {}
+
+        self.queries = 0
+        self.cache_hits = 0
+        self.nodes_settled = 0
+        self.search_seconds = 0.0
+
+    def route(self, source: int, target: int) -> Optional[Dict[str, Any]]:
+        """Fastest open route between two nodes, or None if unreachable"""
+        self.queries += 1
+        key = (source, target)
+        if key in self._cache:
+            self.cache_hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        started = time.perf_counter()
+        route = self._search(source, target)
+        self.search_seconds += time.perf_counter() - started
+        self._remember(key, route)
+        return route
+
+    def route_between(self, origin: Dict[str, float], destination: Dict[str, float]) -> Optional[Dict[str, Any]]:
+        """Route between two {"lat", "lng"} points, snapped to the nearest nodes"""
+        start, end = parse_location(origin), parse_location(destination)
+        if start is None or end is None:
+            return None
+        return self.route(self.graph.nearest_node(*start), self.graph.nearest_node(*end))
+
+    def _search(self, source: int, target: int) -> Optional[Dict[str, Any]]:
+        indptr, indices, weights, blocked = self._indptr, self._indices, self._weights, self._blocked
+
+        # Lower bounds for every node from the landmarks that best separate
+        # source and target: one vectorized pass, then O(1) lookups in the loop
+        table = self.graph.landmark_dist
+        with np.errstate(invalid="ignore"):
+            spread = np.abs(table[:, source] - table[:, target])
+        active = np.argsort(np.nan_to_num(spread))[::-1][:ACTIVE_LANDMARKS]
+        with np.errstate(invalid="ignore"):
+            lower = np.abs(table[active[0]] - table[active[0], target])
+            for i in active[1:]:
+                np.fmax(lower, np.abs(table[i] - table[i, target]), out=lower)
+        # A landmark reaching neither node says nothing (inf - inf)
+        np.nan_to_num(lower, copy=False, nan=0.0, posinf=INF)
+        bound = memoryview(lower)
+
+        dist = {source: 0.0}
+        via: Dict[int, Tuple[int, int]] = {}
+        settled = set()
+        heap = [(bound[source], 0.0, source)]
+        while heap:
+            _, g, u = heappop(heap)
+            if u == target:
+                break
+            if u in settled:
+                continue
+            settled.add(u)
+            for e in range(indptr[u], indptr[u + 1]):
+                if blocked[e]:
+                    continue
+                v = indices[e]
+                ng = g + weights[e]
+                if ng < dist.get(v, INF):
+                    dist[v] = ng
+                    via[v] = (u, e)
+                    heappush(heap, (ng + bound[v], ng, v))
+        else:
+            self.nodes_settled += len(settled)
+            return None
+        self.nodes_settled += len(settled)
+
+        nodes, edges = [target], []
+        while nodes[-1] != source:
+            u, e = via[nodes[-1]]
+            nodes.append(u)
+            edges.append(e)
+        nodes.reverse()
+        edges.reverse()
+        lat, lng = self.graph.lat, self.graph.lng
+        return {
+            "nodes": nodes,
+            "edges": edges,
+            "seconds": round(dist[target], 1),
+            "km": round(sum(
+                haversine_km(lat[a], lng[a], lat[b], lng[b]) for a, b in zip(nodes, nodes[1:])
+            ), 3)
+        }
+
+    def _remember(self, key: Tuple[int, int], route: Optional[Dict[str, Any]]):
+        self._cache[key] = route
+        if route is not None:
+            for e in route["edges"]:
+                self._routes_by_edge.setdefault(e, set()).add(key)
+        while len(self._cache) > self.cache_size:
+            self._forget(*self._cache.popitem(last=False))
+
+    def _forget(self, key: Tuple[int, int], route: Optional[Dict[str, Any]]):
+        if route is None:
+            return
+        for e in route["edges"]:
+            keys = self._routes_by_edge.get(e)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._routes_by_edge[e]
+
+    def close(self, closure_id: str, bbox: Sequence[float]) -> int:
+        """Close every road touching a bounding box; returns the number of edges closed"""
+        if closure_id in self.closures:
+            self.reopen(closure_id)
+        edges = self.graph.edges_in_bbox(bbox)
+        self.closures[closure_id] = edges
+        newly_blocked = edges[self.blocked[edges] == 0]
+        self.blocked[edges] += 1
+
+        # Evict cached routes over newly closed edges; unroutable results may now differ too
+        stale = set()
+        for e in newly_blocked.tolist():
+            stale.update(self._routes_by_edge.get(e, ()))
+        stale.update(key for key, route in self._cache.items() if route is None)
+        for key in stale:
+            self._forget(key, self._cache.pop(key))
+        return len(edges)
+
+    def close_around(self, closure_id: str, location: Dict[str, float], radius_km: float) -> int:
+        point = parse_location(location)
+        if point is None:
+            return 0
+        lat, lng = point
+        dlat = radius_km / KM_PER_DEGREE
+        dlng = radius_km / (KM_PER_DEGREE * max(0.01, math.cos(math.radians(lat))))
+        return self.close(closure_id, [lat - dlat, lng - dlng, lat + dlat, lng + dlng])
+
+    def reopen(self, closure_id: str) -> int:
+        """Lift a closure; returns the number of edges it covered"""
+        edges = self.closures.pop(closure_id, None)
+        if edges is None:
+            return 0
+        self.blocked[edges] -= 1
+        reopened = edges[self.blocked[edges] == 0]
+        if len(reopened) and self._cache:
+            for key in self._improvable_routes(reopened):
+                self._forget(key, self._cache.pop(key))
+        return len(edges)
+
+    def _improvable_routes(self, reopened: np.ndarray, chunk: int = 256) -> List[Tuple[int, int]]:
+        """Cached routes that a path over the reopened edges might now beat
+
+        Any such path passes through an endpoint a of a reopened edge, so it
+        costs at least LB(s, a) + LB(a, t) by the landmark bounds; routes
+        already no slower than the smallest such bound stay cached.
+        """
+        graph = self.graph
+        nodes = np.unique(np.concatenate((graph.edge_src[reopened], graph.indices[reopened])))
+        at_nodes = graph.landmark_dist[:, nodes][:, None, :]  # (landmarks, 1, nodes)
+
+        keys = list(self._cache)
+        stale = [key for key in keys if self._cache[key] is None]  # May be reachable now
+        routed = [key for key in keys if self._cache[key] is not None]
+        for i in range(0, len(routed), chunk):
+            batch = routed[i:i + chunk]
+            sources = graph.landmark_dist[:, [s for s, _ in batch]][:, :, None]
+            targets = graph.landmark_dist[:, [t for _, t in batch]][:, :, None]
+            with np.errstate(invalid="ignore"):
+                via = np.nan_to_num(np.abs(at_nodes - sources)).max(axis=0) \
+                    + np.nan_to_num(np.abs(at_nodes - targets)).max(axis=0)
+            seconds = np.array([self._cache[key]["seconds"] for key in batch])
+            stale.extend(key for key, improvable in zip(batch, via.min(axis=1) < seconds) if improvable)
+        return stale
+
+    def get_stats(self) -> Dict[str, Any]:
+        searches = self.queries - self.cache_hits
+        return {
+            "nodes": self.graph.num_nodes,
+            "edges": self.graph.num_edges,
+            "closures": len(self.closures),
+            "edges_closed": int(np.count_nonzero(self.blocked)),
+            "queries": self.queries,
+            "cache_hit_rate": round(self.cache_hits / self.queries, 4) if self.queries else 0.0,
+            "cached_routes": len(self._cache),
+            "avg_search_ms": round(self.search_seconds / searches * 1000, 3) if searches else 0.0,
+            "avg_nodes_settled": round(self.nodes_settled / searches, 1) if searches else 0.0
+        }
+
+
+_routing_engine: Optional[RoutingEngine] = None
+_routing_engine_lock = threading.Lock()
+
+
+def get_routing_engine() -> Optional[RoutingEngine]:
+    """Shared engine over the configured road graph, loaded on first use"""
+    global _routing_engine
+    with _routing_engine_lock:
+        if _routing_engine is None and Path(settings.road_graph_path).exists():
+            _routing_engine = RoutingEngine(
+                RoadGraph.load(settings.road_graph_path),
+                cache_size=settings.route_cache_size,
+                landmarks=settings.routing_landmarks,
+            )
+    return _routing_engine
 
 
 class LogisticsAgent(BaseAgent):
     """Optimizes routes and logistics for disaster response"""
-    
+
     def __init__(self, agent_id: int):
         super().__init__(agent_id, "logistics")
-        
+        self.engine: Optional[RoutingEngine] = None
+
+    @classmethod
+    async def initialize_shared(cls):
+        # Loading may compute landmark tables; keep it off the event loop
+        await asyncio.to_thread(get_routing_engine)
+
     async def initialize(self):
         """Initialize routing algorithms"""
+        self.engine = get_routing_engine()
         print(f"🚚 Logistics Agent {self.agent_id} initialized")
-        
+
     async def process_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
-        """Calculate optimal routes"""
-        return {
+        """Calculate optimal routes
+
+        Closes roads around a disaster's location on "respond", lifts a
+        closure on "reopen_roads", and routes each {"from", "to"} pair in
+        "routes".
+        """
+        result = {
             "agent_id": self.agent_id,
             "type": "logistics",
             "result": "routes_optimized",
             "routes_calculated": 0
         }
+        if self.engine is None:
+            return result
+
+        action = task.get("action")
+        if action == "respond" and task.get("location"):
+            closure_id = task.get("disaster_id") or str(task["location"])
+            radius = task.get("closure_radius_km", settings.road_closure_radius_km)
+            result["edges_closed"] = self.engine.close_around(closure_id, task["location"], radius)
+        elif action == "reopen_roads" and task.get("closure_id"):
+            result["edges_reopened"] = self.engine.reopen(task["closure_id"])
+
+        routes = [self.engine.route_between(r.get("from"), r.get("to")) for r in task.get("routes", [])]
+        result["routes_calculated"] = len(routes)
+        result["routes"] = [
+            {"seconds": r["seconds"], "km": r["km"], "nodes": len(r["nodes"])} if r else None
+            for r in routes
+        ]
+        return result
@@ -1,24 +1,631 @@
 """Risk Prediction and Modeling Agents (71-75)"""
 
 from app.agents.base import BaseAgent
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+import asyncio
+import math
+import os
+import threading
+import time
+import zlib
+import numpy as np
+from app.core.config import settings
+from app.core.spatial import KM_PER_DEGREE, parse_location
+
+# Spread model run for each disaster type
+HAZARD_MODELS = {"wildfire": "fire", "fire": "fire", "flood": "flood", "storm": "flood", "hurricane": "flood"}
+
+# (row, col) offsets of the 8 neighbours fire spreads to
+FIRE_NEIGHBOURS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+FIRE_SPREAD_MPM = 3.0        # Calm-air rate of spread on full fuel (m/min)
+FIRE_WIND_FACTOR = 0.12      # Spread multiplier exponent per m/s of wind along the spread direction
+FIRE_BURN_MINUTES = 60.0     # Minutes a cell burns (and spreads) after igniting
+FLOW_RATE = 0.2              # Fraction of a surface height difference that flows per step
+FLOOD_DEPTH_M = 0.1          # Depth counted as flooded
+INFILTRATION_MM_H = 5.0      # Rain soaked up before it pools
+DEFAULT_INFLOW_M3S = 200.0   # Flood source at the incident location when nothing else is given
+
+UNBURNT = np.iinfo(np.int16).max  # Arrival step of cells that have not ignited
+PROBABILITY_LEVELS = (0.1, 0.5, 0.9)
+
+# (row_start, row_stop, col_start, col_stop) of a grid region
+Window = Tuple[int, int, int, int]
+
+
+def _union(a: Optional[Window], b: Optional[Window]) -> Optional[Window]:
+    if a is None or b is None:
+        return a or b
+    return min(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3])
+
+
+def _grow(window: Window, shape: Sequence[int]) -> Window:
+    """Window plus a one-cell ring, clipped to the grid"""
+    r0, r1, c0, c1 = window
+    return max(r0 - 1, 0), min(r1 + 1, shape[0]), max(c0 - 1, 0), min(c1 + 1, shape[1])
+
+
+def _scratch(buffers: Dict[str, np.ndarray], name: str, shape: Tuple[int, ...]) -> np.ndarray:
+    """Reusable float32 work array of a shape, grown as needed"""
+    size = math.prod(shape)
+    buf = buffers.get(name)
+    if buf is None or buf.size < size:
+        buf = buffers[name] = np.empty(size, dtype=np.float32)
+    return buf[:size].reshape(shape)
+
+
+def _extent(mask: np.ndarray, origin: Tuple[int, int] = (0, 0)) -> Optional[Window]:
+    """Bounding window of the True cells of an (members, rows, cols) mask"""
+    rows = np.flatnonzero(mask.any(axis=(0, 2)))
+    if not len(rows):
+        return None
+    cols = np.flatnonzero(mask.any(axis=(0, 1)))
+    return (origin[0] + rows[0], origin[0] + rows[-1] + 1, origin[1] + cols[0], origin[1] + cols[-1] + 1)
+
+
+class SpreadGrid:
+    """North-up raster of square cells centred on an incident"""
+
+    def __init__(self, lat: float, lng: float, size: int, cell_m: float):
+        self.lat, self.lng = lat, lng
+        self.shape = (size, size)
+        self.cell_m = cell_m
+        self.dlat = cell_m / 1000 / KM_PER_DEGREE
+        self.dlng = self.dlat / max(0.01, math.cos(math.radians(lat)))
+        self.north = lat + size / 2 * self.dlat
+        self.west = lng - size / 2 * self.dlng
+
+    @property
+    def cell_km2(self) -> float:
+        return (self.cell_m / 1000) ** 2
+
+    def cell(self, lat: float, lng: float) -> Optional[Tuple[int, int]]:
+        row = int((self.north - lat) / self.dlat)
+        col = int((lng - self.west) / self.dlng)
+        if 0 <= row < self.shape[0] and 0 <= col < self.shape[1]:
+            return row, col
+        return None
+
+    def bounds(self, window: Optional[Window] = None) -> List[float]:
+        """[min_lat, min_lng, max_lat, max_lng] of a window (the whole grid by default)"""
+        r0, r1, c0, c1 = (int(i) for i in window or (0, self.shape[0], 0, self.shape[1]))
+        return [
+            round(self.north - r1 * self.dlat, 6), round(self.west + c0 * self.dlng, 6),
+            round(self.north - r0 * self.dlat, 6), round(self.west + c1 * self.dlng, 6)
+        ]
+
+
+class SpreadScenario:
+    """Ensemble state of one incident's spread model, advanced in fixed steps
+
+    The state holds every ensemble member in one (members, rows, cols)
+    array, so each step is a handful of NumPy operations for the whole
+    ensemble, limited to the window where anything can change: the
+    ignited area plus one ring for fire, the wet area plus one ring for
+    floods (the whole grid while it rains). Forecasts keep copies of
+    that window at a few early checkpoints, so the next update resumes
+    from the checkpoint before it instead of stepping from the last
+    observation again.
+    """
+
+    def __init__(
+        self,
+        incident_id: str,
+        model: str,
+        grid: SpreadGrid,
+        members: int,
+        step_minutes: float,
+        terrain: Optional[np.ndarray] = None,
+        pool: Optional[Executor] = None,
+        chunk: int = 1,
+    ):
+        self.incident_id = incident_id
+        self.model = model
+        self.grid = grid
+        self.members = members
+        self.step_minutes = step_minutes
+        self.pool = pool
+        self.chunk = chunk  # Members stepped together
+        shape = (members, *grid.shape)
+        if model == "fire":
+            self.fuel = np.ones(grid.shape, dtype=np.float32) if terrain is None else terrain
+            self.state = {
+                "arrival": np.full(shape, UNBURNT, dtype=np.int16),
+                "progress": np.zeros(shape, dtype=np.float32),
+            }
+            self.burn_steps = max(1, round(FIRE_BURN_MINUTES / step_minutes))
+        else:
+            self.elevation = terrain  # None is flat ground
+            self.state = {"depth": np.zeros(shape, dtype=np.float32)}
+        # Window of cells that can change on the next step
+        self.window: Optional[Window] = None
+        self.step = 0
+        self.clock: Optional[float] = None  # Wall-clock time of self.step
+        self.checkpoints: List[Tuple[int, Window, Optional[Window], Dict[str, np.ndarray]]] = []
+        self.forecast: Optional[Dict[str, Any]] = None
+
+        # Fixed per-member noise, so members keep their identity as conditions change
+        rng = np.random.default_rng(zlib.crc32(incident_id.encode()))
+        self.noise = rng.standard_normal((3, members)).astype(np.float32)
+        self.noise[:, 0] = 0  # Member 0 runs the observed conditions unperturbed
+        self.conditions: Dict[str, float] = {}
+
+    @property
+    def step_seconds(self) -> float:
+        return self.step_minutes * 60
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(a.nbytes for a in self.state.values()) + sum(
+            a.nbytes for c in self.checkpoints for a in c[3].values()
+        )
+
+    def observe(self, observations: Sequence[Dict[str, Any]]) -> int:
+        """Force observed burning or flooded cells into every member"""
+        applied = 0
+        for obs in observations:
+            point = parse_location(obs)
+            cell = self.grid.cell(*point) if point else None
+            if cell is None:
+                continue
+            r, c = cell
+            if self.model == "fire":
+                arrival = self.state["arrival"][:, r, c]
+                # Observed fire counts as igniting now unless a member already has it burning
+                np.minimum(arrival, self.step, out=arrival)
+            else:
+                depth = self.state["depth"][:, r, c]
+                np.maximum(depth, float(obs.get("depth_m", 1.0)), out=depth)
+            self.window = _union(self.window, _grow((r, r + 1, c, c + 1), self.grid.shape))
+            applied += 1
+        return applied
+
+    def run(self, state: Dict[str, np.ndarray], start: int, steps: int, window: Optional[Window],
+            checkpoint_every: int = 0, max_checkpoints: int = 0
+            ) -> Tuple[Optional[Window], Optional[Window], List[Tuple[int, Window, Optional[Window], Dict]]]:
+        """Advance state in place; returns (next window, window of all changes, checkpoints)
+
+        Members are independent, so each step runs as one slice of
+        members per pool worker (or one after another without a pool,
+        which keeps each slice's temporaries in cache).
+        """
+        changed = window
+        checkpoints = []
+        params = self._member_params()
+        step_members = self._fire_step if self.model == "fire" else self._flood_step
+        chunks = [slice(m, m + self.chunk) for m in range(0, self.members, self.chunk)]
+        # Work arrays per chunk, reused across this run's steps
+        scratch = [{} for _ in chunks]
+        for i in range(steps):
+            if self.model == "flood":
+                window = self._flood_window(window, params)
+            if window is not None:
+                args = (state, start + i, window, params)
+                if self.pool is not None and len(chunks) > 1:
+                    windows = list(self.pool.map(lambda c: step_members(*args, chunks[c], scratch[c]), range(len(chunks))))
+                else:
+                    windows = [step_members(*args, m, buffers) for m, buffers in zip(chunks, scratch)]
+                window = None
+                for chunk_window in windows:
+                    window = _union(window, chunk_window)
+            changed = _union(changed, window)
+            done = i + 1
+            if checkpoint_every and done % checkpoint_every == 0 and len(checkpoints) < max_checkpoints and changed:
+                r0, r1, c0, c1 = changed
+                checkpoints.append((
+                    start + done, changed, window,
+                    {name: a[:, r0:r1, c0:c1].copy() for name, a in state.items()}
+                ))
+        return window, changed, checkpoints
+
+    def _member_params(self) -> Dict[str, np.ndarray]:
+        """Per-member conditions: observed values perturbed by each member's noise"""
+        conditions = self.conditions
+        if self.model == "fire":
+            speed = np.maximum(conditions.get("wind_speed_ms", 0.0) * (1 + 0.2 * self.noise[0]), 0)
+            # Wind direction is where it blows from; fire runs the other way
+            heading = np.radians(conditions.get("wind_direction_deg", 0.0) + 180 + 15 * self.noise[1])
+            rate = np.exp(0.15 * self.noise[2]) * conditions.get("spread_rate_mpm", FIRE_SPREAD_MPM)
+            weights = np.empty((self.members, len(FIRE_NEIGHBOURS)), dtype=np.float32)
+            for d, (dr, dc) in enumerate(FIRE_NEIGHBOURS):
+                dist = math.hypot(dr, dc)
+                # Cosine between the neighbour's bearing (east=+col, north=-row) and the heading
+                along = (dc * np.sin(heading) - dr * np.cos(heading)) / dist
+                weights[:, d] = np.exp(FIRE_WIND_FACTOR * speed * along) / dist
+            return {"weights": weights * (rate * self.step_minutes / self.grid.cell_m)[:, None]}
+
+        step_hours = self.step_minutes / 60
+        net_rain_m = max(0.0, conditions.get("rainfall_mm_h", 0.0) - INFILTRATION_MM_H) * step_hours / 1000
+        inflow_m = conditions.get("inflow_m3s", 0.0) * self.step_seconds / self.grid.cell_m ** 2
+        return {
+            "rain": (net_rain_m * np.exp(0.3 * self.noise[0])).astype(np.float32)[:, None, None],
+            "inflow": (inflow_m * np.exp(0.2 * self.noise[1])).astype(np.float32),
+            "source": self.grid.cell(conditions["lat"], conditions["lng"]) if inflow_m else None,
+        }
+
+    def _fire_step(self, state: Dict[str, np.ndarray], step: int, window: Window,
+                   params: Dict[str, np.ndarray], m: slice, buffers: Dict[str, np.ndarray]) -> Window:
+        """Heat cells next to burning ones; cells whose progress reaches 1 ignite"""
+        shape = self.grid.shape
+        r0, r1, c0, c1 = window
+        # Burning cells one ring out can heat the edge of the window
+        s0, s1, t0, t1 = _grow(window, shape)
+        arrival = state["arrival"][m, s0:s1, t0:t1]
+        burning = np.zeros((len(arrival), r1 - r0 + 2, c1 - c0 + 2), dtype=np.float32)
+        burning[:, s0 - r0 + 1:s1 - r0 + 1, t0 - c0 + 1:t1 - c0 + 1] = (
+            (arrival <= step) & (arrival > step - self.burn_steps)
+        )
+
+        height, width = r1 - r0, c1 - c0
+        heat = np.zeros((len(arrival), height, width), dtype=np.float32)
+        term = np.empty_like(heat)
+        weights = params["weights"][m]
+        for d, (dr, dc) in enumerate(FIRE_NEIGHBOURS):
+            # Cell (i, j) is heated by the burning cell at (i - dr, j - dc)
+            source = burning[:, 1 - dr:1 - dr + height, 1 - dc:1 - dc + width]
+            np.multiply(source, weights[:, d, None, None], out=term)
+            heat += term
+        heat *= self.fuel[r0:r1, c0:c1]
+
+        progress = state["progress"][m, r0:r1, c0:c1]
+        progress += heat
+        arrival = state["arrival"][m, r0:r1, c0:c1]
+        ignite = (progress >= 1) & (arrival == UNBURNT)
+        arrival[ignite] = step + 1
+
+        ignited = _extent(ignite, (r0, c0))
+        if ignited is not None:
+            window = _union(window, _grow(ignited, shape))
+        return window
+
+    def _flood_window(self, window: Optional[Window], params: Dict[str, Any]) -> Optional[Window]:
+        """Cells the next flood step can change: wet cells, the inflow, everything while raining"""
+        shape = self.grid.shape
+        if params["rain"].any():
+            return 0, shape[0], 0, shape[1]
+        if params["source"] is not None:
+            r, c = params["source"]
+            window = _union(window, _grow((r, r + 1, c, c + 1), shape))
+        return window
+
+    def _flood_step(self, state: Dict[str, np.ndarray], step: int, window: Window,
+                    params: Dict[str, Any], m: slice, buffers: Dict[str, np.ndarray]) -> Optional[Window]:
+        """Add rain and inflow, then move water downhill between neighbouring cells"""
+        shape = self.grid.shape
+        r0, r1, c0, c1 = window
+        if params["source"] is not None:
+            r, c = params["source"]
+            state["depth"][m, r, c] += params["inflow"][m]
+        depth = state["depth"][m, r0:r1, c0:c1]
+        rain = params["rain"][m]
+        raining = bool(rain.any())
+        if raining:
+            depth += rain
+        n, height, width = depth.shape
+        surface = depth
+        if self.elevation is not None:
+            surface = np.add(depth, self.elevation[r0:r1, c0:c1], out=_scratch(buffers, "surface", depth.shape))
+        # No cell gives away more than a quarter of its water across one boundary,
+        # so the four together can never take it below zero
+        limit = np.multiply(depth, 0.25, out=_scratch(buffers, "limit", depth.shape))
+        neg_limit = np.negative(limit, out=_scratch(buffers, "neg_limit", depth.shape))
+
+        # Signed flow across each boundary: towards +col, then towards +row
+        flow_x = _scratch(buffers, "flow_x", (n, height, width - 1))
+        np.subtract(surface[:, :, :-1], surface[:, :, 1:], out=flow_x)
+        flow_x *= FLOW_RATE
+        np.minimum(flow_x, limit[:, :, :-1], out=flow_x)
+        np.maximum(flow_x, neg_limit[:, :, 1:], out=flow_x)
+        flow_y = _scratch(buffers, "flow_y", (n, height - 1, width))
+        np.subtract(surface[:, :-1, :], surface[:, 1:, :], out=flow_y)
+        flow_y *= FLOW_RATE
+        np.minimum(flow_y, limit[:, :-1, :], out=flow_y)
+        np.maximum(flow_y, neg_limit[:, 1:, :], out=flow_y)
+
+        depth[:, :, :-1] -= flow_x
+        depth[:, :, 1:] += flow_x
+        depth[:, :-1, :] -= flow_y
+        depth[:, 1:, :] += flow_y
+
+        if raining:
+            return window
+        wet = _extent(depth > 1e-4, (r0, c0))
+        return _grow(wet, shape) if wet else None
+
+    def advance_to(self, now: float) -> Tuple[int, int]:
+        """Bring the state up to wall-clock time now, reusing the last forecast's checkpoints
+
+        Returns (steps advanced, steps that had to be computed).
+        """
+        if self.clock is None:
+            self.clock = now
+            return 0, 0
+        steps = int((now - self.clock) // self.step_seconds)
+        if steps <= 0:
+            return 0, 0
+        target = self.step + steps
+        usable = [c for c in self.checkpoints if c[0] <= target]
+        if usable:
+            step, (r0, r1, c0, c1), window, saved = usable[-1]
+            for name, region in saved.items():
+                self.state[name][:, r0:r1, c0:c1] = region
+            self.step, self.window = step, window
+        remaining = target - self.step
+        if remaining:
+            self.window = self.run(self.state, self.step, remaining, self.window)[0]
+        self.step = target
+        self.clock += steps * self.step_seconds
+        self.checkpoints = []
+        return steps, remaining
+
+    def predict(self, horizon_steps: int, checkpoint_every: int, max_checkpoints: int) -> Dict[str, Any]:
+        """Run every member horizon_steps ahead of the current state and summarize"""
+        started = time.perf_counter()
+        forecast = {name: a.copy() for name, a in self.state.items()}
+        _, changed, self.checkpoints = self.run(
+            forecast, self.step, horizon_steps, self.window, checkpoint_every, max_checkpoints
+        )
+
+        if self.model == "fire":
+            hit = forecast["arrival"] != UNBURNT
+        else:
+            hit = forecast["depth"] >= FLOOD_DEPTH_M
+        probability = hit.mean(axis=0, dtype=np.float32)
+        result = self._summarize(probability, changed)
+        if self.model == "flood":
+            result["max_depth_m"] = round(float(forecast["depth"].max()), 2)
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    def _summarize(self, probability: np.ndarray, changed: Optional[Window], size: int = 50) -> Dict[str, Any]:
+        """Areas and extent by probability level, plus a coarse probability grid for maps"""
+        grid = self.grid
+        levels = {f"p{int(p * 100)}": probability >= p for p in PROBABILITY_LEVELS}
+        # Block-average the grid down to at most size x size cells
+        block = -(-grid.shape[0] // size)
+        rows, cols = -(-grid.shape[0] // block), -(-grid.shape[1] // block)
+        padded = np.zeros((rows * block, cols * block), dtype=np.float32)
+        padded[:grid.shape[0], :grid.shape[1]] = probability
+        coarse = padded.reshape(rows, block, cols, block).mean(axis=(1, 3))
+
+        extent = _extent(levels["p10"][None])
+        return {
+            "area_km2": {name: round(float(mask.sum()) * grid.cell_km2, 2) for name, mask in levels.items()},
+            "bbox": grid.bounds(extent) if extent else None,
+            "probability": np.round(coarse * 100).astype(np.uint8).tolist(),
+            "probability_bounds": grid.bounds(),
+            "cells_simulated": 0 if changed is None else int((changed[1] - changed[0]) * (changed[3] - changed[2]))
+        }
+
+
+class SpreadEngine:
+    """Keeps an ensemble spread scenario per incident and refreshes its forecast
+
+    Each update first brings the incident's state to the current time,
+    then folds in observations and new conditions, and runs the
+    ensemble to the forecast horizon. Members are split across a
+    thread pool (NumPy releases the GIL in the array operations). The
+    least recently updated incidents are dropped beyond max_incidents.
+    """
+
+    def __init__(
+        self,
+        grid_size: int = 1000,
+        cell_size_m: float = 100.0,
+        step_minutes: float = 5.0,
+        members: int = 8,
+        horizon_hours: float = 6.0,
+        checkpoint_minutes: float = 15.0,
+        max_checkpoints: int = 2,
+        max_incidents: int = 8,
+        workers: int = 0,
+        data_dir: str = "data/terrain",
+    ):
+        self.grid_size = grid_size
+        self.cell_size_m = cell_size_m
+        self.step_minutes = step_minutes
+        self.members = members
+        self.horizon_hours = horizon_hours
+        self.checkpoint_every = max(1, round(checkpoint_minutes / step_minutes))
+        self.max_checkpoints = max_checkpoints
+        self.max_incidents = max_incidents
+        self.workers = min(workers or os.cpu_count() or 1, members)
+        self.data_dir = Path(data_dir)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.scenarios: "OrderedDict[str, SpreadScenario]" = OrderedDict()
+        # update() runs in worker threads: this guards scenarios and the counters
+        self._lock = threading.Lock()
+        # Incident -> [lock, callers using it]; only touched on the event loop
+        self._locks: Dict[str, List[Any]] = {}
+        self.forecasts = 0
+        self.steps_run = 0
+        self.steps_reused = 0
+        self.seconds = 0.0
+
+    @property
+    def pool(self) -> Optional[ThreadPoolExecutor]:
+        if self._pool is None and self.workers > 1:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="spread")
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def resolve(self, path: str) -> Path:
+        """Path of a raster under data_dir; anything resolving outside it is rejected"""
+        root = self.data_dir.resolve()
+        resolved = (root / path).resolve()
+        if not resolved.is_relative_to(root):
+            raise ValueError(f"Terrain path is outside the predictor data directory: {path}")
+        return resolved
+
+    def _terrain(self, path: Optional[str], shape: Tuple[int, int]) -> Optional[np.ndarray]:
+        """Fuel (0-1) or elevation (m) layer from a .npy raster matching the grid"""
+        if not path:
+            return None
+        layer = np.load(self.resolve(path)).astype(np.float32)
+        if layer.shape != shape:
+            raise ValueError(f"Terrain {path} is {layer.shape}, expected {shape}")
+        return layer
+
+    def _scenario(self, incident_id: str, model: str, task: Dict[str, Any]) -> SpreadScenario:
+        with self._lock:
+            scenario = self.scenarios.get(incident_id)
+            if scenario is not None and scenario.model == model:
+                self.scenarios.move_to_end(incident_id)
+                return scenario
+
+        # Built outside the lock (terrain loading is slow); predict() serializes runs per incident
+        point = parse_location(task.get("location"))
+        if point is None:
+            raise ValueError("Spread predictions need an incident location")
+        grid = SpreadGrid(*point, int(task.get("grid_size", self.grid_size)), self.cell_size_m)
+        terrain = self._terrain(task.get("fuel" if model == "fire" else "elevation"), grid.shape)
+        scenario = SpreadScenario(
+            incident_id, model, grid, self.members, self.step_minutes, terrain,
+            pool=self.pool, chunk=-(-self.members // self.workers)
+        )
+        scenario.conditions = {"lat": point[0], "lng": point[1]}
+        if model == "flood" and not task.get("rainfall_mm_h") and not task.get("observations"):
+            scenario.conditions["inflow_m3s"] = DEFAULT_INFLOW_M3S
+        if model == "fire":
+            # The incident location is burning
+            scenario.observe([{"lat": point[0], "lng": point[1]}])
+
+        with self._lock:
+            self.scenarios[incident_id] = scenario
+            self.scenarios.move_to_end(incident_id)
+            while len(self.scenarios) > self.max_incidents:
+                self.scenarios.popitem(last=False)
+        return scenario
+
+    def update(self, incident_id: str, model: str, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Advance an incident to now, apply the task's observations and conditions, and forecast"""
+        started = time.perf_counter()
+        now = float(task.get("timestamp") or time.time())
+        scenario = self._scenario(incident_id, model, task)
+        stepped, computed = scenario.advance_to(now)
+
+        changed = scenario.observe(task.get("observations", []))
+        for key in ("wind_speed_ms", "wind_direction_deg", "spread_rate_mpm", "rainfall_mm_h", "inflow_m3s"):
+            if key in task and scenario.conditions.get(key) != float(task[key]):
+                scenario.conditions[key] = float(task[key])
+                changed += 1
+
+        horizon = float(task.get("horizon_hours", self.horizon_hours))
+        refreshed = scenario.forecast is None or changed or stepped or scenario.forecast["horizon_hours"] != horizon
+        steps_run = computed
+        if refreshed:
+            horizon_steps = max(1, round(horizon * 60 / self.step_minutes))
+            forecast = scenario.predict(horizon_steps, self.checkpoint_every, self.max_checkpoints)
+            forecast.update({
+                "incident_id": incident_id,
+                "model": model,
+                "members": self.members,
+                "grid": list(scenario.grid.shape),
+                "cell_size_m": self.cell_size_m,
+                "horizon_hours": horizon,
+                "valid_from": scenario.clock,
+                "conditions": dict(scenario.conditions),
+            })
+            scenario.forecast = forecast
+            steps_run += horizon_steps
+        else:
+            forecast = scenario.forecast
+        with self._lock:
+            if refreshed:
+                self.forecasts += 1
+            self.steps_run += steps_run
+            self.steps_reused += stepped - computed
+            self.seconds += time.perf_counter() - started
+        return forecast
+
+    async def predict(self, incident_id: str, model: str, task: Dict[str, Any]) -> Dict[str, Any]:
+        """update() off the event loop, one run at a time per incident"""
+        entry = self._locks.setdefault(incident_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await asyncio.to_thread(self.update, incident_id, model, task)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[incident_id]
+
+    def get_forecast(self, incident_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            scenario = self.scenarios.get(incident_id)
+        return scenario.forecast if scenario else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            scenarios = list(self.scenarios.values())
+        return {
+            "incidents": len(scenarios),
+            "forecasts": self.forecasts,
+            "steps_run": self.steps_run,
+            "steps_reused": self.steps_reused,
+            "avg_forecast_seconds": round(self.seconds / self.forecasts, 3) if self.forecasts else 0.0,
+            "memory_bytes": sum(s.memory_bytes for s in scenarios)
+        }
+
+
+# Shared by all predictor agents so each incident has one evolving scenario
+spread_engine = SpreadEngine(
+    grid_size=settings.predictor_grid_size,
+    cell_size_m=settings.predictor_cell_size_m,
+    step_minutes=settings.predictor_step_minutes,
+    members=settings.predictor_members,
+    horizon_hours=settings.predictor_horizon_hours,
+    checkpoint_minutes=settings.predictor_checkpoint_minutes,
+    max_incidents=settings.predictor_max_incidents,
+    workers=settings.predictor_workers,
+    data_dir=settings.predictor_data_dir,
+)
 
 
 class PredictorAgent(BaseAgent):
     """Predicts disaster spread and risk zones"""
-    
+
     def __init__(self, agent_id: int):
         super().__init__(agent_id, "predictor")
-        
+        self.engine = spread_engine
+
+    @classmethod
+    async def shutdown_shared(cls):
+        # Waiting for in-flight ensemble runs must not block the event loop
+        await asyncio.to_thread(spread_engine.shutdown)
+
     async def initialize(self):
         """Initialize prediction models"""
         print(f"🔮 Predictor Agent {self.agent_id} initialized")
-        
+
     async def process_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate risk predictions"""
-        return {
+        """Generate risk predictions
+
+        Runs the fire or flood spread ensemble for the task's disaster.
+        Later tasks for the same "disaster_id" continue from its last
+        state with any new "observations" ([{"lat", "lng", "depth_m"}])
+        and conditions ("wind_speed_ms", "wind_direction_deg",
+        "rainfall_mm_h", "inflow_m3s").
+        """
+        result = {
             "agent_id": self.agent_id,
             "type": "predictor",
             "result": "predictions_generated",
             "models_run": 0
         }
+        model = task.get("model") or HAZARD_MODELS.get(task.get("disaster_type"))
+        incident_id = task.get("disaster_id") or str(task.get("location"))
+        if model is None or not task.get("location") and incident_id not in self.engine.scenarios:
+            return result
+
+        forecast = await self.engine.predict(incident_id, model, task)
+        result["models_run"] = self.engine.members
+        result["prediction"] = {k: v for k, v in forecast.items() if k != "probability"}
+        return result
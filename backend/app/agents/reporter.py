@@ -1,24 +1,260 @@
 """Report Generation Agents (86-95)"""
 
 from app.agents.base import BaseAgent
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Hashable, Optional
+from collections import OrderedDict
+from datetime import datetime
+from string import Template
+import sys
+import time
+from app.core.config import settings
+
+# Bullet shown under Agent Response for each deployed agent type
+AGENT_RESPONSE_LINES = {
+    "social": "Social media monitoring agents tracking public reports",
+    "news": "News feeds scanned for incident coverage",
+    "satellite": "Satellite imagery analysis in progress",
+    "iot": "IoT sensors providing real-time data",
+    "classifier": "Incoming reports classified and prioritized",
+    "resource": "Resource allocation agents coordinating response",
+    "logistics": "Logistics agents routing supplies around closures",
+    "predictor": "Spread prediction models updating risk zones",
+    "alert": "Alert agents notifying affected residents",
+    "dashboard": "Dashboard agents publishing live updates",
+    "reporter": "Reporter agents compiling situation reports",
+}
+DEFAULT_AGENT_TYPES = ("social", "satellite", "iot", "resource")
+
+# Sections in report order; each is compiled once and filled by substitute()
+SECTION_TEMPLATES = OrderedDict([
+    ("overview", Template(
+        "# $name\n\n"
+        "## Overview\n"
+        "Emergency response activated for $type event detected at $timestamp.\n\n"
+    )),
+    ("status", Template(
+        "## Status\n"
+        "- **Severity**: $severity\n"
+        "- **Location**: Lat $lat, Lng $lng\n"
+    )),
+    ("affected_area", Template(
+        "- **Affected Area**: $area km²\n$forecast\n"
+    )),
+    ("agent_response", Template(
+        "## Agent Response\n"
+        "Multiple AI agents activated for assessment and coordination:\n"
+        "$lines\n\n"
+    )),
+    ("recommendations", Template(
+        "## Recommendations\n"
+        "1. Continue monitoring situation\n"
+        "2. Prepare evacuation routes if needed\n"
+        "3. Coordinate with local emergency services\n\n"
+        "---\n"
+        "*Auto-generated by $app_name AI System*\n"
+    )),
+])
+
+
+def _overview(disaster: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Hashable]:
+    return {
+        "name": disaster.get("name") or f"{disaster.get('type', 'unknown').title()} Incident",
+        "type": disaster.get("type", "unknown"),
+        "timestamp": disaster.get("timestamp", ""),
+    }
+
+
+def _status(disaster: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Hashable]:
+    location = disaster.get("location") or {}
+    return {
+        "severity": str(disaster.get("severity", "medium")).upper(),
+        "lat": location.get("lat"),
+        "lng": location.get("lng"),
+    }
+
+
+def _affected_area(disaster: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Hashable]:
+    forecast = context.get("prediction")
+    area, line = disaster.get("affectedArea"), ""
+    if forecast:
+        areas = forecast["area_km2"]
+        area = area or areas["p50"]
+        line = (
+            f"- **Forecast ({forecast['horizon_hours']:g} h)**: {areas['p50']} km² likely affected, "
+            f"{areas['p10']} km² at risk\n"
+        )
+    return {"area": area or "Unknown", "forecast": line}
+
+
+def _agent_response(disaster: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Hashable]:
+    agents = context.get("agents")
+    if agents:
+        lines = [
+            f"{AGENT_RESPONSE_LINES.get(agent_type, agent_type)} ({count} agents)"
+            for agent_type, count in sorted(agents.items()) if count
+        ]
+    else:
+        lines = [AGENT_RESPONSE_LINES[agent_type] for agent_type in DEFAULT_AGENT_TYPES]
+    return {"lines": "\n".join(f"- {line}" for line in lines)}
+
+
+def _recommendations(disaster: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Hashable]:
+    return {"app_name": settings.app_name}
+
+
+# Template fields of each section; a section is re-rendered only when they change
+SECTION_INPUTS: Dict[str, Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Hashable]]] = {
+    "overview": _overview,
+    "status": _status,
+    "affected_area": _affected_area,
+    "agent_response": _agent_response,
+    "recommendations": _recommendations,
+}
+
+
+class ReportEngine:
+    """Renders situation reports section by section, reusing unchanged sections
+
+    Each section's rendered text is cached under its name and inputs, in
+    an LRU shared by all incidents (so identical sections, like the
+    recommendations, render once). Each incident also remembers the
+    inputs and text of its last report: an update compares inputs per
+    section and only looks up or renders the ones that changed, and a
+    report whose sections are all unchanged is returned as is.
+    """
+
+    def __init__(self, cache_size: int = 10000, max_incidents: int = 1000):
+        self.cache_size = cache_size
+        self.max_incidents = max_incidents
+        self._sections: "OrderedDict[tuple[str, tuple[Hashable, ...]], str]" = OrderedDict()
+        self._incidents: "OrderedDict[str, tuple[list[Dict[str, Hashable]], list[str], str]]" = OrderedDict()
+        self.reports_generated = 0
+        self.reports_unchanged = 0
+        self.section_hits = {section: 0 for section in SECTION_TEMPLATES}
+        self.section_misses = {section: 0 for section in SECTION_TEMPLATES}
+        self.seconds = 0.0
+
+    def render(self, incident_id: str, disaster: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> str:
+        """Markdown report for an incident from its disaster record and response context
+
+        context may hold "agents" ({agent_type: count}) and "prediction"
+        (a spread forecast).
+        """
+        started = time.perf_counter()
+        context = context or {}
+        previous = self._incidents.get(incident_id)
+        inputs, parts = [], []
+        changed = previous is None
+        for i, (section, extract) in enumerate(SECTION_INPUTS.items()):
+            section_inputs = extract(disaster, context)
+            inputs.append(section_inputs)
+            if previous is not None and previous[0][i] == section_inputs:
+                self.section_hits[section] += 1
+                parts.append(previous[1][i])
+                continue
+            changed = True
+            parts.append(self._section(section, section_inputs))
+
+        if changed:
+            content = "".join(parts)
+            self._incidents[incident_id] = (inputs, parts, content)
+            while len(self._incidents) > self.max_incidents:
+                self._incidents.popitem(last=False)
+        else:
+            content = previous[2]
+            self.reports_unchanged += 1
+        self._incidents.move_to_end(incident_id)
+        self.reports_generated += 1
+        self.seconds += time.perf_counter() - started
+        return content
+
+    def _section(self, section: str, inputs: Dict[str, Hashable]) -> str:
+        key = (section, tuple(inputs.values()))
+        text = self._sections.get(key)
+        if text is not None:
+            self.section_hits[section] += 1
+            self._sections.move_to_end(key)
+            return text
+        self.section_misses[section] += 1
+        text = self._sections[key] = SECTION_TEMPLATES[section].substitute(inputs)
+        if len(self._sections) > self.cache_size:
+            self._sections.popitem(last=False)
+        return text
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits, misses = sum(self.section_hits.values()), sum(self.section_misses.values())
+        return {
+            "reports_generated": self.reports_generated,
+            "reports_unchanged": self.reports_unchanged,
+            "reports_per_sec": round(self.reports_generated / self.seconds, 1) if self.seconds else 0.0,
+            "section_hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "sections": {
+                section: {
+                    "hits": self.section_hits[section],
+                    "renders": self.section_misses[section],
+                }
+                for section in SECTION_TEMPLATES
+            },
+            "cached_sections": len(self._sections),
+            "incidents": len(self._incidents)
+        }
+
+
+# Shared by all reporter agents and the simulation so sections are cached once
+report_engine = ReportEngine(
+    cache_size=settings.report_section_cache_size,
+    max_incidents=settings.report_max_incidents,
+)
 
 
 class ReporterAgent(BaseAgent):
     """Generates situation reports and documentation"""
-    
+
     def __init__(self, agent_id: int):
         super().__init__(agent_id, "reporter")
-        
+        self.engine = report_engine
+
     async def initialize(self):
         """Initialize report templates"""
         print(f"📝 Reporter Agent {self.agent_id} initialized")
-        
+
     async def process_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate markdown reports"""
-        return {
+        """Generate markdown reports
+
+        Reports on task["disaster"], or on the active disaster with the
+        task's "disaster_id", with the deployed agent counts and the
+        disaster's latest spread forecast.
+        """
+        from app.core.orchestrator import orchestrator
+
+        result = {
             "agent_id": self.agent_id,
             "type": "reporter",
             "result": "report_generated",
             "reports_created": 0
         }
+        disaster = task.get("disaster")
+        if disaster is None and task.get("disaster_id"):
+            disaster = next((d for d in orchestrator.active_disasters if d["id"] == task["disaster_id"]), None)
+        if disaster is None:
+            return result
+
+        # Caller-supplied disasters may have no ID; key the section cache on what identifies them
+        incident_id = disaster.get("id") or task.get("disaster_id") or (
+            f"{disaster.get('type', 'incident')}@{disaster.get('location')}"
+        )
+        # Only read a forecast if the predictor is loaded; importing it here would defeat lazy agent loading
+        predictor = sys.modules.get("app.agents.predictor")
+        context = {
+            "agents": task.get("agents") or orchestrator.get_active_by_type(),
+            "prediction": predictor.spread_engine.get_forecast(incident_id) if predictor else None
+        }
+        result["report"] = {
+            "id": f"R{int(datetime.utcnow().timestamp())}",
+            "title": f"Situation Report: {disaster.get('name') or disaster.get('type', 'Incident')}",
+            "content": self.engine.render(incident_id, disaster, context),
+            "timestamp": datetime.utcnow().isoformat(),
+            "critical": disaster.get("severity") == "critical"
+        }
+        result["reports_created"] = 1
+        return result
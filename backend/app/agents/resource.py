@@ -1,25 +1,416 @@
 """Resource and Inventory Management Agents (51-60)"""
 
 from app.agents.base import BaseAgent
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from collections import defaultdict
+import heapq
+import itertools
+import time
+import uuid
+from app.core.config import settings
+from app.core.dispatcher import SEVERITY_PRIORITY
+from app.core.spatial import GridIndex, parse_location
+
+RESOURCE_TYPES = ["medical", "food", "water", "shelter", "personnel"]
+
+# Baseline units requested per resource type when agents respond to a disaster
+DISASTER_DEMAND = {
+    "earthquake": {"medical": 200, "shelter": 100, "water": 300, "food": 300, "personnel": 50},
+    "flood": {"medical": 80, "shelter": 150, "water": 400, "food": 300, "personnel": 40},
+    "wildfire": {"medical": 100, "shelter": 120, "water": 200, "food": 200, "personnel": 60},
+    "fire": {"medical": 40, "shelter": 20, "water": 50, "food": 30, "personnel": 20},
+}
+SEVERITY_SCALE = {"low": 0.5, "medium": 1.0, "high": 2.0, "critical": 4.0}
+
+DepotKey = Tuple[str, str]  # (depot_id, resource_type)
+
+
+class ResourceRequest:
+    """Demand for one resource type at a location"""
+
+    __slots__ = ("id", "resource_type", "quantity", "lat", "lng", "severity", "disaster_id", "priority")
+
+    def __init__(self, request_id: str, resource_type: str, quantity: int, lat: float, lng: float,
+                 severity: str, disaster_id: Optional[str], seq: int):
+        self.id = request_id
+        self.resource_type = resource_type
+        self.quantity = quantity
+        self.lat = lat
+        self.lng = lng
+        self.severity = severity
+        self.disaster_id = disaster_id
+        # Lower sorts first: most severe, then oldest
+        self.priority = (SEVERITY_PRIORITY.get(severity, SEVERITY_PRIORITY["medium"]), seq)
+
+
+class ResourcePlanner:
+    """Depot inventory with an incrementally maintained supply-to-demand assignment
+
+    Requests are served from their nearest depots with spare stock, most
+    severe (then oldest) first, and may take stock already assigned to
+    lower-priority requests when nothing spare is near. Every change puts
+    only the requests it can affect on a worklist: the changed request, the
+    requests holding stock at a changed depot, and unmet requests near
+    freed-up stock. Per-type spatial indexes of depots and unmet requests
+    keep each step local, so an update costs the same with ten depots or
+    ten thousand.
+    """
+
+    def __init__(self, search_depots: int = 8, max_distance_km: float = 0.0, cell_deg: float = 1.0):
+        self.search_depots = search_depots
+        self.max_distance_km = max_distance_km or None
+        self.cell_deg = cell_deg
+
+        self.depots: Dict[str, Tuple[float, float]] = {}
+        self.stock: Dict[DepotKey, int] = defaultdict(int)
+        self.committed: Dict[DepotKey, int] = defaultdict(int)
+        # Per type: depots holding any stock, depots with unassigned stock, and unmet requests
+        self.stocked_index: Dict[str, GridIndex] = {t: GridIndex(cell_deg) for t in RESOURCE_TYPES}
+        self.spare_index: Dict[str, GridIndex] = {t: GridIndex(cell_deg) for t in RESOURCE_TYPES}
+        self.shortfall_index: Dict[str, GridIndex] = {t: GridIndex(cell_deg) for t in RESOURCE_TYPES}
+
+        self.requests: Dict[str, ResourceRequest] = {}
+        self.allocations: Dict[str, Dict[str, int]] = {}  # request -> depot -> units
+        self.holders: Dict[DepotKey, Dict[str, int]] = defaultdict(dict)  # (depot, type) -> request -> units
+        self._seq = itertools.count()
+
+        self.updates = 0
+        self.requests_touched = 0
+        self.solve_seconds = 0.0
+        self.last_touched = 0
+
+    # Inventory
+
+    def set_depot(self, depot_id: str, location: Dict[str, float], stock: Optional[Dict[str, int]] = None):
+        """Add or move a depot and set its stock for the given types"""
+        point = parse_location(location)
+        if point is None:
+            raise ValueError(f"Depot {depot_id} needs a location")
+        moved = self.depots.get(depot_id) not in (None, point)
+        self.depots[depot_id] = point
+
+        dirty: Dict[str, set] = defaultdict(set)
+        for resource_type in RESOURCE_TYPES:
+            key = (depot_id, resource_type)
+            if moved and key in self.holders:
+                # Distances changed: let every holder reconsider
+                dirty[resource_type].update(self._release_all(key))
+            if stock and resource_type in stock:
+                self._set_stock(key, int(stock[resource_type]), dirty)
+            elif moved and self.stock.get(key, 0) > 0:
+                self._refresh(key)
+                dirty[resource_type].update(self._nearby_shortfalls(resource_type, *point))
+        self._solve(dirty)
+
+    def adjust_stock(self, depot_id: str, resource_type: str, delta: int):
+        """Add (or remove, with a negative delta) units at a depot"""
+        if depot_id not in self.depots:
+            raise KeyError(f"Unknown depot: {depot_id}")
+        key = (depot_id, resource_type)
+        dirty: Dict[str, set] = defaultdict(set)
+        self._set_stock(key, max(0, self.stock.get(key, 0) + delta), dirty)
+        self._solve(dirty)
+
+    def remove_depot(self, depot_id: str):
+        if depot_id not in self.depots:
+            return
+        dirty: Dict[str, set] = defaultdict(set)
+        for resource_type in RESOURCE_TYPES:
+            self._set_stock((depot_id, resource_type), 0, dirty)
+            self.stock.pop((depot_id, resource_type), None)
+        del self.depots[depot_id]
+        self._solve(dirty)
+
+    def _set_stock(self, key: DepotKey, quantity: int, dirty: Dict[str, set]):
+        depot_id, resource_type = key
+        previous = self.stock.get(key, 0)
+        self.stock[key] = quantity
+        if quantity < self.committed.get(key, 0):
+            # Not enough left for current holders: take it back from the least urgent
+            dirty[resource_type].update(self._reclaim(key, self.committed[key] - quantity))
+        elif quantity > previous:
+            dirty[resource_type].update(self._nearby_shortfalls(resource_type, *self.depots[depot_id]))
+        self._refresh(key)
+
+    def _refresh(self, key: DepotKey):
+        """Keep a depot's entries in the stocked and spare indexes current"""
+        depot_id, resource_type = key
+        stock = self.stock.get(key, 0)
+        for index, present in (
+            (self.stocked_index[resource_type], stock > 0),
+            (self.spare_index[resource_type], stock > self.committed.get(key, 0)),
+        ):
+            if not present:
+                index.remove(depot_id)
+            elif index.position(depot_id) != self.depots[depot_id]:
+                index.insert(depot_id, *self.depots[depot_id])
+
+    # Requests
+
+    def add_request(
+        self,
+        resource_type: str,
+        quantity: int,
+        location: Dict[str, float],
+        severity: str = "medium",
+        disaster_id: Optional[str] = None,
+        request_id: Optional[str] = None,
+    ) -> str:
+        """Open a request and assign stock to it; returns its ID"""
+        if resource_type not in RESOURCE_TYPES:
+            raise ValueError(f"Unknown resource type: {resource_type}")
+        point = parse_location(location)
+        if point is None:
+            raise ValueError("Resource requests need a location")
+        request_id = request_id or f"Q{uuid.uuid4().hex[:12]}"
+        if request_id in self.requests:
+            self.cancel_request(request_id)
+        self.requests[request_id] = ResourceRequest(
+            request_id, resource_type, int(quantity), *point, severity, disaster_id, next(self._seq)
+        )
+        self.allocations[request_id] = {}
+        self._solve({resource_type: {request_id}})
+        return request_id
+
+    def update_request(self, request_id: str, quantity: int):
+        """Change how many units a request needs"""
+        request = self.requests[request_id]
+        request.quantity = int(quantity)
+        dirty: Dict[str, set] = defaultdict(set)
+        excess = sum(self.allocations[request_id].values()) - request.quantity
+        if excess > 0:
+            dirty[request.resource_type].update(self._shrink(request, excess))
+        dirty[request.resource_type].add(request_id)
+        self._solve(dirty)
+
+    def cancel_request(self, request_id: str):
+        """Close a request (cancelled or delivered), freeing its stock for others"""
+        request = self.requests.pop(request_id, None)
+        if request is None:
+            return
+        dirty: Dict[str, set] = defaultdict(set)
+        dirty[request.resource_type].update(
+            self._shrink(request, sum(self.allocations[request_id].values()))
+        )
+        del self.allocations[request_id]
+        self.shortfall_index[request.resource_type].remove(request_id)
+        dirty[request.resource_type].discard(request_id)
+        self._solve(dirty)
+
+    def cancel_disaster(self, disaster_id: str):
+        for request_id in [r.id for r in self.requests.values() if r.disaster_id == disaster_id]:
+            self.cancel_request(request_id)
+
+    # Assignment
+
+    def _assign(self, request_id: str, depot_id: str, units: int):
+        key = (depot_id, self.requests[request_id].resource_type)
+        allocation = self.allocations[request_id]
+        allocation[depot_id] = allocation.get(depot_id, 0) + units
+        holders = self.holders[key]
+        holders[request_id] = holders.get(request_id, 0) + units
+        self.committed[key] += units
+        self._refresh(key)
+
+    def _unassign(self, request_id: str, key: DepotKey, units: int):
+        depot_id = key[0]
+        allocation = self.allocations[request_id]
+        allocation[depot_id] -= units
+        if allocation[depot_id] <= 0:
+            del allocation[depot_id]
+        holders = self.holders[key]
+        holders[request_id] -= units
+        if holders[request_id] <= 0:
+            del holders[request_id]
+            if not holders:
+                del self.holders[key]
+        self.committed[key] -= units
+        self._refresh(key)
+
+    def _reclaim(self, key: DepotKey, units: int) -> List[str]:
+        """Take units back from a depot's least urgent holders; returns those affected"""
+        affected = []
+        for request_id in sorted(self.holders.get(key, {}), key=lambda r: self.requests[r].priority, reverse=True):
+            if units <= 0:
+                break
+            taken = min(units, self.holders[key][request_id])
+            self._unassign(request_id, key, taken)
+            units -= taken
+            affected.append(request_id)
+        return affected
+
+    def _release_all(self, key: DepotKey) -> List[str]:
+        holders = list(self.holders.get(key, {}).items())
+        for request_id, units in holders:
+            self._unassign(request_id, key, units)
+        return [request_id for request_id, _ in holders]
+
+    def _shrink(self, request: ResourceRequest, units: int) -> List[str]:
+        """Give back units from a request's furthest depots; returns requests that could use them"""
+        affected = []
+        allocation = self.allocations[request.id]
+        for depot_id in sorted(allocation, key=lambda d: self._distance_sq(request, d), reverse=True):
+            if units <= 0:
+                break
+            taken = min(units, allocation[depot_id])
+            self._unassign(request.id, (depot_id, request.resource_type), taken)
+            units -= taken
+            affected.extend(self._nearby_shortfalls(request.resource_type, *self.depots[depot_id]))
+        return affected
+
+    def _nearby_shortfalls(self, resource_type: str, lat: float, lng: float) -> List[str]:
+        """Unmet requests close enough to use stock at a point"""
+        return [
+            request_id for _, request_id in self.shortfall_index[resource_type].nearest(
+                lat, lng, self.search_depots, self.max_distance_km
+            )
+        ]
+
+    def _distance_sq(self, request: ResourceRequest, depot_id: str) -> float:
+        lat, lng = self.depots[depot_id]
+        return (lat - request.lat) ** 2 + (lng - request.lng) ** 2
+
+    def _available(self, key: DepotKey) -> int:
+        return self.stock.get(key, 0) - self.committed.get(key, 0)
+
+    def _solve(self, dirty: Dict[str, Iterable[str]]):
+        """Re-assign the dirty requests, most urgent first, following any preemptions"""
+        started = time.perf_counter()
+        touched = 0
+        for resource_type, request_ids in dirty.items():
+            spare, stocked = self.spare_index[resource_type], self.stocked_index[resource_type]
+            heap = [(self.requests[r].priority, r) for r in set(request_ids) if r in self.requests]
+            heapq.heapify(heap)
+            while heap:
+                _, request_id = heapq.heappop(heap)
+                request = self.requests.get(request_id)
+                if request is None:
+                    continue
+                touched += 1
+                need = request.quantity - sum(self.allocations[request_id].values())
+
+                # Spare stock first, nearest depot first
+                if need > 0:
+                    for _, depot_id in spare.nearest(request.lat, request.lng, self.search_depots, self.max_distance_km):
+                        units = min(self._available((depot_id, resource_type)), need)
+                        self._assign(request_id, depot_id, units)
+                        need -= units
+                        if need <= 0:
+                            break
+
+                # Then stock held by less urgent requests at the nearest depots
+                nearby = stocked.nearest(request.lat, request.lng, self.search_depots, self.max_distance_km) if need > 0 else []
+                for _, depot_id in nearby:
+                    if need <= 0:
+                        break
+                    key = (depot_id, resource_type)
+                    for holder_id in sorted(self.holders.get(key, {}), key=lambda r: self.requests[r].priority, reverse=True):
+                        if need <= 0 or self.requests[holder_id].priority <= request.priority:
+                            break
+                        units = min(need, self.holders[key][holder_id])
+                        self._unassign(holder_id, key, units)
+                        self._assign(request_id, depot_id, units)
+                        need -= units
+                        heapq.heappush(heap, (self.requests[holder_id].priority, holder_id))
+
+                if need > 0:
+                    self.shortfall_index[resource_type].insert(request_id, request.lat, request.lng)
+                else:
+                    self.shortfall_index[resource_type].remove(request_id)
+
+        self.updates += 1
+        self.last_touched = touched
+        self.requests_touched += touched
+        self.solve_seconds += time.perf_counter() - started
+
+    # Queries
+
+    def get_allocation(self, request_id: str) -> Dict[str, Any]:
+        request = self.requests[request_id]
+        allocated = sum(self.allocations[request_id].values())
+        return {
+            "request_id": request_id,
+            "resource_type": request.resource_type,
+            "quantity": request.quantity,
+            "allocated": allocated,
+            "shortfall": max(0, request.quantity - allocated),
+            "depots": dict(self.allocations[request_id])
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        shortfall = sum(
+            max(0, r.quantity - sum(self.allocations[r.id].values())) for r in self.requests.values()
+        )
+        return {
+            "depots": len(self.depots),
+            "open_requests": len(self.requests),
+            "unmet_requests": sum(len(index) for index in self.shortfall_index.values()),
+            "units_in_stock": sum(self.stock.values()),
+            "units_allocated": sum(self.committed.values()),
+            "units_short": shortfall,
+            "updates": self.updates,
+            "avg_requests_touched": round(self.requests_touched / self.updates, 2) if self.updates else 0.0,
+            "avg_update_ms": round(self.solve_seconds / self.updates * 1000, 3) if self.updates else 0.0
+        }
+
+
+# Shared by all resource agents so they plan against one inventory
+resource_planner = ResourcePlanner(
+    search_depots=settings.resource_search_depots,
+    max_distance_km=settings.resource_max_distance_km,
+    cell_deg=settings.spatial_cell_deg,
+)
 
 
 class ResourceAgent(BaseAgent):
     """Manages and tracks disaster response resources"""
-    
+
     def __init__(self, agent_id: int):
         super().__init__(agent_id, "resource")
-        self.resource_types = ["medical", "food", "water", "shelter", "personnel"]
-        
+        self.resource_types = RESOURCE_TYPES
+        self.planner = resource_planner
+
     async def initialize(self):
         """Initialize resource tracking systems"""
         print(f"📦 Resource Agent {self.agent_id} initialized")
-        
+
     async def process_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
-        """Track and allocate resources"""
+        """Track and allocate resources
+
+        "respond" opens requests sized by disaster type and severity,
+        "update_inventory" sets depot stock, "request_resources" opens
+        explicit requests and "cancel_requests" closes them.
+        """
+        action = task.get("action")
+        opened = []
+        if action == "respond" and task.get("location"):
+            severity = task.get("severity", "medium")
+            demand = DISASTER_DEMAND.get(task.get("disaster_type"), DISASTER_DEMAND["fire"])
+            for resource_type, units in demand.items():
+                opened.append(self.planner.add_request(
+                    resource_type, round(units * SEVERITY_SCALE.get(severity, 1.0)),
+                    task["location"], severity, task.get("disaster_id")
+                ))
+        elif action == "update_inventory":
+            for depot in task.get("depots", []):
+                self.planner.set_depot(depot["id"], depot["location"], depot.get("stock"))
+        elif action == "request_resources":
+            for request in task.get("requests", []):
+                opened.append(self.planner.add_request(
+                    request["resource_type"], request["quantity"], request["location"],
+                    request.get("severity", "medium"), request.get("disaster_id"), request.get("id")
+                ))
+        elif action == "cancel_requests":
+            for request_id in task.get("request_ids", []):
+                self.planner.cancel_request(request_id)
+            if task.get("disaster_id"):
+                self.planner.cancel_disaster(task["disaster_id"])
+
         return {
             "agent_id": self.agent_id,
             "type": "resource",
             "result": "inventory_updated",
-            "resources_tracked": 0
+            "resources_tracked": len(self.planner.depots) * len(self.resource_types),
+            "allocations": [self.planner.get_allocation(r) for r in opened],
+            "requests_reassigned": self.planner.last_touched
         }
@@ -1,28 +1,338 @@
 """Social Media Monitoring Agents (1-10)"""
 
 from app.agents.base import BaseAgent
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+import hashlib
+import math
+import re
+import time
+import zlib
+import numpy as np
+from app.core.config import settings
+from app.core.spatial import parse_location
+
+URL_PATTERN = re.compile(r"https?://\S+|www\.\S+")
+MENTION_PATTERN = re.compile(r"(?:^|\s)(?:rt\s+)?@\w+:?")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+SHINGLE_SIZE = 3  # Words per shingle
+SIGNATURE_CHUNK = 8192  # Shingles permuted at once, bounding the (num_perm, chunk) working matrix
+MERSENNE_PRIME = np.uint64((1 << 32) - 5)  # Keeps a*x + b within uint64 for 32-bit x
+
+
+def post_location(post: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Get a post's (lat, lng), or None if it has none or it is not a valid coordinate"""
+    point = parse_location(post.get("location"))
+    if point is None or not (-90 <= point[0] <= 90 and -180 <= point[1] <= 180):
+        return None
+    return point
+
+
+def post_text(post: Dict[str, Any]) -> str:
+    return str(post.get("text") or post.get("content") or "")
+
+
+def normalize_post(text: str) -> List[str]:
+    """Tokenize a post, dropping URLs, @mentions and "RT" markers"""
+    text = URL_PATTERN.sub(" ", text.lower())
+    text = MENTION_PATTERN.sub(" ", text)
+    tokens = TOKEN_PATTERN.findall(text)
+    if tokens and tokens[0] == "rt":
+        tokens = tokens[1:]
+    return tokens
+
+
+def shingle_hashes(tokens: List[str]) -> np.ndarray:
+    """32-bit hashes of the distinct word shingles in a token list"""
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = {" ".join(tokens)} if tokens else set()
+    else:
+        shingles = {
+            " ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)
+        }
+    return np.fromiter(
+        (zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles)
+    )
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer, spreading band sums over all 64 bits"""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class MinHashLSH:
+    """MinHash signatures split into LSH bands, hashed to one 64-bit key per band
+
+    Two posts share a band key with probability 1 - (1 - s^r)^b for Jaccard
+    similarity s, r rows per band and b bands: with 128 permutations in 16
+    bands, near-copies (s >= ~0.7) almost always collide and unrelated
+    posts almost never do.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._row_mix = rng.integers(1, 1 << 63, self.rows, dtype=np.uint64) | np.uint64(1)
+        self._band_salt = np.arange(bands, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+
+    def signatures(self, shingle_sets: List[np.ndarray], chunk: int = SIGNATURE_CHUNK) -> np.ndarray:
+        """(n, num_perm) MinHash signatures for non-empty shingle sets
+
+        The batch's shingles are permuted chunk shingles at a time and folded
+        into a running minimum per set, so memory stays bounded however
+        large the batch or any one post is.
+        """
+        lengths = np.fromiter((len(s) for s in shingle_sets), dtype=np.int64, count=len(shingle_sets))
+        hashes = np.concatenate(shingle_sets)
+        owners = np.repeat(np.arange(len(shingle_sets)), lengths)
+        result = np.full((len(shingle_sets), self.num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+        for start in range(0, len(hashes), chunk):
+            end = start + chunk
+            permuted = (self._a[:, None] * hashes[None, start:end] + self._b[:, None]) % MERSENNE_PRIME
+            # Sets are contiguous in hashes, so each appears in one run per chunk
+            chunk_owners = owners[start:end]
+            runs = np.concatenate(([0], np.flatnonzero(np.diff(chunk_owners)) + 1))
+            rows = chunk_owners[runs]
+            result[rows] = np.minimum(result[rows], np.minimum.reduceat(permuted, runs, axis=1).T)
+        return result
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """(n, bands) 64-bit keys, one per band of each signature"""
+        banded = signatures.reshape(len(signatures), self.bands, self.rows)
+        return _mix64((banded * self._row_mix).sum(axis=2, dtype=np.uint64) + self._band_salt)
+
+
+class RotatingBloomFilter:
+    """Two-generation Bloom filter over 64-bit keys with a time window
+
+    Keys go into the current generation and lookups check both. When the
+    current generation is older than the window, or holds its capacity of
+    keys, it becomes the previous one and the old previous is dropped, so
+    keys are remembered for at least one window in a fixed amount of memory.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, window: float):
+        self.capacity = capacity
+        self.window = window
+        self.num_bits = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._probes = np.arange(self.num_hashes, dtype=np.uint64)
+        self._current = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self._previous = np.zeros_like(self._current)
+        self._count = 0
+        self._started = time.monotonic()
+        self.rotations = 0
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._current.nbytes + self._previous.nbytes
+
+    def _bits(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Byte indexes and bit masks of every probe, shaped (len(keys), num_hashes)"""
+        h1 = keys & np.uint64(0xFFFFFFFF)
+        h2 = (keys >> np.uint64(32)) | np.uint64(1)
+        positions = (h1[:, None] + self._probes[None, :] * h2[:, None]) % np.uint64(self.num_bits)
+        masks = np.left_shift(1, (positions & np.uint64(7)).astype(np.uint8)).astype(np.uint8)
+        return positions >> np.uint64(3), masks
+
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        """Whether each key is (probably) present in either generation"""
+        index, masks = self._bits(keys)
+        in_current = (self._current[index] & masks).all(axis=1)
+        in_previous = (self._previous[index] & masks).all(axis=1)
+        return in_current | in_previous
+
+    def add(self, keys: np.ndarray):
+        index, masks = self._bits(keys)
+        np.bitwise_or.at(self._current, index.ravel(), masks.ravel())
+        self._count += len(keys)
+        if self._count >= self.capacity:
+            self.rotate()
+
+    def maybe_rotate(self, now: Optional[float] = None):
+        """Rotate if the current generation has outlived the window"""
+        if (now or time.monotonic()) - self._started >= self.window:
+            self.rotate()
+
+    def rotate(self):
+        self._previous, self._current = self._current, self._previous
+        self._current.fill(0)
+        self._count = 0
+        self._started = time.monotonic()
+        self.rotations += 1
+
+
+class PostDeduplicator:
+    """Streaming near-duplicate filter for social media posts
+
+    Exact copies (retweets, reposts) are caught by a fingerprint of the
+    normalized text before any MinHash work. Everything else gets a MinHash
+    signature whose LSH band keys are checked against the same rotating
+    Bloom filter; a post sharing any band with a post seen in the window is
+    a near-duplicate. Memory is fixed by capacity and error rate, and the
+    chance of a false duplicate is about bands x error_rate per post.
+    """
+
+    def __init__(
+        self,
+        window: float = 600.0,
+        capacity: int = 50000,
+        error_rate: float = 0.0001,
+        num_perm: int = 128,
+        bands: int = 16,
+    ):
+        self.lsh = MinHashLSH(num_perm=num_perm, bands=bands)
+        # Each unique post stores its fingerprint plus one key per band
+        self.seen = RotatingBloomFilter(capacity * (bands + 1), error_rate, window)
+        self.posts_seen = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def deduplicate(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Get the posts that are not near-duplicates of anything seen in the window"""
+        self.seen.maybe_rotate()
+        self.posts_seen += len(posts)
+
+        # Exact copies: one filter lookup for the batch, plus a set for copies within it
+        tokens = [normalize_post(post_text(post)) for post in posts]
+        fingerprints = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(" ".join(t).encode(), digest_size=8).digest(), "little")
+             for t in tokens),
+            dtype=np.uint64, count=len(posts),
+        )
+        seen_before = self.seen.contains(fingerprints)
+        batch_fingerprints = set()
+        candidates = []
+        for i, fingerprint in enumerate(fingerprints.tolist()):
+            if seen_before[i] or fingerprint in batch_fingerprints:
+                continue
+            batch_fingerprints.add(fingerprint)
+            candidates.append(i)
+        self.exact_duplicates += len(posts) - len(candidates)
+
+        # Near copies: sign and look up every remaining post at once, then
+        # resolve copies within the batch in arrival order
+        shingles = [shingle_hashes(tokens[i]) for i in candidates]
+        signed = [c for c, s in enumerate(shingles) if len(s)]
+        keys = np.zeros((len(candidates), self.lsh.bands), dtype=np.uint64)
+        banded_before = np.zeros(len(candidates), dtype=bool)
+        if signed:
+            keys[signed] = self.lsh.band_keys(self.lsh.signatures([shingles[c] for c in signed]))
+            banded_before[signed] = self.seen.contains(keys[signed].ravel()).reshape(-1, self.lsh.bands).any(axis=1)
+
+        signed_set = set(signed)
+        batch_bands = set()
+        keep = []
+        for c in range(len(candidates)):
+            if c not in signed_set:
+                keep.append(c)
+                continue
+            bands = keys[c].tolist()
+            if banded_before[c] or not batch_bands.isdisjoint(bands):
+                self.near_duplicates += 1
+                continue
+            batch_bands.update(bands)
+            keep.append(c)
+
+        # Remember every fingerprint so later exact copies skip MinHash, and
+        # the bands of unique posts only so near-copies don't chain-drift
+        kept_signed = [c for c in keep if c in signed_set]
+        self.seen.add(np.concatenate((fingerprints[candidates], keys[kept_signed].ravel())))
+        return [posts[candidates[c]] for c in keep]
+
+    @property
+    def duplicates(self) -> int:
+        return self.exact_duplicates + self.near_duplicates
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "posts_seen": self.posts_seen,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "dedup_ratio": round(self.duplicates / self.posts_seen, 4) if self.posts_seen else 0.0,
+            "window_rotations": self.seen.rotations,
+            "memory_bytes": self.seen.memory_bytes
+        }
+
+
+# Shared by all social agents so copies seen by different agents collapse too
+post_deduplicator = PostDeduplicator(
+    window=settings.social_dedup_window,
+    capacity=settings.social_dedup_capacity,
+    error_rate=settings.social_dedup_error_rate,
+    num_perm=settings.social_minhash_permutations,
+    bands=settings.social_lsh_bands,
+)
 
 
 class SocialMediaAgent(BaseAgent):
     """Monitors social media platforms for disaster signals"""
-    
+
     def __init__(self, agent_id: int):
         super().__init__(agent_id, "social")
         self.platforms = ["twitter", "facebook", "instagram"]
         self.keywords = ["earthquake", "flood", "fire", "help", "emergency"]
-        
+        self.deduplicator = post_deduplicator
+
     async def initialize(self):
         """Initialize social media API connections"""
         print(f"🐦 Social Agent {self.agent_id} initialized")
         # TODO: Initialize API clients
-        
+
     async def process_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Monitor social media for disaster-related posts"""
         # TODO: Implement actual social media scraping
+        posts = [p for p in task.get("posts", []) if self._matches_keywords(p)]
+        # A post with a location that doesn't parse can't be placed; drop it here
+        # rather than let it fail later in spatial indexing or classification
+        located = [p for p in posts if not p.get("location") or post_location(p) is not None]
+        rejected = len(posts) - len(located)
+        posts = located
+        unique = self.deduplicator.deduplicate(posts) if posts else []
+        if unique:
+            from app.core.orchestrator import orchestrator
+
+            # Never wait on the task queue from inside a dispatcher worker
+            await orchestrator.ingest_reports([self._to_report(p) for p in unique], wait=False)
         return {
             "agent_id": self.agent_id,
             "type": "social",
             "result": "monitoring_active",
-            "posts_analyzed": 0
+            "posts_analyzed": len(posts),
+            "posts_forwarded": len(unique),
+            "posts_rejected": rejected,
+            "dedup_ratio": round(1 - len(unique) / len(posts), 4) if posts else 0.0
+        }
+
+    def _matches_keywords(self, post: Dict[str, Any]) -> bool:
+        text = post_text(post).lower()
+        return any(keyword in text for keyword in self.keywords)
+
+    def _to_report(self, post: Dict[str, Any]) -> Dict[str, Any]:
+        """Turn a post into a disaster report for classification"""
+        text = post_text(post)
+        lowered = text.lower()
+        disaster_type = next(
+            (k for k in ("earthquake", "flood", "wildfire", "fire") if k in lowered), "unknown"
+        )
+        report = {
+            "type": disaster_type,
+            "description": text,
+            "source": f"social:{post.get('platform', 'unknown')}",
+            "severity": "medium",
+            "post_id": post.get("id")
         }
+        point = post_location(post)
+        if point is not None:
+            report["location"] = {"lat": point[0], "lng": point[1]}
+        return report
@@ -0,0 +1,72 @@
+"""Encode-once WebSocket Frames Shared Across All Clients"""
+
+from typing import Any, Dict, Optional
+import json
+
+try:
+    import msgpack
+except ImportError:  # Optional dependency: pip install resilience-grid-backend[binary]
+    msgpack = None
+
+ENCODINGS = ("json", "msgpack")
+
+
+def supported_encoding(encoding: Optional[str]) -> str:
+    """Resolve a client-requested encoding, falling back to JSON"""
+    if encoding == "msgpack" and msgpack is not None:
+        return "msgpack"
+    return "json"
+
+
+class Frame:
+    """A message serialized at most once per encoding and reused for every socket
+
+    Frames are treated as immutable: the message must not be modified after
+    the frame is created, since the encoded bytes are cached.
+    """
+
+    __slots__ = ("message", "_text", "_binary")
+
+    def __init__(self, message: Dict[str, Any]):
+        self.message = message
+        self._text: Optional[str] = None
+        self._binary: Optional[bytes] = None
+
+    @classmethod
+    def from_text(cls, text: str) -> "Frame":
+        """Build a frame from already-serialized JSON, reusing the text as-is"""
+        frame = cls(json.loads(text))
+        frame._text = text
+        return frame
+
+    @property
+    def type(self) -> Optional[str]:
+        return self.message.get("type")
+
+    @property
+    def text(self) -> str:
+        """JSON encoding, identical to what WebSocket.send_json would produce"""
+        if self._text is None:
+            self._text = json.dumps(self.message, separators=(",", ":"), ensure_ascii=False)
+        return self._text
+
+    @property
+    def binary(self) -> bytes:
+        """Compact MessagePack encoding"""
+        if self._binary is None:
+            if msgpack is None:
+                raise RuntimeError("msgpack is not installed")
+            self._binary = msgpack.packb(self.message, use_bin_type=True)
+        return self._binary
+
+    async def send(self, websocket, encoding: str = "json"):
+        """Write the frame to a socket in the given encoding"""
+        if encoding == "msgpack":
+            await websocket.send_bytes(self.binary)
+        else:
+            await websocket.send_text(self.text)
+
+
+def as_frame(message) -> Frame:
+    """Wrap a message dict in a Frame, passing existing frames through"""
+    return message if isinstance(message, Frame) else Frame(message)
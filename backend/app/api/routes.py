@@ -1,9 +1,13 @@
 """REST API Routes for ResilienceGrid"""
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Dict, Any, List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+import json
+from app.core.config import settings
 from app.core.orchestrator import orchestrator
+from app.core.profiling import loop_monitor, profiler
+from app.api.websocket import manager
 
 router = APIRouter()
 
@@ -20,6 +24,33 @@ class DeploymentResponse(BaseModel):
     deployed_count: int
     agent_ids: List[int]
     disaster_type: str
+    disaster_id: Optional[str] = None
+    tasks_queued: int = 0
+
+
+class DisasterReport(BaseModel):
+    """A single disaster report from a user or upstream feed"""
+    model_config = ConfigDict(extra="allow")
+    
+    type: str
+    location: Optional[Dict[str, float]] = None  # {"lat": float, "lng": float}
+    severity: str = "medium"
+    source: Optional[str] = None
+    description: Optional[str] = None
+
+
+report_list_adapter = TypeAdapter(List[DisasterReport])
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+MAX_REPORTED_ERRORS = 100
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header (weak or strong, possibly a list) matches etag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
 
 
 @router.post("/swarm/initialize")
@@ -38,7 +69,8 @@ async def deploy_swarm(request: DisasterRequest):
     try:
         result = await orchestrator.deploy_agents(
             disaster_type=request.disaster_type,
-            location=request.location
+            location=request.location,
+            severity=request.severity
         )
         return result
     except Exception as e:
@@ -46,37 +78,264 @@ async def deploy_swarm(request: DisasterRequest):
 
 
 @router.get("/swarm/status")
-async def get_swarm_status():
-    """Get current status of all agents"""
+async def get_swarm_status(request: Request):
+    """Get current status of all agents
+
+    Served from the orchestrator's pre-serialized snapshot. The ETag
+    changes with the state version, so clients polling with
+    If-None-Match get an empty 304 until an agent's status changes.
+    """
     try:
-        status = await orchestrator.get_swarm_status()
-        return status
+        snapshot = orchestrator.status_snapshot()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(snapshot.body, media_type="application/json", headers=headers)
+
+
+
+@router.get("/swarm/active-by-type")
+async def get_active_by_type():
+    """Get the number of deployed agents per agent type"""
+    return orchestrator.get_active_by_type()
+
+
+@router.get("/spatial/agents")
+async def get_agents_in_bbox(
+    min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+    agent_type: Optional[str] = None
+):
+    """Get agents positioned inside a bounding box"""
+    if agent_type is not None and agent_type not in orchestrator.agent_index:
+        raise HTTPException(status_code=404, detail="Agent type not found")
+    return orchestrator.agents_in_bbox(min_lat, min_lng, max_lat, max_lng, agent_type)
+
+
+@router.get("/spatial/disasters")
+async def get_disasters_in_bbox(min_lat: float, min_lng: float, max_lat: float, max_lng: float):
+    """Get active disasters inside a bounding box"""
+    return orchestrator.disasters_in_bbox(min_lat, min_lng, max_lat, max_lng)
+
+
+@router.get("/agents/stats")
+async def get_agent_registry_stats():
+    """Get which agent types are loaded, and agent creation and initialization timings"""
+    return orchestrator.registry.get_stats()
+
+
+def require_debug_endpoints():
+    """Hide the debug endpoints unless DEBUG_ENDPOINTS_ENABLED is set"""
+    if not settings.debug_endpoints_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@router.get("/debug/loop", dependencies=[Depends(require_debug_endpoints)])
+async def get_loop_stats():
+    """Get event loop lag percentiles and the stacks captured while the loop was blocked"""
+    return loop_monitor.get_stats()
+
+
+@router.get("/debug/profile", dependencies=[Depends(require_debug_endpoints)])
+async def get_profile(seconds: float = 5.0, interval_ms: float = 5.0, all_threads: bool = False):
+    """Sample stacks for a window and return them collapsed, ready for flamegraph.pl or speedscope
+
+    Only the event loop thread is sampled unless all_threads is set. One
+    profile runs at a time; the window is capped by PROFILE_MAX_SECONDS.
+    """
+    if seconds <= 0 or interval_ms <= 0:
+        raise HTTPException(status_code=400, detail="seconds and interval_ms must be positive")
+    if profiler.busy:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    try:
+        collapsed = await profiler.profile(seconds, interval_ms / 1000, all_threads)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return Response(collapsed, media_type="text/plain")
+
+
+@router.get("/tasks/stats")
+async def get_task_stats():
+    """Get task queue depth and per-agent-type wait, service time and throughput"""
+    return orchestrator.dispatcher.get_stats()
+
+
+@router.get("/ws/stats")
+async def get_websocket_stats():
+    """Get WebSocket fan-out queue depth and drop counts"""
+    return manager.get_stats()
+
+
+@router.get("/reports/stats")
+async def get_report_stats():
+    """Get report throughput and section cache hit rates"""
+    from app.agents.reporter import report_engine
+
+    return report_engine.get_stats()
+
+
+@router.get("/events/stats")
+async def get_event_log_stats():
+    """Get event log write, snapshot and replay statistics"""
+    if orchestrator.event_log is None:
+        return {"enabled": False}
+    return {"enabled": True, **orchestrator.event_log.get_stats()}
+
+
+@router.get("/news/stats")
+async def get_news_stats():
+    """Get feed polling counters, conditional-request hit ratio and poll intervals"""
+    from app.agents.news import feed_fetcher
+
+    return feed_fetcher.get_stats()
+
+
+@router.get("/predictions/{disaster_id}")
+async def get_prediction(disaster_id: str):
+    """Get the latest spread forecast for a disaster, with its probability grid"""
+    from app.agents.predictor import spread_engine
+
+    forecast = spread_engine.get_forecast(disaster_id)
+    if forecast is None:
+        raise HTTPException(status_code=404, detail="No prediction for this disaster")
+    return forecast
 
 
 @router.get("/agents/{agent_id}")
 async def get_agent_status(agent_id: int):
     """Get status of specific agent"""
-    if agent_id < 1 or agent_id > 100:
+    if agent_id not in orchestrator.state:
         raise HTTPException(status_code=404, detail="Agent not found")
     
     return {
         "id": agent_id,
-        "status": orchestrator.agent_status.get(agent_id, "offline"),
-        "type": orchestrator._get_agent_type(agent_id)
+        "status": orchestrator.state.get(agent_id),
+        "type": orchestrator.state.type_of(agent_id)
     }
 
 
 @router.post("/disasters/report")
-async def report_disaster(disaster: Dict[str, Any]):
-    """Receive disaster report and activate agents"""
+async def report_disaster(disaster: DisasterReport):
+    """Receive a disaster report and queue it for classification"""
     try:
-        # TODO: Process disaster report and activate appropriate agents
+        [result] = await orchestrator.ingest_reports([disaster.model_dump(exclude_none=True)])
+        accepted = result["status"] == "accepted"
         return {
-            "status": "received",
-            "disaster_id": "temp_id_123",
-            "message": "Disaster report logged, agents deploying"
+            "status": "received" if accepted else "duplicate",
+            "report_id": result["id"],
+            "message": "Report accepted" if accepted else "Duplicate of an earlier report"
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/disasters/reports/bulk")
+async def report_disasters_bulk(request: Request):
+    """Ingest many disaster reports at once
+    
+    Accepts a JSON array of reports, or a streamed NDJSON body (one report per
+    line, Content-Type application/x-ndjson). Reports are validated, deduped
+    and queued in batches of settings.ingest_batch_size. "ids" lines up with
+    the input: one ID per report, or null where the report was rejected.
+    """
+    summary = {"accepted": 0, "duplicates": 0, "rejected": 0, "ids": [], "errors": []}
+    
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_CONTENT_TYPES:
+        batches = _ndjson_batches(request, settings.ingest_batch_size)
+    else:
+        try:
+            body = json.loads(await request.body())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+        if isinstance(body, dict):
+            body = body.get("reports")
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of reports")
+        batches = _list_batches(body, settings.ingest_batch_size)
+    
+    async for offset, batch in batches:
+        await _ingest_batch(offset, batch, summary)
+    return summary
+
+
+async def _list_batches(items: List[Any], size: int) -> AsyncIterator[Tuple[int, List[Any]]]:
+    for offset in range(0, len(items), size):
+        yield offset, items[offset:offset + size]
+
+
+async def _ndjson_batches(request: Request, size: int) -> AsyncIterator[Tuple[int, List[Any]]]:
+    """Parse a streamed NDJSON body into batches without buffering the whole body"""
+    batch: List[Any] = []
+    offset = 0
+    buffer = b""
+    
+    async def lines():
+        nonlocal buffer
+        async for chunk in request.stream():
+            buffer += chunk
+            *complete, buffer = buffer.split(b"\n")
+            for line in complete:
+                yield line
+        if buffer:
+            yield buffer
+    
+    async for line in lines():
+        if not line.strip():
+            continue
+        try:
+            batch.append(json.loads(line))
+        except ValueError as e:
+            # Keep the line's position so the error can be reported against it
+            batch.append(_InvalidLine(str(e)))
+        if len(batch) >= size:
+            yield offset, batch
+            offset += len(batch)
+            batch = []
+    if batch:
+        yield offset, batch
+
+
+class _InvalidLine:
+    """Placeholder for an NDJSON line that is not valid JSON"""
+    
+    def __init__(self, error: str):
+        self.error = f"Invalid JSON: {error}"
+
+
+async def _ingest_batch(offset: int, batch: List[Any], summary: Dict[str, Any]):
+    """Validate a batch in one pass, then ingest the valid reports together"""
+    errors: Dict[int, str] = {}
+    try:
+        reports = report_list_adapter.validate_python(batch)
+    except ValidationError:
+        # Slow path: find the invalid items one by one
+        reports = []
+        for i, item in enumerate(batch):
+            if isinstance(item, _InvalidLine):
+                errors[i] = item.error
+                continue
+            try:
+                reports.append(DisasterReport.model_validate(item))
+            except ValidationError as e:
+                errors[i] = "; ".join(
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                )
+    
+    results = await orchestrator.ingest_reports(
+        [report.model_dump(exclude_none=True) for report in reports]
+    )
+    results_iter = iter(results)
+    for i in range(len(batch)):
+        if i in errors:
+            summary["ids"].append(None)
+            continue
+        result = next(results_iter)
+        summary["ids"].append(result["id"])
+        summary["accepted" if result["status"] == "accepted" else "duplicates"] += 1
+    
+    summary["rejected"] += len(errors)
+    for i, error in errors.items():
+        if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+            summary["errors"].append({"index": offset + i, "error": error})
@@ -0,0 +1,297 @@
+"""Topic Subscriptions for WebSocket Clients
+
+Clients narrow what they receive with subscribe/unsubscribe commands:
+
+    {"action": "subscribe", "types": ["disaster_detected", "new_report"],
+     "agent_types": ["satellite"], "disaster_ids": ["D1718000000"],
+     "bbox": [min_lat, min_lng, max_lat, max_lng]}
+
+Every field is optional. Subscribing adds values to a filter (each bbox
+adds a region); unsubscribing removes them, and an unsubscribe with no
+fields drops every filter. A client that never subscribes gets everything.
+
+A filter only applies to messages that carry its attribute: a bbox limits
+disaster_detected and new_report messages that have a location, but does
+not hide system messages. agent_status_batch deltas are narrowed to the
+agents the client asked for, encoded once per distinct filter.
+"""
+
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+import numpy as np
+from app.core.spatial import BoxIndex, parse_location
+from app.core.state import AGENT_TYPES
+from app.api.frames import Frame
+
+Box = Tuple[float, float, float, float]
+
+TOPIC_FILTERS = ("types", "agent_types", "disaster_ids")
+# Messages whose data is a status delta with an "agents" list
+AGENT_BATCH_TYPES = ("agent_status_batch",)
+
+
+def parse_filters(command: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate the filter fields of a subscribe/unsubscribe command"""
+    filters: Dict[str, Any] = {}
+    for field in TOPIC_FILTERS:
+        values = command.get(field)
+        if values is None:
+            continue
+        if isinstance(values, str):
+            values = [values]
+        if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+            raise ValueError(f"{field} must be a list of strings")
+        filters[field] = set(values)
+
+    unknown = filters.get("agent_types", set()) - set(AGENT_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown agent types: {', '.join(sorted(unknown))}")
+
+    bbox = command.get("bbox")
+    if bbox is not None:
+        try:
+            box = tuple(float(value) for value in bbox)
+        except (TypeError, ValueError):
+            box = ()
+        if len(box) != 4 or box[0] > box[2] or box[1] > box[3]:
+            raise ValueError("bbox must be [min_lat, min_lng, max_lat, max_lng]")
+        filters["bboxes"] = [box]
+    return filters
+
+
+class Subscription:
+    """One client's filters; None means that filter is off"""
+
+    __slots__ = ("types", "agent_types", "disaster_ids", "bboxes")
+
+    def __init__(self):
+        self.types: Optional[Set[str]] = None
+        self.agent_types: Optional[Set[str]] = None
+        self.disaster_ids: Optional[Set[str]] = None
+        self.bboxes: Optional[List[Box]] = None
+
+    @property
+    def narrows_agents(self) -> bool:
+        return self.agent_types is not None or self.bboxes is not None
+
+    def agents_key(self) -> Tuple:
+        """Identifies the agent subset this subscription selects"""
+        return (
+            frozenset(self.agent_types) if self.agent_types is not None else None,
+            tuple(self.bboxes) if self.bboxes is not None else None,
+        )
+
+    def add(self, filters: Dict[str, Any], max_boxes: int):
+        bboxes = filters.get("bboxes")
+        if bboxes is not None:
+            merged = list(self.bboxes or [])
+            merged.extend(box for box in bboxes if box not in merged)
+            if len(merged) > max_boxes:
+                raise ValueError(f"At most {max_boxes} bounding boxes per client")
+            self.bboxes = merged
+        for field in TOPIC_FILTERS:
+            if field in filters:
+                setattr(self, field, (getattr(self, field) or set()) | filters[field])
+
+    def remove(self, filters: Dict[str, Any]):
+        if not filters:
+            self.__init__()
+            return
+        for field in filters:
+            if getattr(self, field) is None:
+                raise ValueError(f"No {field} filter to remove from; subscribe to the ones wanted instead")
+        if "bboxes" in filters:
+            self.bboxes = [box for box in self.bboxes if box not in filters["bboxes"]]
+        for field in TOPIC_FILTERS:
+            if field in filters:
+                setattr(self, field, getattr(self, field) - filters[field])
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            field: sorted(getattr(self, field)) if getattr(self, field) is not None else None
+            for field in TOPIC_FILTERS
+        }
+        result["bboxes"] = [list(box) for box in self.bboxes] if self.bboxes is not None else None
+        return result
+
+
+class SubscriptionIndex:
+    """Maps topics to subscribed clients, so a publish only visits interested ones
+
+    For each filter, clients are indexed under every value they subscribed
+    to, or in an "unfiltered" set if that filter is off. Regions go in a
+    BoxIndex keyed by (client, box). A publish starts from the clients of
+    the message's type and narrows them by its agent type, disaster ID and
+    location.
+    """
+
+    def __init__(self, cell_deg: float = 1.0, max_boxes: int = 16):
+        self.max_boxes = max_boxes
+        self._subscriptions: Dict[Hashable, Subscription] = {}
+        self._topics: Dict[str, Dict[str, Set[Hashable]]] = {field: {} for field in TOPIC_FILTERS}
+        self._unfiltered: Dict[str, Set[Hashable]] = {field: set() for field in TOPIC_FILTERS}
+        self._regions = BoxIndex(cell_deg)
+        self._everywhere: Set[Hashable] = set()
+        self.stats = {"published": 0, "deliveries": 0, "agent_views": 0}
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def get(self, client: Hashable) -> Optional[Subscription]:
+        return self._subscriptions.get(client)
+
+    def add(self, client: Hashable, subscription: Optional[Subscription] = None):
+        """Index a client, receiving everything unless a subscription is given"""
+        subscription = subscription or Subscription()
+        self._subscriptions[client] = subscription
+        for field in TOPIC_FILTERS:
+            values = getattr(subscription, field)
+            if values is None:
+                self._unfiltered[field].add(client)
+            else:
+                topics = self._topics[field]
+                for value in values:
+                    topics.setdefault(value, set()).add(client)
+        if subscription.bboxes is None:
+            self._everywhere.add(client)
+        else:
+            for box in subscription.bboxes:
+                self._regions.insert((client, box), *box)
+
+    def discard(self, client: Hashable) -> Optional[Subscription]:
+        """Remove a client from every topic, returning its subscription"""
+        subscription = self._subscriptions.pop(client, None)
+        if subscription is None:
+            return None
+        for field in TOPIC_FILTERS:
+            values = getattr(subscription, field)
+            if values is None:
+                self._unfiltered[field].discard(client)
+                continue
+            topics = self._topics[field]
+            for value in values:
+                members = topics[value]
+                members.discard(client)
+                if not members:
+                    del topics[value]
+        if subscription.bboxes is None:
+            self._everywhere.discard(client)
+        else:
+            for box in subscription.bboxes:
+                self._regions.remove((client, box))
+        return subscription
+
+    def update(self, client: Hashable, command: Dict[str, Any]) -> Subscription:
+        """Apply a subscribe or unsubscribe command; the subscription is unchanged if it is invalid"""
+        filters = parse_filters(command)
+        subscription = self.discard(client) or Subscription()
+        changed = Subscription()
+        for field in Subscription.__slots__:
+            value = getattr(subscription, field)
+            setattr(changed, field, value.copy() if value is not None else None)
+        try:
+            if command.get("action") == "unsubscribe":
+                changed.remove(filters)
+            else:
+                changed.add(filters, self.max_boxes)
+        except ValueError:
+            self.add(client, subscription)
+            raise
+        self.add(client, changed)
+        return changed
+
+    def route(self, frame: Frame) -> List[Tuple[Hashable, Frame]]:
+        """The clients a published frame goes to, each with the frame it should get"""
+        message = frame.message
+        data = message.get("data")
+        data = data if isinstance(data, dict) else {}
+        message_type = frame.type
+
+        candidates = self._unfiltered["types"] | self._topics["types"].get(message_type, set())
+        self.stats["published"] += 1
+        if not candidates:
+            return []
+
+        # Narrow by whichever topics this message carries
+        agent_type = data.get("type") if message_type == "agent_status" else None
+        disaster_id = data.get("id") if message_type == "disaster_detected" else data.get("disaster_id")
+        for field, value in (("agent_types", agent_type), ("disaster_ids", disaster_id)):
+            if value is None:
+                continue
+            unfiltered = self._unfiltered[field]
+            subscribed = self._topics[field].get(value, ())
+            candidates = [c for c in candidates if c in unfiltered or c in subscribed]
+        point = parse_location(data.get("location"))
+        if point is not None:
+            inside = {client for client, _ in self._regions.query_point(*point)}
+            candidates = [c for c in candidates if c in self._everywhere or c in inside]
+
+        if message_type in AGENT_BATCH_TYPES:
+            views: Dict[Tuple, Optional[Frame]] = {}
+            routes = []
+            for client in candidates:
+                view = self.view(client, frame, views)
+                if view is not None:
+                    routes.append((client, view))
+        else:
+            routes = [(client, frame) for client in candidates]
+        self.stats["deliveries"] += len(routes)
+        return routes
+
+    def view(
+        self,
+        client: Hashable,
+        frame: Frame,
+        cache: Optional[Dict[Tuple, Optional[Frame]]] = None,
+        drop_empty: bool = True,
+    ) -> Optional[Frame]:
+        """The frame narrowed to the agents a client subscribed to
+
+        Frames other than agent batches are returned as-is. A delta left
+        with no agents is None when drop_empty is set. Narrowed frames are
+        shared through cache by clients with the same agent filters.
+        """
+        subscription = self._subscriptions.get(client)
+        if subscription is None or not subscription.narrows_agents or frame.type not in AGENT_BATCH_TYPES:
+            return frame
+        key = subscription.agents_key()
+        if cache is not None and key in cache:
+            return cache[key]
+        view = self._narrow_agents(frame, subscription, drop_empty)
+        if cache is not None:
+            cache[key] = view
+        return view
+
+    def _narrow_agents(self, frame: Frame, subscription: Subscription, drop_empty: bool) -> Optional[Frame]:
+        from app.core.orchestrator import orchestrator
+
+        data = frame.message.get("data") or {}
+        agents = data.get("agents", [])
+        if subscription.agent_types is not None:
+            agents = [agent for agent in agents if agent["type"] in subscription.agent_types]
+        if subscription.bboxes is not None and agents:
+            # Agents are placed by their home position
+            ids = np.fromiter((agent["id"] for agent in agents), dtype=np.int64, count=len(agents))
+            lat = orchestrator.agent_positions[ids, 0]
+            lng = orchestrator.agent_positions[ids, 1]
+            inside = np.zeros(len(ids), dtype=bool)
+            for min_lat, min_lng, max_lat, max_lng in subscription.bboxes:
+                inside |= (lat >= min_lat) & (lat <= max_lat) & (lng >= min_lng) & (lng <= max_lng)
+            agents = [agent for agent, keep in zip(agents, inside.tolist()) if keep]
+        self.stats["agent_views"] += 1
+        if drop_empty and not agents and not data.get("full"):
+            return None
+        return Frame({**frame.message, "data": {**data, "agents": agents}})
+
+    def get_stats(self) -> Dict[str, Any]:
+        filtered = sum(
+            1 for client in self._subscriptions
+            if client not in self._unfiltered["types"] or client not in self._everywhere
+            or client not in self._unfiltered["agent_types"] or client not in self._unfiltered["disaster_ids"]
+        )
+        return {
+            "clients": len(self._subscriptions),
+            "filtered_clients": filtered,
+            "topics": {field: len(self._topics[field]) for field in TOPIC_FILTERS},
+            "regions": len(self._regions),
+            **self.stats,
+        }
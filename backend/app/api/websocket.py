@@ -1,86 +1,289 @@
 """WebSocket Connection Manager for Real-time Agent Status Updates"""
 
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import List, Dict, Any
+from typing import Callable, Dict, Any, Optional, Set, Union
 import json
 from datetime import datetime
 import asyncio
 import logging
+import time
+from app.core.config import settings
+from app.core.metrics import BROADCAST_FANOUT, BROADCAST_SECONDS, WS_CLIENTS
+from app.api.frames import Frame, as_frame, supported_encoding
+from app.api.subscriptions import Subscription, SubscriptionIndex
 
 logger = logging.getLogger(__name__)
 
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "evict")
+
+
+class ClientConnection:
+    """Bounded outbound queue and writer task for a single WebSocket client"""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        queue_size: int,
+        overflow_policy: str,
+        evict_after_drops: int,
+        on_closed: Callable[["ClientConnection"], None],
+        encoding: str = "json",
+    ):
+        self.websocket = websocket
+        self.encoding = encoding
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflow_policy = overflow_policy
+        self.evict_after_drops = evict_after_drops
+        self.sent = 0
+        self.dropped = 0
+        self.consecutive_drops = 0
+        self.connected_at = datetime.utcnow()
+        self._on_closed = on_closed
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, frame: Frame) -> bool:
+        """Queue a frame without blocking; returns False if the client should be evicted"""
+        try:
+            self.queue.put_nowait(frame)
+            self.consecutive_drops = 0
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        if self.overflow_policy == "evict":
+            return False
+
+        if self.overflow_policy == "drop_oldest":
+            self.queue.get_nowait()
+            self.queue.put_nowait(frame)
+
+        self.dropped += 1
+        self.consecutive_drops += 1
+        return not (self.evict_after_drops and self.consecutive_drops >= self.evict_after_drops)
+
+    async def _write_loop(self):
+        """Drain the outbound queue onto the socket"""
+        try:
+            while True:
+                frame = await self.queue.get()
+                await frame.send(self.websocket, self.encoding)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error sending to client: {e}")
+            self._on_closed(self)
+
+    async def close(self, code: Optional[int] = None):
+        """Stop the writer and optionally close the socket"""
+        self._writer.cancel()
+        if code is not None:
+            try:
+                await self.websocket.close(code=code)
+            except Exception:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and delivery counters"""
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "encoding": self.encoding,
+            "connected_at": self.connected_at.isoformat()
+        }
+
 
 class SwarmConnectionManager:
     """Manages WebSocket connections for real-time swarm updates"""
-    
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+
+    def __init__(
+        self,
+        queue_size: int = settings.ws_send_queue_size,
+        overflow_policy: str = settings.ws_overflow_policy,
+        evict_after_drops: int = settings.ws_evict_after_drops,
+        max_subscription_boxes: int = settings.ws_max_subscription_boxes,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self.evict_after_drops = evict_after_drops
+        self.evicted = 0
+        # Which clients want which message types, agent types, disasters and regions
+        self.subscriptions = SubscriptionIndex(settings.spatial_cell_deg, max_subscription_boxes)
         self._lock = asyncio.Lock()
-    
-    async def connect(self, websocket: WebSocket):
+        # Optional pub/sub bus (RedisSwarmState) for multi-worker deployments
+        self.bus = None
+        self._bus_listener: Optional[asyncio.Task] = None
+        # Close tasks for evicted clients, held so they are not collected mid-close
+        self._closing: Set[asyncio.Task] = set()
+        # swarm_status frame for the current status snapshot, encoded once for every new client
+        self._status_frame: Optional[Frame] = None
+
+    async def connect(self, websocket: WebSocket, encoding: Optional[str] = None):
         """Accept new WebSocket connection and send initial swarm status"""
         await websocket.accept()
+        client = ClientConnection(
+            websocket,
+            self.queue_size,
+            self.overflow_policy,
+            self.evict_after_drops,
+            on_closed=self._remove,
+            encoding=supported_encoding(encoding),
+        )
         async with self._lock:
-            self.active_connections.append(websocket)
-        
+            self.active_connections[websocket] = client
+            self.subscriptions.add(client)
+
         logger.info(f"New WebSocket connection. Total connections: {len(self.active_connections)}")
-        
+
         # Send immediate status of all agents upon connection
         initial_status = await self.get_initial_swarm_status()
-        try:
-            await websocket.send_json({
+        frame = self._status_frame
+        if frame is None or frame.message["data"] is not initial_status:
+            frame = self._status_frame = Frame({
                 "type": "swarm_status",
                 "data": initial_status,
                 "timestamp": datetime.utcnow().isoformat()
             })
-        except Exception as e:
-            logger.error(f"Error sending initial status: {e}")
-    
+        client.enqueue(frame)
+
     async def disconnect(self, websocket: WebSocket):
         """Remove WebSocket connection from active list"""
         async with self._lock:
-            if websocket in self.active_connections:
-                self.active_connections.remove(websocket)
-        
+            client = self.active_connections.pop(websocket, None)
+        if client:
+            self.subscriptions.discard(client)
+            await client.close()
+
         logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
-    
-    async def broadcast(self, message: Dict[str, Any]):
-        """Broadcast message to all connected clients"""
+
+    async def send_personal(self, websocket: WebSocket, message: Union[Dict[str, Any], Frame]):
+        """Send message to a single client"""
+        client = self.active_connections.get(websocket)
+        if client is None:
+            return
+        # Agent batches are narrowed to the agents the client subscribed to
+        frame = self.subscriptions.view(client, as_frame(message), drop_empty=False)
+        if frame is not None and not client.enqueue(frame):
+            self._evict(client)
+
+    def update_subscription(self, websocket: WebSocket, command: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply a subscribe/unsubscribe command from a client; raises ValueError if it is invalid"""
+        client = self.active_connections.get(websocket)
+        if client is None:
+            raise ValueError("Not connected")
+        return self.subscriptions.update(client, command).to_dict()
+
+    async def broadcast(self, message: Union[Dict[str, Any], Frame]):
+        """Send message to all clients, on every worker when a bus is attached"""
+        if self.bus is not None:
+            await self.bus.publish(as_frame(message).text)
+        else:
+            await self.broadcast_local(message)
+
+    async def broadcast_local(self, message: Union[Dict[str, Any], Frame]):
+        """Queue message for this worker's subscribed clients without waiting on any of them
+
+        The message is wrapped in a single Frame, so it is serialized at most
+        once per encoding no matter how many clients receive it. Only the
+        clients whose subscriptions match it are visited.
+        """
         if not self.active_connections:
             return
-        
-        disconnected = []
-        
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to client: {e}")
-                disconnected.append(connection)
-        
-        # Clean up disconnected clients
-        if disconnected:
-            async with self._lock:
-                for conn in disconnected:
-                    if conn in self.active_connections:
-                        self.active_connections.remove(conn)
-    
+
+        started = time.perf_counter()
+        frame = as_frame(message)
+        routes = self.subscriptions.route(frame)
+        for client, client_frame in routes:
+            if not client.enqueue(client_frame):
+                self._evict(client)
+        message_type = frame.type or "unknown"
+        BROADCAST_SECONDS.labels(message_type).observe(time.perf_counter() - started)
+        BROADCAST_FANOUT.labels(message_type).observe(len(routes))
+
+    def attach_bus(self, bus):
+        """Route broadcasts through a pub/sub bus shared by all workers"""
+        self.bus = bus
+        self._bus_listener = asyncio.create_task(bus.listen(self._on_bus_message))
+
+    async def detach_bus(self):
+        if self._bus_listener:
+            self._bus_listener.cancel()
+            await asyncio.gather(self._bus_listener, return_exceptions=True)
+            self._bus_listener = None
+        self.bus = None
+
+    async def _on_bus_message(self, text: str):
+        """Fan out a message published by any worker to local clients"""
+        await self.broadcast_local(Frame.from_text(text))
+
+    def _remove(self, client: ClientConnection):
+        """Forget a client whose writer has failed"""
+        if self.active_connections.get(client.websocket) is client:
+            del self.active_connections[client.websocket]
+            self.subscriptions.discard(client)
+            logger.info(f"WebSocket dropped. Total connections: {len(self.active_connections)}")
+
+    def _evict(self, client: ClientConnection):
+        """Disconnect a client that cannot keep up with the broadcast rate"""
+        if self.active_connections.pop(client.websocket, None) is None:
+            return
+        self.subscriptions.discard(client)
+        self.evicted += 1
+        logger.warning(
+            f"Evicting slow WebSocket client (queue {client.queue.qsize()}/{client.queue.maxsize}, "
+            f"dropped {client.dropped})"
+        )
+        # 1013 = try again later
+        task = asyncio.create_task(client.close(code=1013))
+        self._closing.add(task)
+        task.add_done_callback(self._closed)
+
+    def _closed(self, task: asyncio.Task):
+        self._closing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error closing evicted client: {task.exception()}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get fan-out queue depth and drop counts for all clients"""
+        clients = [
+            {**client.get_stats(), "subscription": (self.subscriptions.get(client) or Subscription()).to_dict()}
+            for client in self.active_connections.values()
+        ]
+        return {
+            "connections": len(clients),
+            "overflow_policy": self.overflow_policy,
+            "queue_size": self.queue_size,
+            "total_queued": sum(c["queue_depth"] for c in clients),
+            "max_queue_depth": max((c["queue_depth"] for c in clients), default=0),
+            "total_dropped": sum(c["dropped"] for c in clients),
+            "evicted": self.evicted,
+            "subscriptions": self.subscriptions.get_stats(),
+            "clients": clients
+        }
+
     async def get_initial_swarm_status(self) -> Dict[str, Any]:
-        """Get initial status of all 100 agents"""
+        """Get initial status of every agent in the swarm"""
         from app.core.orchestrator import orchestrator
-        
+
         try:
             status = await orchestrator.get_swarm_status()
             return status
         except Exception as e:
             logger.error(f"Error getting swarm status: {e}")
             return {
-                "total_agents": 100,
+                "total_agents": orchestrator.max_agents,
                 "active": 0,
-                "standby": 100,
+                "standby": orchestrator.max_agents,
                 "agents": []
             }
 
 
 # Global connection manager instance
 manager = SwarmConnectionManager()
+WS_CLIENTS.set_function(lambda: len(manager.active_connections))
@@ -1,5 +1,6 @@
 """Environment Configuration using Pydantic Settings"""
 
+from typing import Dict, List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -14,11 +15,119 @@ class Settings(BaseSettings):
     redis_host: str = "localhost"
     redis_port: int = 6379
     redis_db: int = 0
+    redis_enabled: bool = False  # Share swarm state and broadcasts across workers
+    redis_key_prefix: str = "resiliencegrid"
+    redis_sync_interval: float = 0.5  # Seconds between shared state syncs
+
+    # Event Log (single-worker persistence; with Redis the shared state is authoritative)
+    event_log_enabled: bool = False  # Log state changes and restore them on startup
+    event_log_dir: str = "data/events"  # Segment and snapshot files
+    event_log_segment_mb: int = 64  # Start a new segment file past this size
+    event_log_flush_interval: float = 0.05  # Seconds between group commits (max events lost on a crash)
+    event_log_fsync: bool = True  # fsync each group commit
+    event_log_snapshot_interval: float = 300.0  # Seconds between state snapshots
     
     # Agent Configuration
     max_agents: int = 100
     agent_pool_size: int = 10
+    task_queue_size: int = 1000  # Pending dispatcher tasks before submitters wait
+    agent_type_concurrency: int = 5  # Max concurrent tasks per agent type
+    agent_init_concurrency: int = 8  # Agents (or shared agent resources) initializing at once
+    agent_preload_types: List[str] = []  # Agent types imported and set up at startup instead of on first use
+    
+    # Location-aware Deployment
+    agent_region: List[float] = [24.5, -125.0, 49.5, -66.9]  # min_lat, min_lng, max_lat, max_lng
+    spatial_cell_deg: float = 1.0  # Spatial index cell size in degrees
+    deploy_agents_per_type: int = 10  # Nearest agents deployed per required type
+    deploy_radius_km: float = 0.0  # Max deployment distance (0 = unlimited)
+    
+    # Report Ingestion
+    ingest_batch_size: int = 500  # Reports validated and queued together
+    report_dedupe_window: int = 100000  # Recent report content keys kept for dedupe
+    report_history_size: int = 10000  # Recent reports kept in memory
+    
+    # Classification
+    classifier_batch_size: int = 256  # Max reports scored in one micro-batch
+    classifier_max_wait_ms: float = 10.0  # Max time a report waits for its batch to fill
+    
+    # Social Media Near-duplicate Suppression
+    social_dedup_window: float = 600.0  # Seconds a post suppresses its near-duplicates (at least)
+    social_dedup_capacity: int = 50000  # Posts remembered per window before early rotation
+    social_dedup_error_rate: float = 0.0001  # Bloom filter false positive rate per key
+    social_minhash_permutations: int = 128  # MinHash signature length
+    social_lsh_bands: int = 16  # LSH bands (permutations must divide evenly)
+    
+    # IoT Sensor Streams
+    iot_max_sensors: int = 10000  # Ring buffers preallocated at startup
+    iot_window: int = 128  # Readings kept per sensor
+    iot_ewma_alpha: float = 0.05  # Weight of each new reading in the running mean/variance
+    iot_z_threshold: float = 4.0  # |z-score| flagged as an anomaly
+    iot_warmup: int = 30  # Readings before a sensor's z-score is trusted
+    iot_anomaly_cooldown: float = 60.0  # Seconds between anomaly reports per sensor
+    
+    # Resource Allocation
+    resource_search_depots: int = 8  # Nearest depots a request draws from
+    resource_max_distance_km: float = 500.0  # Max depot distance for a request; bounds search cost too (0 = unlimited)
+    
+    # Spread Prediction
+    predictor_grid_size: int = 1000  # Cells per side of the grid around an incident
+    predictor_cell_size_m: float = 100.0  # Cell edge in metres
+    predictor_step_minutes: float = 5.0  # Simulated minutes per step
+    predictor_members: int = 8  # Ensemble members (wind/rainfall perturbations) run together
+    predictor_horizon_hours: float = 6.0  # Forecast length
+    predictor_checkpoint_minutes: float = 15.0  # Forecast states kept for the next update to resume from
+    predictor_max_incidents: int = 8  # Incident scenarios kept in memory
+    predictor_workers: int = 0  # Threads stepping ensemble members (0 = CPU count)
+    predictor_data_dir: str = "data/terrain"  # Fuel/elevation raster paths are resolved inside this directory and may not leave it
     
+    # Situation Reports
+    report_section_cache_size: int = 10000  # Rendered report sections kept in the LRU cache
+    report_max_incidents: int = 1000  # Incidents whose last report is kept for incremental updates
+    
+    # Road Routing
+    road_graph_path: str = "data/roads/graph.npz"  # CSR road graph saved by RoadGraph.save
+    route_cache_size: int = 4096  # Routes kept in the LRU cache
+    routing_landmarks: int = 8  # Landmarks for the A* lower bounds (if not in the graph file)
+    road_closure_radius_km: float = 2.0  # Roads closed around a disaster's location
+    
+    # Satellite Change Detection
+    satellite_data_dir: str = "data/satellite"  # Raster paths are resolved inside this directory and may not leave it
+    satellite_tile_size: int = 512  # Tile edge in pixels
+    satellite_workers: int = 0  # Change detection processes (0 = CPU count)
+    satellite_tiles_per_job: int = 16  # Tiles scored per worker round trip
+    satellite_change_threshold: float = 0.2  # Normalized difference counted as changed
+    
+    # News Feeds
+    news_feeds: List[str] = []  # RSS/Atom feed URLs polled by the news agents
+    news_max_connections: int = 100  # Pooled HTTP connections shared by all feeds
+    news_max_per_host: int = 6  # Concurrent requests to any one host
+    news_timeout: float = 10.0  # Seconds per feed request
+    news_min_interval: float = 60.0  # Seconds between polls of a feed with new items
+    news_max_interval: float = 1800.0  # Longest poll interval for a feed that keeps coming back unchanged
+    news_backoff: float = 2.0  # Interval multiplier per unchanged poll
+
+    # Alert Dispatch
+    alert_rate_limits: Dict[str, float] = {"sms": 100.0, "email": 500.0, "push": 2000.0, "radio": 2.0}  # Messages/sec per channel
+    alert_batch_size: int = 100  # Max alerts per provider call (capped at one second of rate)
+    alert_workers_per_channel: int = 4  # Async workers draining each channel's queue
+    alert_coalesce_window: float = 300.0  # Seconds a sent alert suppresses repeats to the same recipient and area
+    alert_queue_size: int = 100000  # Queued alerts per channel before submitters wait
+    alert_webhooks: Dict[str, str] = {}  # Channel -> provider gateway URL batches are POSTed to (unset channels use a local stub)
+    alert_webhook_timeout: float = 10.0  # Seconds per provider request
+    
+    # WebSocket Fan-out
+    ws_send_queue_size: int = 100  # Outbound messages buffered per client
+    ws_overflow_policy: str = "drop_oldest"  # drop_oldest, drop_newest or evict
+    ws_evict_after_drops: int = 0  # Evict after this many consecutive drops (0 = never)
+    ws_max_subscription_boxes: int = 16  # Bounding boxes one client may subscribe to
+    
+    # Event Loop Monitoring
+    loop_monitor_enabled: bool = True  # Sample loop lag and capture stacks of stalls
+    loop_lag_interval: float = 0.1  # Seconds between lag samples
+    loop_slow_threshold: float = 0.25  # Blocked this long, the loop thread's stack is captured
+    profile_max_seconds: float = 60.0  # Longest window /api/debug/profile will sample
+    debug_endpoints_enabled: bool = False  # Serve /api/debug/* (stack traces, on-demand profiling); keep off on public deployments
+
     # Simulation Mode (for testing)
     simulation_mode: bool = False
     
@@ -0,0 +1,233 @@
+"""Task Dispatcher - Routes Queued Tasks to Agent Workers"""
+
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Tuple
+from collections import defaultdict, deque
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Lower value = dispatched first
+SEVERITY_PRIORITY = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+THROUGHPUT_WINDOW = 60.0  # seconds
+
+
+def _retrieve_exception(future: asyncio.Future):
+    """Mark a failed task's exception as seen; _run has already logged it
+
+    Most callers fire and forget, and asyncio would otherwise warn that the
+    future's exception was never retrieved.
+    """
+    if not future.cancelled():
+        future.exception()
+
+
+class TaskEntry:
+    """A queued task with its result future and timing"""
+
+    __slots__ = ("task", "agent_type", "future", "enqueued_at")
+
+    def __init__(self, task: Dict[str, Any], future: asyncio.Future):
+        self.task = task
+        self.agent_type = task["agent_type"]
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class AgentTypeStats:
+    """Queue wait, service time and throughput for one agent type"""
+
+    def __init__(self):
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_service = 0.0
+        self.max_service = 0.0
+        self._recent: Deque[float] = deque()
+
+    def record(self, wait: float, service: float, ok: bool):
+        """Record a finished task"""
+        if ok:
+            self.completed += 1
+        else:
+            self.failed += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.total_service += service
+        self.max_service = max(self.max_service, service)
+
+        now = time.monotonic()
+        self._recent.append(now)
+        while self._recent and now - self._recent[0] > THROUGHPUT_WINDOW:
+            self._recent.popleft()
+
+    def to_dict(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        now = time.monotonic()
+        recent = sum(1 for t in self._recent if now - t <= THROUGHPUT_WINDOW)
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "avg_wait_ms": round(self.total_wait / finished * 1000, 3) if finished else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "avg_service_ms": round(self.total_service / finished * 1000, 3) if finished else 0.0,
+            "max_service_ms": round(self.max_service * 1000, 3),
+            "throughput_per_sec": round(recent / THROUGHPUT_WINDOW, 3)
+        }
+
+
+class TaskDispatcher:
+    """Pool of async workers draining a severity-ordered task queue
+
+    Tasks are dicts with an ``agent_type`` and optional ``severity``. Each task
+    is handed to an agent of that type via ``acquire_agent(task)``, returned
+    with ``release_agent(agent, ok)``, and its ``process_task`` result
+    resolves the future returned by ``submit``.
+
+    - At most ``type_concurrency`` tasks of one agent type run at once; tasks
+      pulled while their type is saturated are parked per type so workers can
+      keep serving other types.
+    - At most ``queue_size`` tasks may be pending; ``submit`` waits for a free
+      slot (backpressure) and ``submit_nowait`` raises ``asyncio.QueueFull``.
+    """
+
+    def __init__(
+        self,
+        acquire_agent: Callable[[Dict[str, Any]], Awaitable[Any]],
+        release_agent: Callable[[Any, bool], Awaitable[None]],
+        num_workers: int = 10,
+        queue_size: int = 1000,
+        type_concurrency: int = 5,
+    ):
+        self.acquire_agent = acquire_agent
+        self.release_agent = release_agent
+        self.num_workers = num_workers
+        self.queue_size = queue_size
+        self.type_concurrency = type_concurrency
+        self.type_limits: Dict[str, int] = {}
+
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._pending = 0
+        self._not_full = asyncio.Condition()
+        self._deferred: Dict[str, List[Tuple[int, int, TaskEntry]]] = defaultdict(list)
+        self._seq = itertools.count()
+        self._workers: List[asyncio.Task] = []
+        self.stats: Dict[str, AgentTypeStats] = defaultdict(AgentTypeStats)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    @property
+    def pending(self) -> int:
+        """Tasks queued or parked but not yet started"""
+        return self._pending
+
+    def set_type_limit(self, agent_type: str, limit: int):
+        """Cap concurrency for one agent type (e.g. to the number of agents of that type)"""
+        self.type_limits[agent_type] = max(1, limit)
+
+    def _limit(self, agent_type: str) -> int:
+        return min(self.type_concurrency, self.type_limits.get(agent_type, self.type_concurrency))
+
+    async def submit(self, task: Dict[str, Any]) -> asyncio.Future:
+        """Queue a task, waiting while the queue is full; returns a future for its result"""
+        async with self._not_full:
+            await self._not_full.wait_for(lambda: self._pending < self.queue_size)
+            return self._enqueue(task)
+
+    def submit_nowait(self, task: Dict[str, Any]) -> asyncio.Future:
+        """Queue a task or raise asyncio.QueueFull; returns a future for its result"""
+        if self._pending >= self.queue_size:
+            raise asyncio.QueueFull
+        return self._enqueue(task)
+
+    def _enqueue(self, task: Dict[str, Any]) -> asyncio.Future:
+        if "agent_type" not in task:
+            raise ValueError("Task is missing agent_type")
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_retrieve_exception)
+        priority = SEVERITY_PRIORITY.get(task.get("severity", "medium"), SEVERITY_PRIORITY["medium"])
+        self._pending += 1
+        self.queue.put_nowait((priority, next(self._seq), TaskEntry(task, future)))
+        return future
+
+    async def start(self):
+        """Start the worker pool"""
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(n)) for n in range(self.num_workers)
+        ]
+        logger.info(f"Task dispatcher started with {self.num_workers} workers")
+
+    async def stop(self):
+        """Stop the worker pool; queued tasks stay queued"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _worker(self, n: int):
+        while True:
+            item = await self.queue.get()
+            entry = item[2]
+            if self.stats[entry.agent_type].in_flight >= self._limit(entry.agent_type):
+                # Park it; a worker finishing a task of this type will pick it up
+                heapq.heappush(self._deferred[entry.agent_type], item)
+                continue
+
+            agent_type = entry.agent_type
+            while entry is not None:
+                await self._run(entry)
+                deferred = self._deferred.get(agent_type)
+                entry = heapq.heappop(deferred)[2] if deferred else None
+
+    async def _run(self, entry: TaskEntry):
+        """Run one task on an agent and record its timing"""
+        stats = self.stats[entry.agent_type]
+        stats.in_flight += 1
+        self._pending -= 1
+        async with self._not_full:
+            self._not_full.notify()
+
+        started = time.perf_counter()
+        ok = False
+        try:
+            agent = await self.acquire_agent(entry.task)
+            try:
+                result = await agent.process_task(entry.task)
+                ok = True
+            finally:
+                await self.release_agent(agent, ok)
+            if not entry.future.done():
+                entry.future.set_result(result)
+        except asyncio.CancelledError:
+            if not entry.future.done():
+                entry.future.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Task for {entry.agent_type} failed: {e}")
+            if not entry.future.done():
+                entry.future.set_exception(e)
+        finally:
+            stats.in_flight -= 1
+            stats.record(started - entry.enqueued_at, time.perf_counter() - started, ok)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and per-agent-type wait/service/throughput"""
+        return {
+            "workers": len(self._workers),
+            "queue_depth": self.pending,
+            "queue_size": self.queue_size,
+            "deferred": {t: len(d) for t, d in self._deferred.items() if d},
+            "agent_types": {t: s.to_dict() for t, s in sorted(self.stats.items())}
+        }
@@ -0,0 +1,337 @@
+"""Append-only Event Log with Segment Files, Group Commit and Snapshots
+
+Swarm state survives restarts by logging every change as a binary record:
+
+- Records are appended to an in-memory buffer on the event loop and
+  written (and optionally fsynced) by a background flusher every
+  flush_interval seconds, so many records share one write and one fsync
+- The log is split into segment files named by their first sequence
+  number; a new segment starts once the current one passes segment_bytes
+- Snapshots of the whole state are written periodically, after which
+  segments they fully cover are deleted
+- Recovery loads the newest snapshot and replays only the records after
+  it, reading segments through mmap; a torn record at the tail (from a
+  crash mid-write) is truncated away
+
+Record layout: payload length (u32), CRC32 of seq+type+payload (u32),
+seq (u64), type (u8), payload.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pathlib import Path
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Record types
+STATUS = 1  # Agent status changes: int32 agent IDs then uint8 status codes
+DISASTER = 2  # One disaster record as JSON
+REPORTS = 3  # A batch of accepted reports as JSON
+
+RECORD_HEADER = struct.Struct("<IIQB")
+SEQ_TYPE = struct.Struct("<QB")  # The checksummed part of the header
+SNAPSHOT_MAGIC = b"RGSNAP01"
+SNAPSHOT_HEADER = struct.Struct("<8sQQII")  # magic, seq, codes length, meta length, CRC32 of codes+meta
+
+ApplySnapshot = Callable[[int, np.ndarray, Dict[str, Any]], None]
+ApplyRecord = Callable[[int, memoryview], None]
+
+
+def encode_status(agent_ids: np.ndarray, codes: np.ndarray) -> bytes:
+    return np.asarray(agent_ids, dtype="<i4").tobytes() + np.asarray(codes, dtype=np.uint8).tobytes()
+
+
+def decode_status(payload: memoryview) -> Tuple[np.ndarray, np.ndarray]:
+    """(agent IDs, status codes) of a STATUS record"""
+    count = len(payload) // 5
+    return (
+        np.frombuffer(payload, dtype="<i4", count=count),
+        np.frombuffer(payload, dtype=np.uint8, count=count, offset=4 * count),
+    )
+
+
+def decode_json(payload: memoryview) -> Any:
+    return json.loads(bytes(payload))
+
+
+class EventLog:
+    """Segmented append-only log of swarm events in one directory
+
+    Call load() once before appending: it replays existing state and
+    positions the log after the last intact record. Then start() runs
+    the group-commit flusher on the current loop; commit() forces a
+    flush and waits for it. Records appended since the last flush are
+    lost on a crash, so at most flush_interval seconds of events.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 64 * 1024 * 1024,
+        flush_interval: float = 0.05,
+        fsync: bool = True,
+        keep_snapshots: int = 2,
+    ):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.keep_snapshots = max(1, keep_snapshots)
+        self.seq = 0  # Last sequence number assigned
+        self.flushed_seq = 0  # Last sequence number written to disk
+        self.snapshot_seq = 0
+        self._buffer = bytearray()
+        self._file = None
+        self._segment_size = 0
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        self.stats = {
+            "records": 0, "bytes": 0, "flushes": 0, "flush_seconds": 0.0,
+            "snapshots": 0, "snapshot_seconds": 0.0,
+            "replayed_records": 0, "replay_seconds": 0.0, "truncated_bytes": 0
+        }
+
+    # Files
+
+    def _segments(self) -> List[Tuple[int, Path]]:
+        return sorted(
+            (int(path.stem.split("-")[1]), path) for path in self.directory.glob("segment-*.log")
+        )
+
+    def _snapshots(self) -> List[Tuple[int, Path]]:
+        return sorted(
+            (int(path.stem.split("-")[1]), path) for path in self.directory.glob("snapshot-*.bin")
+        )
+
+    def _open_segment(self, first_seq: int):
+        if self._file is not None:
+            self._file.close()
+        path = self.directory / f"segment-{first_seq:020d}.log"
+        self._file = open(path, "ab")
+        self._segment_size = self._file.tell()
+
+    # Recovery
+
+    def load(self, apply_snapshot: ApplySnapshot, apply_record: ApplyRecord) -> Dict[str, Any]:
+        """Restore state from the newest readable snapshot and the records after it
+
+        apply_snapshot(seq, codes, meta) is called at most once, then
+        apply_record(type, payload) for each later record in order.
+        Payloads are views into the mapped segment and are only valid
+        during the call.
+        """
+        started = time.perf_counter()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for snapshot_seq, path in reversed(self._snapshots()):
+            try:
+                codes, meta = self._read_snapshot(path)
+            except (OSError, ValueError) as e:
+                logger.error(f"Skipping unreadable snapshot {path.name}: {e}")
+                continue
+            apply_snapshot(snapshot_seq, codes, meta)
+            self.snapshot_seq = self.seq = snapshot_seq
+            break
+
+        segments = self._segments()
+        replayed = 0
+        for i, (first_seq, path) in enumerate(segments):
+            following = segments[i + 1][0] if i + 1 < len(segments) else None
+            if following is not None and following <= self.snapshot_seq + 1:
+                continue  # Fully covered by the snapshot
+            intact, count = self._replay_segment(path, apply_record)
+            replayed += count
+            if intact < path.stat().st_size:
+                self.stats["truncated_bytes"] += path.stat().st_size - intact
+                logger.warning(f"Truncating torn or corrupt tail of {path.name} at byte {intact}")
+                os.truncate(path, intact)
+                for _, later in segments[i + 1:]:
+                    logger.error(f"Discarding {later.name} after corruption in {path.name}")
+                    later.unlink()
+                break
+
+        self.flushed_seq = self.seq
+        segments = self._segments()
+        self._open_segment(segments[-1][0] if segments else self.seq + 1)
+        self.stats["replayed_records"] = replayed
+        self.stats["replay_seconds"] = round(time.perf_counter() - started, 4)
+        return {
+            "snapshot_seq": self.snapshot_seq,
+            "replayed_records": replayed,
+            "seq": self.seq,
+            "seconds": self.stats["replay_seconds"]
+        }
+
+    def _replay_segment(self, path: Path, apply_record: ApplyRecord) -> Tuple[int, int]:
+        """Apply the records in one segment not yet applied; returns (intact bytes, records applied)"""
+        size = path.stat().st_size
+        if size == 0:
+            return 0, 0
+        count = 0
+        offset = 0
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                while offset + RECORD_HEADER.size <= size:
+                    length, crc, seq, record_type = RECORD_HEADER.unpack_from(view, offset)
+                    end = offset + RECORD_HEADER.size + length
+                    if end > size or zlib.crc32(view[offset + 8:end]) != crc:
+                        break
+                    if seq > self.seq:
+                        payload = view[offset + RECORD_HEADER.size:end]
+                        try:
+                            apply_record(record_type, payload)
+                        finally:
+                            payload.release()
+                        count += 1
+                        self.seq = seq
+                    offset = end
+            finally:
+                view.release()
+        return offset, count
+
+    def _read_snapshot(self, path: Path) -> Tuple[np.ndarray, Dict[str, Any]]:
+        data = path.read_bytes()
+        if len(data) < SNAPSHOT_HEADER.size:
+            raise ValueError("truncated header")
+        magic, seq, codes_length, meta_length, crc = SNAPSHOT_HEADER.unpack_from(data)
+        body = memoryview(data)[SNAPSHOT_HEADER.size:]
+        if magic != SNAPSHOT_MAGIC or len(body) != codes_length + meta_length or zlib.crc32(body) != crc:
+            raise ValueError("bad magic, length or checksum")
+        codes = np.frombuffer(body, dtype=np.uint8, count=codes_length).copy()
+        return codes, json.loads(bytes(body[codes_length:]))
+
+    # Appending
+
+    def append(self, record_type: int, payload: bytes) -> int:
+        """Buffer one record for the next group commit; returns its sequence number"""
+        self.seq += 1
+        crc = zlib.crc32(payload, zlib.crc32(SEQ_TYPE.pack(self.seq, record_type)))
+        self._buffer += RECORD_HEADER.pack(len(payload), crc, self.seq, record_type)
+        self._buffer += payload
+        self.stats["records"] += 1
+        if len(self._buffer) >= 1024 * 1024:
+            self._wakeup.set()
+        return self.seq
+
+    def append_status(self, agent_ids: np.ndarray, codes: np.ndarray) -> int:
+        return self.append(STATUS, encode_status(agent_ids, codes))
+
+    def append_json(self, record_type: int, value: Any) -> int:
+        return self.append(record_type, json.dumps(value, separators=(",", ":")).encode())
+
+    async def commit(self):
+        """Write and (with fsync) persist every record appended so far"""
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            data, self._buffer = self._buffer, bytearray()
+            last_seq = self.seq
+            started = time.perf_counter()
+            await asyncio.to_thread(self._write, data, last_seq)
+            self.flushed_seq = last_seq
+            self.stats["flushes"] += 1
+            self.stats["bytes"] += len(data)
+            self.stats["flush_seconds"] += time.perf_counter() - started
+
+    def _write(self, data: bytearray, last_seq: int):
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._segment_size += len(data)
+        if self._segment_size >= self.segment_bytes:
+            self._open_segment(last_seq + 1)
+
+    def start(self):
+        """Run the group-commit flusher on the running loop"""
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.commit()
+            except Exception as e:
+                logger.error(f"Error writing event log: {e}")
+
+    async def close(self):
+        """Stop the flusher, commit what is buffered and close the segment"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.commit()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # Snapshots
+
+    async def snapshot(self, codes: np.ndarray, meta: Dict[str, Any]):
+        """Write a snapshot of the state as of the last appended record, then drop covered segments
+
+        codes and meta must already be copies (they are serialized off the
+        loop), taken after the last append and before this call.
+        """
+        seq = self.seq
+        if seq == self.snapshot_seq:
+            return
+        await self.commit()
+        started = time.perf_counter()
+        await asyncio.to_thread(self._write_snapshot, seq, codes, meta)
+        self.snapshot_seq = seq
+        self.stats["snapshots"] += 1
+        self.stats["snapshot_seconds"] += time.perf_counter() - started
+
+    def _write_snapshot(self, seq: int, codes: np.ndarray, meta: Dict[str, Any]):
+        body = np.asarray(codes, dtype=np.uint8).tobytes()
+        meta_bytes = json.dumps(meta, separators=(",", ":")).encode()
+        header = SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, seq, len(body), len(meta_bytes), zlib.crc32(meta_bytes, zlib.crc32(body))
+        )
+        path = self.directory / f"snapshot-{seq:020d}.bin"
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(header)
+            f.write(body)
+            f.write(meta_bytes)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+        # Keep the newest few snapshots and the segments the oldest of them still needs
+        snapshots = self._snapshots()
+        for _, old in snapshots[:-self.keep_snapshots]:
+            old.unlink()
+        oldest = snapshots[-self.keep_snapshots:][0][0]
+        segments = self._segments()
+        for (first_seq, path), (following, _) in zip(segments, segments[1:]):
+            if following <= oldest + 1:
+                path.unlink()
+
+    def get_stats(self) -> Dict[str, Any]:
+        flushes = self.stats["flushes"]
+        return {
+            **{k: round(v, 4) if isinstance(v, float) else v for k, v in self.stats.items()},
+            "seq": self.seq,
+            "flushed_seq": self.flushed_seq,
+            "snapshot_seq": self.snapshot_seq,
+            "buffered_bytes": len(self._buffer),
+            "records_per_flush": round(self.stats["records"] / flushes, 1) if flushes else 0.0,
+            "segments": len(self._segments()),
+        }
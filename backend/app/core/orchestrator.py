@@ -1,118 +1,610 @@
 """Agent Swarm Orchestrator - The Brain of ResilienceGrid"""
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 from asyncio import Queue, create_task
+from collections import OrderedDict, deque
 import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+import uuid
 from datetime import datetime
+from app.agents.base import AgentStatus, BaseAgent
+from app.core.config import settings
+from app.core.dispatcher import SEVERITY_PRIORITY, TaskDispatcher
+from app.core.eventlog import DISASTER, REPORTS, STATUS, EventLog, decode_json, decode_status
+from app.core.metrics import AGENTS_ACTIVE, DEPLOY_SECONDS, REPORTS_INGESTED, TASK_QUEUE_DEPTH
+from app.core.registry import AGENT_REGISTRY, AgentRegistry
+from app.core.spatial import GridIndex, parse_location
+from app.core.state import AgentStateStore, ACTIVE_CODES, STATUS_CODES
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Agent types deployed per disaster type
+DEPLOYMENT_PROFILES = {
+    "earthquake": ("social", "news", "satellite", "iot", "classifier"),
+    "flood": ("social", "news", "satellite", "iot", "classifier", "resource", "predictor"),
+    "wildfire": ("social", "news", "satellite", "iot", "classifier", "resource", "logistics", "predictor"),
+    "fire": ("social", "news", "satellite", "iot", "classifier", "resource", "logistics", "predictor"),
+}
+DEFAULT_DEPLOYMENT_PROFILE = ("social", "news", "satellite")
+
+
+class StatusSnapshot:
+    """Swarm status at one state version, with its JSON body serialized once
+
+    Snapshots are shared by every caller until the state changes, so the
+    data must be treated as read-only.
+    """
+
+    __slots__ = ("version", "data", "etag", "_body")
+
+    def __init__(self, version: int, data: Dict[str, Any], etag: str):
+        self.version = version
+        self.data = data
+        self.etag = etag
+        self._body: Optional[bytes] = None
+
+    @property
+    def body(self) -> bytes:
+        if self._body is None:
+            self._body = json.dumps(self.data, separators=(",", ":"), ensure_ascii=False).encode()
+        return self._body
 
 
 class SwarmOrchestrator:
-    """Manages 100 AI agents coordinating disaster response"""
+    """Manages the AI agent swarm coordinating disaster response"""
     
     def __init__(self, max_agents: int = 100):
         self.max_agents = max_agents
-        self.agents: Dict[int, Any] = {}  # agent_id -> agent instance
-        self.task_queue: Queue = Queue()
+        # Agent classes are imported and agents created on first activation
+        self.registry = AgentRegistry(AGENT_REGISTRY, init_concurrency=settings.agent_init_concurrency)
+        self.agents: Dict[int, Any] = self.registry.agents  # agent_id -> agent instance
+        # Status/type codes for every agent, with per-agent change versions
+        # used to send status deltas instead of the full grid
+        self.state = AgentStateStore(max_agents)
+        self.dispatcher = TaskDispatcher(
+            self._acquire_agent,
+            self._release_agent,
+            num_workers=settings.agent_pool_size,
+            queue_size=settings.task_queue_size,
+            type_concurrency=settings.agent_type_concurrency,
+        )
+        for agent_type, (first_id, last_id) in self.state.type_ranges.items():
+            self.dispatcher.set_type_limit(agent_type, last_id - first_id + 1)
+        self.task_queue: Queue = self.dispatcher.queue
+        self._busy_agents: Set[int] = set()
         self.active_disasters: List[Dict] = []
-        self.agent_status: Dict[int, str] = {}
+        # Agent home positions (indexed by agent ID) and per-type spatial indexes
+        self.agent_positions = self._place_agents()
+        self.agent_index: Dict[str, GridIndex] = {}
+        for agent_type, (first_id, last_id) in self.state.type_ranges.items():
+            index = self.agent_index[agent_type] = GridIndex(settings.spatial_cell_deg)
+            for agent_id in range(first_id, last_id + 1):
+                index.insert(agent_id, *self.agent_positions[agent_id])
+        self.disaster_index = GridIndex(settings.spatial_cell_deg)
+        # Recently ingested reports and content key -> report ID for deduplication
+        self.reports: deque = deque(maxlen=settings.report_history_size)
+        self.reports_ingested = 0
+        self.reports_duplicate = 0
+        self.reports_dropped = 0
+        self._report_keys: OrderedDict = OrderedDict()
+        # Optional Redis-backed state shared with other workers
+        self.shared_state = None
+        self._shared_version = 0
+        self._pending_disasters: List[Dict] = []
+        self._sync_task: Optional[asyncio.Task] = None
+        # Full status, rebuilt only when state_version moves; ETags carry a
+        # per-process tag so a restarted server never matches an old version
+        self._status_snapshot: Optional[StatusSnapshot] = None
+        self._etag_prefix = uuid.uuid4().hex[:8]
+        # Optional append-only log that state is rebuilt from on restart
+        self.event_log: Optional[EventLog] = None
+        self._logged_version = 0
+        self._restored_codes: Optional[np.ndarray] = None
+        self._event_log_task: Optional[asyncio.Task] = None
+        
+    @property
+    def state_version(self) -> int:
+        """Monotonic version bumped on every agent status change"""
+        return self.state.version
         
     async def initialize_swarm(self):
-        """Initialize all 100 agents"""
+        """Initialize all agents"""
         print(f"🚀 Initializing swarm with {self.max_agents} agents...")
         
-        # TODO: Instantiate actual agent classes
-        for agent_id in range(1, self.max_agents + 1):
-            self.agent_status[agent_id] = "standby"
+        # Agent objects are created lazily by the registry when first given a task
+        self.state.set_all("standby")
         
-        print(f"✅ Swarm initialized with {len(self.agent_status)} agents")
+        print(f"✅ Swarm initialized with {self.max_agents} agents")
         
-    async def deploy_agents(self, disaster_type: str, location: Dict[str, float]):
+    async def deploy_agents(
+        self, disaster_type: str, location: Dict[str, float], severity: str = "medium"
+    ):
         """Deploy appropriate agents for disaster type"""
+        started = time.perf_counter()
         print(f"🎯 Deploying agents for {disaster_type} at {location}")
         
         # Determine which agents to activate based on disaster type
-        agent_groups = self._select_agent_groups(disaster_type)
+        agent_groups = self._select_agent_groups(disaster_type, location)
+        self.state.set_many(agent_groups, "active")
+        disaster = self._record_disaster({
+            "type": disaster_type,
+            "location": location,
+            "severity": severity
+        })
         
-        for agent_id in agent_groups:
-            self.agent_status[agent_id] = "active"
+        # Queue one response task per deployed agent type, ordered by severity
+        agent_types = self.state.types_of(agent_groups)
+        for agent_type in agent_types:
+            await self.submit_task({
+                "agent_type": agent_type,
+                "action": "respond",
+                "disaster_id": disaster["id"],
+                "disaster_type": disaster_type,
+                "location": location,
+                "severity": severity
+            })
             
+        DEPLOY_SECONDS.labels(disaster_type if disaster_type in DEPLOYMENT_PROFILES else "other").observe(
+            time.perf_counter() - started
+        )
         return {
             "deployed_count": len(agent_groups),
             "agent_ids": agent_groups,
-            "disaster_type": disaster_type
+            "disaster_type": disaster_type,
+            "disaster_id": disaster["id"],
+            "tasks_queued": len(agent_types)
         }
         
-    def _select_agent_groups(self, disaster_type: str) -> List[int]:
-        """Select appropriate agent groups based on disaster type"""
-        base_agents = list(range(1, 101))  # All agents
-        
-        # TODO: Implement smart agent selection logic
-        # For now, return a subset based on disaster type
-        if disaster_type == "earthquake":
-            return base_agents[:50]  # Social, news, satellite, IoT, classifier
-        elif disaster_type == "flood":
-            return base_agents[:60]
-        elif disaster_type == "wildfire":
-            return base_agents[:70]
-        else:
-            return base_agents[:30]  # Default deployment
+    def _record_disaster(self, disaster: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a disaster to active_disasters, assigning an ID and timestamp"""
+        disaster = {
+            "id": f"D{uuid.uuid4().hex[:12]}",
+            "timestamp": datetime.utcnow().isoformat(),
+            **disaster
+        }
+        self.active_disasters.append(disaster)
+        self._index_disaster(disaster)
+        if self.shared_state is not None:
+            self._pending_disasters.append(disaster)
+        if self.event_log is not None:
+            self.event_log.append_json(DISASTER, disaster)
+        return disaster
+        
+    async def ingest_reports(self, reports: List[Dict[str, Any]], wait: bool = True) -> List[Dict[str, str]]:
+        """Dedupe, assign IDs to and queue a batch of validated disaster reports
+
+        The whole batch is handed to the classifiers as a single task, so the
+        dispatcher is touched once per batch rather than once per report.
+        Returns {"id", "status"} per report, where status is "accepted" or
+        "duplicate" (with the ID of the original report).
+
+        Agents forwarding reports from inside a dispatcher worker must pass
+        wait=False: a worker waiting for queue space that only workers can
+        free would deadlock the pool. If the queue is full the batch is then
+        dropped instead, with status "dropped", and left out of the dedupe
+        window so a resend is accepted.
+        """
+        received_at = datetime.utcnow().isoformat()
+        results = []
+        accepted = []
+        accepted_keys = []
+        for report in reports:
+            key = report_content_key(report)
+            existing_id = self._report_keys.get(key)
+            if existing_id is not None:
+                results.append({"id": existing_id, "status": "duplicate"})
+                continue
+            report_id = f"R{uuid.uuid4().hex[:12]}"
+            self._report_keys[key] = report_id
+            accepted_keys.append(key)
+            accepted.append({**report, "id": report_id, "received_at": received_at})
+            results.append({"id": report_id, "status": "accepted"})
+        
+        if accepted:
+            severity = min(
+                (r.get("severity", "medium") for r in accepted),
+                key=lambda s: SEVERITY_PRIORITY.get(s, SEVERITY_PRIORITY["medium"])
+            )
+            task = {
+                "agent_type": "classifier",
+                "action": "classify_reports",
+                "reports": accepted,
+                "severity": severity
+            }
+            if wait:
+                await self.submit_task(task)
+            else:
+                try:
+                    self.submit_task_nowait(task)
+                except asyncio.QueueFull:
+                    self._drop_reports(accepted, accepted_keys, results)
+                    accepted, accepted_keys = [], []
+        duplicates = sum(1 for result in results if result["status"] == "duplicate")
+        
+        while len(self._report_keys) > settings.report_dedupe_window:
+            self._report_keys.popitem(last=False)
+        self.reports_duplicate += duplicates
+        REPORTS_INGESTED.labels("accepted").inc(len(accepted))
+        REPORTS_INGESTED.labels("duplicate").inc(duplicates)
+        
+        if accepted:
+            self.reports.extend(accepted)
+            self.reports_ingested += len(accepted)
+            if self.event_log is not None:
+                self.event_log.append_json(REPORTS, {
+                    "reports": accepted,
+                    "keys": accepted_keys,
+                    "duplicates": duplicates
+                })
+        return results
+        
+    def _drop_reports(self, accepted: List[Dict[str, Any]], keys: List[str], results: List[Dict[str, str]]):
+        """Forget a batch that could not be queued, marking its results (and repeats within it) dropped"""
+        for key in keys:
+            self._report_keys.pop(key, None)
+        dropped_ids = {report["id"] for report in accepted}
+        dropped = 0
+        for result in results:
+            if result["id"] in dropped_ids:
+                result["status"] = "dropped"
+                dropped += 1
+        self.reports_dropped += dropped
+        REPORTS_INGESTED.labels("dropped").inc(dropped)
+        logger.warning(f"Task queue full; dropped {dropped} forwarded reports")
+        
+    async def attach_shared_state(self, shared_state, sync_interval: float = 0.5):
+        """Share agent state and disasters with other workers through Redis"""
+        self.shared_state = shared_state
+        self.state.dirty[:] = False
+        await self.sync_shared_state()
+        self._sync_task = create_task(self._shared_state_loop(sync_interval))
+        logger.info("Shared swarm state enabled")
+        
+    async def detach_shared_state(self):
+        """Flush pending changes and stop syncing with shared state"""
+        if self._sync_task:
+            self._sync_task.cancel()
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+            self._sync_task = None
+        if self.shared_state is not None:
+            await self.sync_shared_state()
+            self.shared_state = None
+        
+    async def sync_shared_state(self):
+        """Push local changes in one pipeline, then pull other workers' changes"""
+        shared = self.shared_state
+        agent_ids = self.state.take_dirty()
+        disasters, self._pending_disasters = self._pending_disasters, []
+        if agent_ids.size or disasters:
+            try:
+                await shared.write(agent_ids, self.state.status[agent_ids], disasters)
+            except Exception:
+                # Retry on the next sync
+                self.state.dirty[agent_ids] = True
+                self._pending_disasters = disasters + self._pending_disasters
+                raise
+        
+        if await shared.get_version() == self._shared_version:
+            return
+        version, codes, active_disasters = await shared.read()
+        self.state.load_codes(codes)
+        self.active_disasters = sorted(
+            active_disasters + self._pending_disasters, key=lambda d: d["timestamp"]
+        )
+        self.disaster_index.clear()
+        for disaster in self.active_disasters:
+            self._index_disaster(disaster)
+        self._shared_version = version
+        
+    async def _shared_state_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sync_shared_state()
+            except Exception as e:
+                logger.error(f"Error syncing shared swarm state: {e}")
+        
+    async def attach_event_log(self, event_log: EventLog, snapshot_interval: float = 300.0):
+        """Restore state from an event log, then log every change to it
+
+        Status changes are captured from the state versions once per
+        flush interval, as one record of the agents changed since the last
+        capture, so marking agents costs nothing extra on the hot path.
+        """
+        # Replayed status codes are collected here and applied as one change
+        self._restored_codes = self.state.status.copy()
+        summary = event_log.load(self._restore_snapshot, self._replay_event)
+        # Tasks don't survive a restart, so agents caught mid-task come back idle
+        processing = self._restored_codes == STATUS_CODES["processing"]
+        self._restored_codes[processing] = STATUS_CODES["active"]
+        self.state.load_codes(self._restored_codes[1:], keep_local=False)
+        self._restored_codes = None
+        self.event_log = event_log
+        self._logged_version = self.state_version
+        event_log.start()
+        self._event_log_task = create_task(self._event_log_loop(snapshot_interval))
+        logger.info(
+            f"Event log restored {summary['replayed_records']} records after snapshot "
+            f"{summary['snapshot_seq']} in {summary['seconds']}s"
+        )
+        return summary
+        
+    async def detach_event_log(self):
+        """Log pending status changes, write a final snapshot and close the log"""
+        if self._event_log_task:
+            self._event_log_task.cancel()
+            await asyncio.gather(self._event_log_task, return_exceptions=True)
+            self._event_log_task = None
+        if self.event_log is not None:
+            self._log_status_changes()
+            await self.snapshot_event_log()
+            await self.event_log.close()
+            self.event_log = None
+        
+    def _log_status_changes(self):
+        version = self.state_version
+        if version == self._logged_version:
+            return
+        agent_ids = self.state.changed_since(self._logged_version)
+        self.event_log.append_status(agent_ids, self.state.status[agent_ids])
+        self._logged_version = version
+        
+    async def snapshot_event_log(self):
+        """Write the current state to the event log as a snapshot"""
+        self._log_status_changes()
+        await self.event_log.snapshot(self.state.status[1:].copy(), {
+            "active_disasters": list(self.active_disasters),
+            "reports": list(self.reports),
+            "report_keys": list(self._report_keys.items()),
+            "reports_ingested": self.reports_ingested,
+            "reports_duplicate": self.reports_duplicate,
+        })
+        
+    async def _event_log_loop(self, snapshot_interval: float):
+        last_snapshot = asyncio.get_running_loop().time()
+        while True:
+            await asyncio.sleep(self.event_log.flush_interval)
+            try:
+                self._log_status_changes()
+                now = asyncio.get_running_loop().time()
+                if now - last_snapshot >= snapshot_interval:
+                    last_snapshot = now
+                    await self.snapshot_event_log()
+            except Exception as e:
+                logger.error(f"Error writing event log: {e}")
+        
+    def _restore_snapshot(self, seq: int, codes: np.ndarray, meta: Dict[str, Any]):
+        count = min(codes.size, self.max_agents)
+        self._restored_codes[1:count + 1] = codes[:count]
+        self.active_disasters = meta["active_disasters"]
+        self.disaster_index.clear()
+        for disaster in self.active_disasters:
+            self._index_disaster(disaster)
+        self.reports.clear()
+        self.reports.extend(meta["reports"])
+        self._report_keys = OrderedDict(meta["report_keys"])
+        self.reports_ingested = meta["reports_ingested"]
+        self.reports_duplicate = meta["reports_duplicate"]
+        
+    def _replay_event(self, record_type: int, payload: memoryview):
+        if record_type == STATUS:
+            agent_ids, codes = decode_status(payload)
+            keep = agent_ids <= self.max_agents
+            self._restored_codes[agent_ids[keep]] = codes[keep]
+        elif record_type == DISASTER:
+            disaster = decode_json(payload)
+            self.active_disasters.append(disaster)
+            self._index_disaster(disaster)
+        elif record_type == REPORTS:
+            batch = decode_json(payload)
+            self.reports.extend(batch["reports"])
+            self._report_keys.update(zip(batch["keys"], (r["id"] for r in batch["reports"])))
+            while len(self._report_keys) > settings.report_dedupe_window:
+                self._report_keys.popitem(last=False)
+            self.reports_ingested += len(batch["reports"])
+            self.reports_duplicate += batch["duplicates"]
+        
+    async def submit_task(self, task: Dict[str, Any]) -> asyncio.Future:
+        """Queue a task for the dispatcher; waits while the task queue is full"""
+        if task.get("agent_type") not in self.registry:
+            raise ValueError(f"Unknown agent type: {task.get('agent_type')}")
+        return await self.dispatcher.submit(task)
+        
+    def submit_task_nowait(self, task: Dict[str, Any]) -> asyncio.Future:
+        """Queue a task for the dispatcher, raising asyncio.QueueFull instead of waiting
+
+        For code running inside a dispatcher worker, which must never wait on the queue.
+        """
+        if task.get("agent_type") not in self.registry:
+            raise ValueError(f"Unknown agent type: {task.get('agent_type')}")
+        return self.dispatcher.submit_nowait(task)
+        
+    async def _acquire_agent(self, task: Dict[str, Any]) -> BaseAgent:
+        """Pick an idle agent of the task's type, preferring already active ones"""
+        agent_type = task["agent_type"]
+        agent_id = self._find_idle_agent(agent_type)
+        if agent_id is None:
+            raise RuntimeError(f"No idle {agent_type} agents")
+        
+        self._busy_agents.add(agent_id)
+        try:
+            agent = self.registry.get(agent_id, agent_type)
+            await self.registry.activate(agent)
+        except Exception:
+            self._busy_agents.discard(agent_id)
+            raise
+        
+        await agent.update_status(AgentStatus.PROCESSING, task)
+        self.state.set(agent_id, "processing")
+        return agent
+        
+    def _find_idle_agent(self, agent_type: str) -> Optional[int]:
+        """Find a non-busy agent of a type, trying active then standby agents first"""
+        first_id, statuses = self.state.type_slice(agent_type)
+        for status in ("active", "standby"):
+            for offset in np.flatnonzero(statuses == STATUS_CODES[status]).tolist():
+                if first_id + offset not in self._busy_agents:
+                    return first_id + offset
+        # Busy agents are bounded by the per-type concurrency limit
+        for agent_id in range(first_id, first_id + len(statuses)):
+            if agent_id not in self._busy_agents:
+                return agent_id
+        return None
+        
+    async def _release_agent(self, agent: BaseAgent, ok: bool):
+        """Return an agent to the active pool after a task"""
+        if ok:
+            agent.tasks_completed += 1
+        agent.current_task = None
+        await agent.update_status(AgentStatus.ACTIVE if ok else AgentStatus.ERROR)
+        self._busy_agents.discard(agent.agent_id)
+        self.state.set(agent.agent_id, "active" if ok else "error")
+        
+    def _select_agent_groups(
+        self, disaster_type: str, location: Optional[Dict[str, float]] = None
+    ) -> List[int]:
+        """Select the nearest available agents of each type the disaster type needs
+
+        Without a usable location, the lowest-ID available agents are used.
+        """
+        agent_types = DEPLOYMENT_PROFILES.get(disaster_type, DEFAULT_DEPLOYMENT_PROFILE)
+        per_type = settings.deploy_agents_per_type
+        point = parse_location(location)
+        status = self.state.status
+        
+        selected: List[int] = []
+        for agent_type in agent_types:
+            if point is None:
+                first_id, statuses = self.state.type_slice(agent_type)
+                available = np.flatnonzero(~np.isin(statuses, ACTIVE_CODES))[:per_type]
+                selected.extend((available + first_id).tolist())
+            else:
+                nearest = self.agent_index[agent_type].nearest(
+                    *point,
+                    k=per_type,
+                    radius_km=settings.deploy_radius_km or None,
+                    accept=lambda agent_id: status[agent_id] not in ACTIVE_CODES,
+                )
+                selected.extend(agent_id for _, agent_id in nearest)
+        return selected
+        
+    def _place_agents(self) -> np.ndarray:
+        """Assign each agent a fixed home position spread across the coverage region"""
+        min_lat, min_lng, max_lat, max_lng = settings.agent_region
+        rng = np.random.default_rng(0)
+        positions = np.zeros((self.max_agents + 1, 2))
+        positions[1:, 0] = rng.uniform(min_lat, max_lat, self.max_agents)
+        positions[1:, 1] = rng.uniform(min_lng, max_lng, self.max_agents)
+        return positions
+        
+    def _index_disaster(self, disaster: Dict[str, Any]):
+        point = parse_location(disaster.get("location"))
+        if point is not None:
+            self.disaster_index.insert(disaster["id"], *point)
+        
+    def agents_in_bbox(
+        self, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+        agent_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get agents whose home position is inside a bounding box"""
+        agent_types = [agent_type] if agent_type else list(self.agent_index)
+        agent_ids = sorted(
+            agent_id
+            for t in agent_types
+            for agent_id in self.agent_index[t].query_bbox(min_lat, min_lng, max_lat, max_lng)
+        )
+        cells = self.state.cells(agent_ids)
+        for cell in cells:
+            lat, lng = self.agent_positions[cell["id"]]
+            cell["location"] = {"lat": float(lat), "lng": float(lng)}
+        return cells
+        
+    def disasters_in_bbox(
+        self, min_lat: float, min_lng: float, max_lat: float, max_lng: float
+    ) -> List[Dict[str, Any]]:
+        """Get active disasters located inside a bounding box"""
+        ids = set(self.disaster_index.query_bbox(min_lat, min_lng, max_lat, max_lng))
+        return [d for d in self.active_disasters if d["id"] in ids]
             
     async def get_swarm_status(self) -> Dict[str, Any]:
-        """Get current status of all agents"""
-        active_count = sum(1 for status in self.agent_status.values() if status == "active")
+        """Get current status of all agents (shared snapshot; do not modify)"""
+        return self.status_snapshot().data
+        
+    def status_snapshot(self) -> StatusSnapshot:
+        """Get the status snapshot for the current state version, building it if the state changed"""
+        version = self.state_version
+        snapshot = self._status_snapshot
+        if snapshot is None or snapshot.version != version:
+            snapshot = self._status_snapshot = StatusSnapshot(version, {
+                **self._get_stats(),
+                "version": version,
+                "timestamp": datetime.utcnow().isoformat(),
+                "agent_grid": self._generate_grid_view()
+            }, f'"{self._etag_prefix}-{version}"')
+        return snapshot
         
+    def get_status_delta(self, since_version: Optional[int] = None) -> Dict[str, Any]:
+        """Get agents changed after since_version, or a full snapshot if it is unknown"""
+        # A version ahead of ours means the client saw a previous server process
+        full = since_version is None or since_version > self.state_version
+        if full:
+            agent_ids = np.arange(1, self.max_agents + 1)
+        else:
+            agent_ids = self.state.changed_since(since_version)
+        
+        stats = self._get_stats()
+        return {
+            "version": self.state_version,
+            "base_version": None if full else since_version,
+            "full": full,
+            "agents": self.state.cells(agent_ids),
+            "stats": {
+                "total": stats["total_agents"],
+                "active": stats["active"],
+                "standby": stats["standby"],
+            }
+        }
+        
+    def _get_stats(self) -> Dict[str, int]:
+        """Get total/active/standby agent counts"""
+        active_count = self.state.count_active()
         return {
             "total_agents": self.max_agents,
             "active": active_count,
             "standby": self.max_agents - active_count,
-            "timestamp": datetime.utcnow().isoformat(),
-            "agent_grid": self._generate_grid_view()
         }
         
+    def get_active_by_type(self) -> Dict[str, int]:
+        """Count deployed (active or processing) agents per agent type"""
+        return self.state.counts_by_type(("active", "processing"))
+        
     def _generate_grid_view(self) -> List[List[Dict]]:
-        """Generate 10x10 grid representation of agent status"""
-        grid = []
-        agent_id = 1
-        
-        for row in range(10):
-            row_data = []
-            for col in range(10):
-                row_data.append({
-                    "id": agent_id,
-                    "status": self.agent_status.get(agent_id, "offline"),
-                    "type": self._get_agent_type(agent_id)
-                })
-                agent_id += 1
-            grid.append(row_data)
-            
-        return grid
-        
-    def _get_agent_type(self, agent_id: int) -> str:
-        """Determine agent type based on ID"""
-        if 1 <= agent_id <= 10:
-            return "social"
-        elif 11 <= agent_id <= 20:
-            return "news"
-        elif 21 <= agent_id <= 30:
-            return "satellite"
-        elif 31 <= agent_id <= 40:
-            return "iot"
-        elif 41 <= agent_id <= 50:
-            return "classifier"
-        elif 51 <= agent_id <= 60:
-            return "resource"
-        elif 61 <= agent_id <= 70:
-            return "logistics"
-        elif 71 <= agent_id <= 75:
-            return "predictor"
-        elif 76 <= agent_id <= 85:
-            return "dashboard"
-        elif 86 <= agent_id <= 95:
-            return "reporter"
-        elif 96 <= agent_id <= 100:
-            return "alert"
-        return "unknown"
+        """Generate a square grid representation of agent status (10x10 for 100 agents)"""
+        width = math.ceil(math.sqrt(self.max_agents))
+        cells = self.state.cells(np.arange(1, self.max_agents + 1))
+        return [cells[row:row + width] for row in range(0, len(cells), width)]
+
+
+def report_content_key(report: Dict[str, Any]) -> str:
+    """Hash the content of a report that identifies it as a duplicate"""
+    location = report.get("location") or {}
+    content = [
+        str(report.get("type", "")).strip().lower(),
+        str(report.get("severity", "")).strip().lower(),
+        round(float(location.get("lat", 0)), 3),
+        round(float(location.get("lng", 0)), 3),
+        report.get("source"),
+        " ".join(str(report.get("description") or "").lower().split()),
+    ]
+    return hashlib.blake2b(json.dumps(content).encode(), digest_size=16).hexdigest()
 
 
 # Global orchestrator instance
-orchestrator = SwarmOrchestrator()
+orchestrator = SwarmOrchestrator(max_agents=settings.max_agents)
+TASK_QUEUE_DEPTH.set_function(lambda: orchestrator.dispatcher.pending)
+AGENTS_ACTIVE.set_function(lambda: orchestrator.state.count_active())
@@ -0,0 +1,202 @@
+"""Event-loop Lag Monitor, Stall Tracer and Sampling Profiler
+
+Everything in the backend shares one asyncio loop, so one blocking call
+stalls the broadcaster, WebSocket handlers and REST routes together:
+
+- LoopMonitor runs a task that sleeps a fixed interval and records how
+  late it wakes up (the loop lag), and a watchdog thread that notices
+  when that task is overdue by more than slow_threshold and captures
+  the loop thread's stack at that moment, i.e. the code that is blocking
+- SamplingProfiler samples thread stacks from a background thread for a
+  chosen window and returns them in collapsed ("frame;frame;frame count")
+  form for flamegraph tools
+
+Both read stacks with sys._current_frames() from their own thread, so
+nothing is added to the loop's hot path beyond one timer per interval.
+"""
+
+from typing import Any, Collection, Deque, Dict, Optional
+from collections import Counter, deque
+from pathlib import Path
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import numpy as np
+from app.core.config import settings
+from app.core.metrics import LOOP_LAG_SECONDS, LOOP_STALLS
+
+logger = logging.getLogger(__name__)
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).stem}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse_stack(frame, root: str = "") -> str:
+    """Outermost-first frame labels joined by ';', as used by flamegraph tools"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    if root:
+        labels.append(root)
+    return ";".join(reversed(labels))
+
+
+class LoopMonitor:
+    """Measures event-loop lag and captures the stack of whatever stalls the loop"""
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        slow_threshold: float = 0.25,
+        history: int = 600,
+        max_stalls: int = 50,
+    ):
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.lags: Deque[float] = deque(maxlen=history)  # Recent lag samples, in seconds
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=max_stalls)
+        self.max_lag = 0.0
+        self._expected_wake = 0.0
+        self._loop_thread: Optional[int] = None
+        self._current_stall: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        """Start sampling the running loop and watching it from a thread"""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._expected_wake = time.monotonic() + self.interval
+        self._stop.clear()
+        self._task = asyncio.create_task(self._sample_loop())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def _sample_loop(self):
+        while True:
+            self._expected_wake = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - self._expected_wake)
+            self.lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            LOOP_LAG_SECONDS.observe(lag)
+            stall = self._current_stall
+            if stall is not None:
+                # The stall the watchdog caught is over; record how long it really was
+                stall["stalled_ms"] = round(lag * 1000, 1)
+                self._current_stall = None
+
+    def _watch(self):
+        check_interval = min(self.interval, self.slow_threshold) / 2
+        while not self._stop.wait(check_interval):
+            expected_wake = self._expected_wake
+            overdue = time.monotonic() - expected_wake
+            if overdue < self.slow_threshold or self._current_stall is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            stall = {
+                "at": time.time(),
+                "overdue_ms": round(overdue * 1000, 1),
+                "stalled_ms": None,  # Filled in once the loop runs again
+                "stack": traceback.format_stack(frame) if frame is not None else [],
+            }
+            del frame
+            self._current_stall = stall
+            if self._expected_wake != expected_wake:
+                # The loop got going again while the stack was being captured
+                stall["stalled_ms"] = stall["overdue_ms"]
+                self._current_stall = None
+            self.stalls.append(stall)
+            LOOP_STALLS.inc()
+            logger.warning(
+                f"Event loop blocked for over {stall['overdue_ms']} ms in:\n{''.join(stall['stack'][-8:])}"
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        lags = np.fromiter(self.lags, dtype=np.float64)
+        percentiles = np.percentile(lags, [50, 99]) * 1000 if lags.size else (0.0, 0.0)
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "slow_threshold_ms": self.slow_threshold * 1000,
+            "lag_ms": {
+                "p50": round(float(percentiles[0]), 3),
+                "p99": round(float(percentiles[1]), 3),
+                "recent_max": round(float(lags.max()) * 1000, 3) if lags.size else 0.0,
+                "max": round(self.max_lag * 1000, 3),
+            },
+            "stalls": list(self.stalls),
+        }
+
+
+class SamplingProfiler:
+    """Samples thread stacks for a time window and counts collapsed stacks
+
+    Runs one profile at a time; sampling happens in a worker thread so
+    the loop being profiled keeps running normally.
+    """
+
+    def __init__(self, max_seconds: float = 60.0, min_interval: float = 0.001):
+        self.max_seconds = max_seconds
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def sample(
+        self, seconds: float, interval: float = 0.005, thread_ids: Optional[Collection[int]] = None
+    ) -> Counter:
+        """Collapsed stack -> sample count over `seconds`, for the given threads (all but this one by default)"""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            seconds = min(seconds, self.max_seconds)
+            interval = max(interval, self.min_interval)
+            me = threading.get_ident()
+            counts: Counter = Counter()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == me or thread_ids is not None and thread_id not in thread_ids:
+                        continue
+                    counts[collapse_stack(frame, names.get(thread_id, str(thread_id)))] += 1
+                frame = None  # Don't keep the last sampled frame alive while sleeping
+                time.sleep(interval)
+            return counts
+        finally:
+            self._lock.release()
+
+    async def profile(self, seconds: float, interval: float = 0.005, all_threads: bool = False) -> str:
+        """Profile the loop thread (or every thread) and return collapsed stacks, most sampled first"""
+        thread_ids = None if all_threads else {threading.get_ident()}
+        counts = await asyncio.to_thread(self.sample, seconds, interval, thread_ids)
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+loop_monitor = LoopMonitor(interval=settings.loop_lag_interval, slow_threshold=settings.loop_slow_threshold)
+profiler = SamplingProfiler(max_seconds=settings.profile_max_seconds)
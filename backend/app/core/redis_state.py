@@ -0,0 +1,110 @@
+"""Redis-backed Shared Swarm State and Broadcast Bus
+
+Lets several uvicorn workers share one view of the swarm:
+
+- Agent status codes are one Redis string, one byte per agent ID, updated
+  with pipelined SETRANGE calls (one per contiguous run of changed agents)
+- Active disasters are a Redis hash of disaster ID -> JSON
+- A shared version counter is bumped on every write so workers only re-read
+  state that actually changed
+- Broadcast events travel over pub/sub so any worker can serve any client
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import json
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class RedisSwarmState:
+    """Shared agent state, active disasters and broadcast channel in Redis
+
+    Takes any redis.asyncio-compatible client, so tests can pass a
+    fakeredis.aioredis.FakeRedis instance instead of a live server.
+    """
+
+    def __init__(self, client, prefix: str = "resiliencegrid"):
+        self.client = client
+        self.status_key = f"{prefix}:agents:status"
+        self.version_key = f"{prefix}:version"
+        self.disasters_key = f"{prefix}:disasters"
+        self.channel = f"{prefix}:broadcast"
+
+    @classmethod
+    def from_settings(cls, settings) -> "RedisSwarmState":
+        """Connect using the redis_* application settings"""
+        import redis.asyncio as redis
+
+        client = redis.Redis(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            db=settings.redis_db,
+        )
+        return cls(client, prefix=settings.redis_key_prefix)
+
+    async def write(
+        self,
+        agent_ids: np.ndarray,
+        codes: np.ndarray,
+        disasters: Optional[List[Dict[str, Any]]] = None,
+    ) -> int:
+        """Write changed status codes and new disasters in one pipeline; returns the new version"""
+        agent_ids = np.asarray(agent_ids, dtype=np.int64)
+        codes = np.asarray(codes, dtype=np.uint8)
+
+        pipe = self.client.pipeline(transaction=True)
+        if agent_ids.size:
+            # One SETRANGE per run of consecutive agent IDs
+            breaks = np.flatnonzero(np.diff(agent_ids) != 1) + 1
+            for run_ids, run_codes in zip(np.split(agent_ids, breaks), np.split(codes, breaks)):
+                pipe.setrange(self.status_key, int(run_ids[0]), run_codes.tobytes())
+        if disasters:
+            pipe.hset(
+                self.disasters_key,
+                mapping={d["id"]: json.dumps(d) for d in disasters},
+            )
+        pipe.incr(self.version_key)
+        results = await pipe.execute()
+        return int(results[-1])
+
+    async def get_version(self) -> int:
+        """Get the shared state version"""
+        version = await self.client.get(self.version_key)
+        return int(version or 0)
+
+    async def read(self) -> Tuple[int, np.ndarray, List[Dict[str, Any]]]:
+        """Read (version, status codes for IDs 1..N, active disasters) in one round-trip"""
+        pipe = self.client.pipeline(transaction=True)
+        pipe.get(self.version_key)
+        pipe.get(self.status_key)
+        pipe.hvals(self.disasters_key)
+        version, status, disasters = await pipe.execute()
+
+        codes = np.frombuffer(status or b"\0", dtype=np.uint8)[1:]
+        return int(version or 0), codes, [json.loads(d) for d in disasters]
+
+    async def publish(self, payload: str):
+        """Publish a serialized broadcast message to all workers"""
+        await self.client.publish(self.channel, payload)
+
+    async def listen(self, handler: Callable[[str], Awaitable[None]]):
+        """Deliver every message published on the broadcast channel to handler"""
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                data = message["data"]
+                try:
+                    await handler(data.decode() if isinstance(data, bytes) else data)
+                except Exception as e:
+                    logger.error(f"Error handling broadcast from Redis: {e}")
+        finally:
+            await pubsub.unsubscribe(self.channel)
+            await pubsub.aclose()
+
+    async def close(self):
+        await self.client.aclose()
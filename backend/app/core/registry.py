@@ -0,0 +1,143 @@
+"""Lazy Agent Registry with Bounded Concurrent Initialization"""
+
+from typing import Any, Dict, Iterable, List, Type
+import asyncio
+import importlib
+import logging
+import sys
+import time
+from app.agents.base import AgentStatus, BaseAgent
+
+logger = logging.getLogger(__name__)
+
+# Agent type -> "module:Class"; modules are imported on first use
+AGENT_REGISTRY = {
+    "social": "app.agents.social:SocialMediaAgent",
+    "news": "app.agents.news:NewsAgent",
+    "satellite": "app.agents.satellite:SatelliteAgent",
+    "iot": "app.agents.iot:IoTAgent",
+    "classifier": "app.agents.classifier:ClassifierAgent",
+    "resource": "app.agents.resource:ResourceAgent",
+    "logistics": "app.agents.logistics:LogisticsAgent",
+    "predictor": "app.agents.predictor:PredictorAgent",
+    "dashboard": "app.agents.dashboard:DashboardAgent",
+    "reporter": "app.agents.reporter:ReporterAgent",
+    "alert": "app.agents.alert:AlertAgent",
+}
+
+
+class AgentRegistry:
+    """Creates agents on first activation, importing their modules only when needed
+
+    Each agent class's initialize_shared() runs once per process, before
+    its first agent initializes, and concurrent activations wait for that
+    single run. Agent initialization itself runs at most init_concurrency
+    at a time, so a burst of deployments cannot open every connection or
+    load every model at once.
+    """
+
+    def __init__(self, specs: Dict[str, str], init_concurrency: int = 8):
+        self.specs = dict(specs)
+        self.agents: Dict[int, BaseAgent] = {}
+        self.init_concurrency = init_concurrency
+        self._classes: Dict[str, Type[BaseAgent]] = {}
+        self._shared: Dict[Type[BaseAgent], asyncio.Task] = {}
+        self._slots = asyncio.Semaphore(init_concurrency)
+        self.stats = {
+            "imports": 0, "import_seconds": 0.0, "shared_inits": 0, "shared_seconds": 0.0,
+            "initialized": 0, "init_seconds": 0.0, "init_failures": 0
+        }
+
+    def __contains__(self, agent_type: str) -> bool:
+        return agent_type in self.specs
+
+    def agent_class(self, agent_type: str) -> Type[BaseAgent]:
+        """The class for an agent type, importing its module the first time"""
+        cls = self._classes.get(agent_type)
+        if cls is None:
+            spec = self.specs.get(agent_type)
+            if spec is None:
+                raise ValueError(f"Unknown agent type: {agent_type}")
+            module_name, class_name = spec.split(":")
+            started = time.perf_counter()
+            cls = self._classes[agent_type] = getattr(importlib.import_module(module_name), class_name)
+            self.stats["imports"] += 1
+            self.stats["import_seconds"] += time.perf_counter() - started
+        return cls
+
+    def get(self, agent_id: int, agent_type: str) -> BaseAgent:
+        """The agent with this ID, created (not yet initialized) on first use"""
+        agent = self.agents.get(agent_id)
+        if agent is None:
+            agent = self.agents[agent_id] = self.agent_class(agent_type)(agent_id)
+        return agent
+
+    async def activate(self, agent: BaseAgent):
+        """Activate a standby agent, initializing its class's shared resources first if needed"""
+        if agent.status != AgentStatus.STANDBY:
+            return
+        await self.initialize_shared(type(agent))
+        async with self._slots:
+            started = time.perf_counter()
+            try:
+                await agent.activate()
+            except Exception:
+                self.stats["init_failures"] += 1
+                raise
+            self.stats["initialized"] += 1
+            self.stats["init_seconds"] += time.perf_counter() - started
+
+    async def initialize_shared(self, cls: Type[BaseAgent]):
+        """Run cls.initialize_shared() once; concurrent callers share the one run"""
+        task = self._shared.get(cls)
+        if task is None:
+            task = self._shared[cls] = asyncio.create_task(self._run_shared(cls))
+        try:
+            await asyncio.shield(task)
+        except Exception:
+            # Let the next activation try again
+            if self._shared.get(cls) is task:
+                del self._shared[cls]
+            raise
+
+    async def _run_shared(self, cls: Type[BaseAgent]):
+        async with self._slots:
+            started = time.perf_counter()
+            await cls.initialize_shared()
+            self.stats["shared_inits"] += 1
+            self.stats["shared_seconds"] += time.perf_counter() - started
+
+    async def preload(self, agent_types: Iterable[str]):
+        """Import and initialize the shared resources of agent types concurrently, ahead of first use"""
+        classes = {self.agent_class(agent_type) for agent_type in agent_types}
+        results = await asyncio.gather(*(self.initialize_shared(cls) for cls in classes), return_exceptions=True)
+        for cls, result in zip(classes, results):
+            if isinstance(result, Exception):
+                logger.error(f"Preloading {cls.__name__} failed: {result}")
+
+    async def shutdown(self):
+        """Release shared resources of every agent class whose module has been imported"""
+        classes: List[Type[BaseAgent]] = []
+        for spec in self.specs.values():
+            module_name, class_name = spec.split(":")
+            module = sys.modules.get(module_name)
+            cls = getattr(module, class_name, None) if module is not None else None
+            if cls is not None and cls not in classes:
+                classes.append(cls)
+        for cls in classes:
+            try:
+                await cls.shutdown_shared()
+            except Exception as e:
+                logger.error(f"Shutting down {cls.__name__} failed: {e}")
+        self._shared.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        initialized = self.stats["initialized"]
+        return {
+            "agent_types": len(self.specs),
+            "loaded_types": sorted(self._classes),
+            "agents_created": len(self.agents),
+            **{k: round(v, 4) if isinstance(v, float) else v for k, v in self.stats.items()},
+            "avg_init_ms": round(self.stats["init_seconds"] / initialized * 1000, 3) if initialized else 0.0,
+            "init_concurrency": self.init_concurrency,
+        }
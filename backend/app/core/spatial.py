@@ -0,0 +1,259 @@
+"""Spatial Index for Agents and Disasters
+
+A uniform lat/lng grid (geohash-style cells) mapping each cell to the IDs
+inside it. Bounding-box queries only visit the cells the box covers, and
+k-nearest queries expand ring by ring from the query cell, so lookups stay
+proportional to the local density rather than the total number of items.
+BoxIndex is the inverse, for finding the stored boxes that contain a point.
+"""
+
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in km"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_location(location: Optional[Dict[str, float]]) -> Optional[Tuple[float, float]]:
+    """Get (lat, lng) from a {"lat": ..., "lng": ...} dict, or None if incomplete"""
+    if not location:
+        return None
+    try:
+        return float(location["lat"]), float(location["lng"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class GridIndex:
+    """Grid of lat/lng cells mapping to the IDs positioned in them"""
+
+    def __init__(self, cell_deg: float = 1.0):
+        self.cell_deg = cell_deg
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._positions: Dict[Hashable, Tuple[float, float]] = {}
+        # Bounds of cells ever occupied (min row, max row, min col, max col)
+        self._bounds: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self._positions
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def insert(self, item_id: Hashable, lat: float, lng: float):
+        """Add an item, or move it if already indexed"""
+        if item_id in self._positions:
+            self.remove(item_id)
+        self._positions[item_id] = (lat, lng)
+        i, j = self._cell(lat, lng)
+        self._cells.setdefault((i, j), set()).add(item_id)
+        if self._bounds is None:
+            self._bounds = [i, i, j, j]
+        else:
+            b = self._bounds
+            b[0], b[1], b[2], b[3] = min(b[0], i), max(b[1], i), min(b[2], j), max(b[3], j)
+
+    def remove(self, item_id: Hashable):
+        """Remove an item if indexed"""
+        position = self._positions.pop(item_id, None)
+        if position is None:
+            return
+        cell = self._cell(*position)
+        members = self._cells[cell]
+        members.discard(item_id)
+        if not members:
+            del self._cells[cell]
+
+    def clear(self):
+        self._cells.clear()
+        self._positions.clear()
+        self._bounds = None
+
+    def position(self, item_id: Hashable) -> Optional[Tuple[float, float]]:
+        return self._positions.get(item_id)
+
+    def query_bbox(
+        self, min_lat: float, min_lng: float, max_lat: float, max_lng: float
+    ) -> List[Hashable]:
+        """Get IDs inside a bounding box"""
+        min_i, min_j = self._cell(min_lat, min_lng)
+        max_i, max_j = self._cell(max_lat, max_lng)
+        if max_i < min_i or max_j < min_j:
+            return []
+
+        # Walk whichever is smaller: the cells covered by the box or the occupied cells
+        covered = (max_i - min_i + 1) * (max_j - min_j + 1)
+        if covered <= len(self._cells):
+            cells: Iterable = (
+                (i, j) for i in range(min_i, max_i + 1) for j in range(min_j, max_j + 1)
+            )
+        else:
+            cells = [
+                c for c in self._cells if min_i <= c[0] <= max_i and min_j <= c[1] <= max_j
+            ]
+
+        result = []
+        for cell in cells:
+            for item_id in self._cells.get(cell, ()):
+                lat, lng = self._positions[item_id]
+                if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+                    result.append(item_id)
+        return result
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int,
+        radius_km: Optional[float] = None,
+        accept: Optional[Callable[[Hashable], bool]] = None,
+    ) -> List[Tuple[float, Hashable]]:
+        """Get up to k (distance_km, id) pairs nearest to a point, closest first
+
+        Only IDs for which accept(id) is true are returned. Rings of cells are
+        visited outward until k matches are found and no unvisited cell can
+        hold a closer one, or the search radius is exhausted.
+        """
+        if k <= 0 or not self._cells:
+            return []
+
+        ci, cj = self._cell(lat, lng)
+        min_i, max_i, min_j, max_j = self._bounds
+        max_ring = max(abs(min_i - ci), abs(max_i - ci), abs(min_j - cj), abs(max_j - cj))
+
+        found: List[Tuple[float, Hashable]] = []
+        for ring in range(max_ring + 1):
+            if 8 * ring > len(self._cells):
+                # Fewer occupied cells than this ring holds: scan the rest of them directly
+                cells: Iterable = (
+                    c for c in self._cells if max(abs(c[0] - ci), abs(c[1] - cj)) >= ring
+                )
+            else:
+                cells = self._ring_cells(ci, cj, ring)
+            for cell in cells:
+                for item_id in self._cells.get(cell, ()):
+                    if accept is not None and not accept(item_id):
+                        continue
+                    distance = haversine_km(lat, lng, *self._positions[item_id])
+                    if radius_km is None or distance <= radius_km:
+                        found.append((distance, item_id))
+            if 8 * ring > len(self._cells):
+                break
+
+            # Anything in a ring further out is at least this far away
+            min_beyond = self._ring_distance_km(lat, ring)
+            if radius_km is not None and min_beyond > radius_km:
+                break
+            if len(found) >= k:
+                found.sort(key=lambda f: f[0])
+                if found[k - 1][0] <= min_beyond:
+                    break
+
+        found.sort(key=lambda f: f[0])
+        return found[:k]
+
+    def _ring_distance_km(self, lat: float, ring: int) -> float:
+        """Lower bound on the distance from a point to any cell beyond a ring"""
+        # Longitude cells are narrowest at the highest latitude the ring reaches
+        edge_lat = min(89.9, abs(lat) + (ring + 1) * self.cell_deg)
+        return ring * self.cell_deg * KM_PER_DEGREE * math.cos(math.radians(edge_lat))
+
+    @staticmethod
+    def _ring_cells(ci: int, cj: int, ring: int) -> Iterable[Tuple[int, int]]:
+        if ring == 0:
+            yield ci, cj
+            return
+        for j in range(cj - ring, cj + ring + 1):
+            yield ci - ring, j
+            yield ci + ring, j
+        for i in range(ci - ring + 1, ci + ring):
+            yield i, cj - ring
+            yield i, cj + ring
+
+
+class BoxIndex:
+    """Grid of lat/lng cells mapping to the IDs of boxes that overlap them
+
+    The inverse of GridIndex: items are bounding boxes and queries are
+    points. A point query only looks at the boxes registered in its cell.
+    Boxes covering more than max_cells cells (whole continents at a fine
+    cell size) are kept in a short list checked on every query instead.
+    """
+
+    def __init__(self, cell_deg: float = 1.0, max_cells: int = 4096):
+        self.cell_deg = cell_deg
+        self.max_cells = max_cells
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._boxes: Dict[Hashable, Tuple[float, float, float, float]] = {}
+        self._large: Set[Hashable] = set()
+
+    def __len__(self) -> int:
+        return len(self._boxes)
+
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self._boxes
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def _covered(self, box: Tuple[float, float, float, float]) -> Optional[Iterable[Tuple[int, int]]]:
+        """Cells a box overlaps, or None if there are more than max_cells"""
+        min_i, min_j = self._cell(box[0], box[1])
+        max_i, max_j = self._cell(box[2], box[3])
+        if (max_i - min_i + 1) * (max_j - min_j + 1) > self.max_cells:
+            return None
+        return ((i, j) for i in range(min_i, max_i + 1) for j in range(min_j, max_j + 1))
+
+    def insert(self, item_id: Hashable, min_lat: float, min_lng: float, max_lat: float, max_lng: float):
+        """Add a box, or replace it if already indexed"""
+        if min_lat > max_lat or min_lng > max_lng:
+            raise ValueError("Bounding box minimums must not exceed its maximums")
+        if item_id in self._boxes:
+            self.remove(item_id)
+        box = self._boxes[item_id] = (min_lat, min_lng, max_lat, max_lng)
+        cells = self._covered(box)
+        if cells is None:
+            self._large.add(item_id)
+            return
+        for cell in cells:
+            self._cells.setdefault(cell, set()).add(item_id)
+
+    def remove(self, item_id: Hashable):
+        """Remove a box if indexed"""
+        box = self._boxes.pop(item_id, None)
+        if box is None:
+            return
+        if item_id in self._large:
+            self._large.discard(item_id)
+            return
+        for cell in self._covered(box):
+            members = self._cells[cell]
+            members.discard(item_id)
+            if not members:
+                del self._cells[cell]
+
+    def clear(self):
+        self._cells.clear()
+        self._boxes.clear()
+        self._large.clear()
+
+    def query_point(self, lat: float, lng: float) -> List[Hashable]:
+        """Get IDs of boxes containing a point"""
+        result = []
+        for item_id in (*self._cells.get(self._cell(lat, lng), ()), *self._large):
+            min_lat, min_lng, max_lat, max_lng = self._boxes[item_id]
+            if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+                result.append(item_id)
+        return result
@@ -0,0 +1,180 @@
+"""Columnar Agent State Store
+
+Agent status and type are kept as small-integer codes in contiguous NumPy
+arrays indexed by agent ID, so counts and change scans are vectorized and
+type lookups are O(1) array reads instead of per-agent dict walks.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+# Status codes are indexes into this tuple; 0 must stay "offline" (never initialized)
+STATUSES = ("offline", "standby", "active", "processing", "alert", "error")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Agent types in ID order, with their share of a 100-agent swarm
+AGENT_TYPE_SHARES = (
+    ("social", 10),
+    ("news", 10),
+    ("satellite", 10),
+    ("iot", 10),
+    ("classifier", 10),
+    ("resource", 10),
+    ("logistics", 10),
+    ("predictor", 5),
+    ("dashboard", 10),
+    ("reporter", 10),
+    ("alert", 5),
+)
+AGENT_TYPES = tuple(agent_type for agent_type, _ in AGENT_TYPE_SHARES)
+AGENT_TYPE_CODES = {agent_type: code for code, agent_type in enumerate(AGENT_TYPES)}
+
+# Statuses that count as deployed
+ACTIVE_CODES = (STATUS_CODES["active"], STATUS_CODES["processing"])
+
+
+def compute_type_ranges(max_agents: int) -> Dict[str, Tuple[int, int]]:
+    """Split agent IDs 1..max_agents into contiguous per-type ranges by share
+
+    Uses largest-remainder apportionment, so 100 agents reproduce the original
+    layout (social 1-10 ... alert 96-100) exactly.
+    """
+    total_share = sum(share for _, share in AGENT_TYPE_SHARES)
+    quotas = [share * max_agents / total_share for _, share in AGENT_TYPE_SHARES]
+    counts = [int(q) for q in quotas]
+    by_remainder = sorted(range(len(quotas)), key=lambda i: counts[i] - quotas[i])
+    for i in by_remainder[:max_agents - sum(counts)]:
+        counts[i] += 1
+
+    ranges = {}
+    next_id = 1
+    for (agent_type, _), count in zip(AGENT_TYPE_SHARES, counts):
+        ranges[agent_type] = (next_id, next_id + count - 1)
+        next_id += count
+    return ranges
+
+
+class AgentStateStore:
+    """Status/type codes and change versions for agents 1..size
+
+    Arrays are indexed directly by agent ID; slot 0 is unused.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.version = 0
+        self.status = np.zeros(size + 1, dtype=np.uint8)
+        self.types = np.zeros(size + 1, dtype=np.uint8)
+        # Version at which each agent's status last changed
+        self.changed_at = np.zeros(size + 1, dtype=np.int64)
+        # Agents changed locally but not yet written to shared state
+        self.dirty = np.zeros(size + 1, dtype=bool)
+
+        self.type_ranges = compute_type_ranges(size)
+        for agent_type, (first_id, last_id) in self.type_ranges.items():
+            self.types[first_id:last_id + 1] = AGENT_TYPE_CODES[agent_type]
+
+    def __contains__(self, agent_id: int) -> bool:
+        return 1 <= agent_id <= self.size
+
+    def type_of(self, agent_id: int) -> str:
+        """Get an agent's type"""
+        if agent_id not in self:
+            return "unknown"
+        return AGENT_TYPES[self.types[agent_id]]
+
+    def types_of(self, agent_ids) -> List[str]:
+        """Get the distinct types of the given agents, in ID order of type"""
+        ids = np.asarray(agent_ids, dtype=np.int64)
+        return [AGENT_TYPES[code] for code in np.unique(self.types[ids]).tolist()]
+
+    def get(self, agent_id: int) -> str:
+        """Get an agent's status"""
+        if agent_id not in self:
+            return "offline"
+        return STATUSES[self.status[agent_id]]
+
+    def set(self, agent_id: int, status: str) -> bool:
+        """Set one agent's status, bumping the version if it changed"""
+        code = STATUS_CODES[status]
+        if self.status[agent_id] == code:
+            return False
+        self.version += 1
+        self.status[agent_id] = code
+        self.changed_at[agent_id] = self.version
+        self.dirty[agent_id] = True
+        return True
+
+    def set_many(self, agent_ids, status: str) -> int:
+        """Set many agents' status in one vectorized update; returns the number changed"""
+        ids = np.asarray(agent_ids, dtype=np.int64)
+        code = STATUS_CODES[status]
+        changed = ids[self.status[ids] != code]
+        if changed.size:
+            self.version += 1
+            self.status[changed] = code
+            self.changed_at[changed] = self.version
+            self.dirty[changed] = True
+        return int(changed.size)
+
+    def set_all(self, status: str) -> int:
+        """Set every agent's status; returns the number changed"""
+        return self.set_many(np.arange(1, self.size + 1), status)
+
+    def take_dirty(self) -> np.ndarray:
+        """Get and clear the IDs of agents changed locally since the last call"""
+        ids = np.flatnonzero(self.dirty)
+        self.dirty[ids] = False
+        return ids
+
+    def load_codes(self, codes: np.ndarray, keep_local: bool = True) -> int:
+        """Apply status codes for IDs 1..len(codes) from shared state
+
+        Agents with unsynced local changes keep their local status unless
+        keep_local is False. Returns the number of agents that changed.
+        """
+        codes = np.asarray(codes, dtype=np.uint8)[:self.size]
+        ids = np.arange(1, codes.size + 1)
+        differs = self.status[ids] != codes
+        changed = ids[differs & ~self.dirty[ids] if keep_local else differs]
+        if changed.size:
+            self.version += 1
+            self.status[changed] = codes[changed - 1]
+            self.changed_at[changed] = self.version
+        return int(changed.size)
+
+    def type_slice(self, agent_type: str) -> Tuple[int, np.ndarray]:
+        """Get (first ID, status codes view) for one agent type"""
+        first_id, last_id = self.type_ranges[agent_type]
+        return first_id, self.status[first_id:last_id + 1]
+
+    def count(self, statuses: Iterable[str]) -> int:
+        """Count agents in any of the given statuses"""
+        codes = [STATUS_CODES[s] for s in statuses]
+        return int(np.count_nonzero(np.isin(self.status[1:], codes)))
+
+    def count_active(self) -> int:
+        return int(np.count_nonzero(np.isin(self.status[1:], ACTIVE_CODES)))
+
+    def counts_by_type(self, statuses: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Count agents per type, optionally only those in the given statuses"""
+        types = self.types[1:]
+        if statuses is not None:
+            codes = [STATUS_CODES[s] for s in statuses]
+            types = types[np.isin(self.status[1:], codes)]
+        counts = np.bincount(types, minlength=len(AGENT_TYPES))
+        return {agent_type: int(counts[code]) for code, agent_type in enumerate(AGENT_TYPES)}
+
+    def changed_since(self, version: int) -> np.ndarray:
+        """Get IDs of agents whose status changed after version"""
+        return np.flatnonzero(self.changed_at > version)
+
+    def cells(self, agent_ids) -> List[Dict[str, Any]]:
+        """Build id/status/type dicts for the given agents"""
+        ids = np.asarray(agent_ids, dtype=np.int64)
+        return [
+            {"id": agent_id, "status": STATUSES[status], "type": AGENT_TYPES[agent_type]}
+            for agent_id, status, agent_type in zip(
+                ids.tolist(), self.status[ids].tolist(), self.types[ids].tolist()
+            )
+        ]
@@ -2,12 +2,16 @@
 
 import asyncio
 import logging
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes import router
 from app.api.websocket import manager
 from app.core.config import settings
+from app.core.eventlog import EventLog
+from app.core.metrics import metrics
 from app.core.orchestrator import orchestrator
+from app.core.profiling import loop_monitor
+from app.core.redis_state import RedisSwarmState
 from app.simulation import simulation
 import json
 from datetime import datetime
@@ -51,17 +55,30 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
+    agents_active = orchestrator.state.count_active()
     return {
         "status": "healthy",
-        "agents_active": 0,  # TODO: Implement agent status
-        "swarm_mode": "standby"
+        "agents_active": agents_active,
+        "swarm_mode": "active" if agents_active else "standby"
     }
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """Metrics in Prometheus text exposition format"""
+    return Response(metrics.render(), media_type=metrics.content_type)
+
+
 @app.websocket("/api/v1/ws/swarm")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time swarm communication"""
-    await manager.connect(websocket)
+    """WebSocket endpoint for real-time swarm communication
+
+    Connect with ?encoding=msgpack to receive binary MessagePack frames
+    instead of JSON text frames. Send subscribe/unsubscribe commands to
+    filter by message type, agent type, disaster ID and bounding box (see
+    app.api.subscriptions).
+    """
+    await manager.connect(websocket, encoding=websocket.query_params.get("encoding"))
     
     try:
         while True:
@@ -76,7 +93,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 await orchestrator.initialize_swarm()
                 await manager.broadcast({
                     "type": "system",
-                    "message": "Swarm activated - 100 agents initializing",
+                    "message": f"Swarm activated - {orchestrator.max_agents} agents initializing",
                     "timestamp": datetime.utcnow().isoformat()
                 })
                 
@@ -91,13 +108,40 @@ async def websocket_endpoint(websocket: WebSocket):
                 # Deploy agents to disaster location
                 disaster_type = command.get("disaster_type")
                 location = command.get("location")
-                result = await orchestrator.deploy_agents(disaster_type, location)
+                severity = command.get("severity", "medium")
+                result = await orchestrator.deploy_agents(disaster_type, location, severity)
                 await manager.broadcast({
                     "type": "system",
                     "message": f"Deployed {result.get('deployed_count', 0)} agents",
                     "timestamp": datetime.utcnow().isoformat()
                 })
                 
+            elif command.get("action") in ("subscribe", "unsubscribe"):
+                # Narrow (or widen again) what this client receives
+                try:
+                    subscription = manager.update_subscription(websocket, command)
+                except ValueError as e:
+                    await manager.send_personal(websocket, {
+                        "type": "error",
+                        "message": str(e),
+                        "timestamp": datetime.utcnow().isoformat()
+                    })
+                else:
+                    await manager.send_personal(websocket, {
+                        "type": "subscription",
+                        "data": subscription,
+                        "timestamp": datetime.utcnow().isoformat()
+                    })
+                
+            elif command.get("action") == "sync_status":
+                # Client missed a delta: send changes since its version, or a full snapshot
+                delta = orchestrator.get_status_delta(command.get("version"))
+                await manager.send_personal(websocket, {
+                    "type": "agent_status_batch",
+                    "data": delta,
+                    "timestamp": datetime.utcnow().isoformat()
+                })
+                
     except WebSocketDisconnect:
         await manager.disconnect(websocket)
         logger.info("WebSocket client disconnected")
@@ -107,27 +151,27 @@ async def websocket_endpoint(websocket: WebSocket):
 
 
 async def broadcast_agent_updates():
-    """Background task that broadcasts agent status every 2 seconds"""
+    """Background task that broadcasts agent status changes every 2 seconds"""
     logger.info("🔄 Agent status broadcaster started")
+    last_version = orchestrator.state_version
     
     while True:
         try:
-            if manager.active_connections:
-                status = await orchestrator.get_swarm_status()
+            if not manager.active_connections:
+                # New clients get a full snapshot on connect, so nothing to catch up on
+                last_version = orchestrator.state_version
                 
-                # Broadcast batched update
-                await manager.broadcast({
+            elif orchestrator.state_version != last_version:
+                delta = orchestrator.get_status_delta(last_version)
+                
+                # Broadcast only the agents that changed since the last tick.
+                # Every worker sends deltas from its own synced state to its own clients.
+                await manager.broadcast_local({
                     "type": "agent_status_batch",
-                    "data": {
-                        "agents": status.get("agent_grid", []),
-                        "stats": {
-                            "total": status.get("total_agents", 100),
-                            "active": status.get("active", 0),
-                            "standby": status.get("standby", 100),
-                        }
-                    },
+                    "data": delta,
                     "timestamp": datetime.utcnow().isoformat()
                 })
+                last_version = delta["version"]
             
             await asyncio.sleep(2)  # Update every 2 seconds
             
@@ -141,6 +185,35 @@ async def startup_event():
     """Initialize services on application startup"""
     logger.info("🚀 ResilienceGrid backend starting...")
     
+    # Watch for anything blocking the event loop
+    if settings.loop_monitor_enabled:
+        loop_monitor.start()
+    
+    # Rebuild swarm state from the event log before serving
+    if settings.event_log_enabled:
+        event_log = EventLog(
+            settings.event_log_dir,
+            segment_bytes=settings.event_log_segment_mb * 1024 * 1024,
+            flush_interval=settings.event_log_flush_interval,
+            fsync=settings.event_log_fsync,
+        )
+        await orchestrator.attach_event_log(event_log, settings.event_log_snapshot_interval)
+        logger.info("📼 Event log enabled")
+    
+    # Share state and broadcasts with other workers through Redis
+    if settings.redis_enabled:
+        shared_state = RedisSwarmState.from_settings(settings)
+        await orchestrator.attach_shared_state(shared_state, settings.redis_sync_interval)
+        manager.attach_bus(shared_state)
+        logger.info("🔗 Redis shared state enabled")
+    
+    # Set up agent types that should not pay their first-use cost on a live request
+    if settings.agent_preload_types:
+        await orchestrator.registry.preload(settings.agent_preload_types)
+    
+    # Start task dispatcher workers
+    await orchestrator.dispatcher.start()
+    
     # Start agent status broadcaster
     asyncio.create_task(broadcast_agent_updates())
     
@@ -157,6 +230,17 @@ async def shutdown_event():
     """Cleanup on application shutdown"""
     logger.info("🛑 ResilienceGrid backend shutting down...")
     simulation.stop()
+    await orchestrator.dispatcher.stop()
+    await orchestrator.registry.shutdown()
+    
+    shared_state = orchestrator.shared_state
+    if shared_state is not None:
+        await manager.detach_bus()
+        await orchestrator.detach_shared_state()
+        await shared_state.close()
+    
+    await orchestrator.detach_event_log()
+    await loop_monitor.stop()
 
 
 if __name__ == "__main__":
@@ -49,26 +49,35 @@ class DisasterSimulation:
         self.running = False
         self.task = None
     
-    async def inject_mock_events(self, manager):
-        """Periodically inject mock disaster events"""
+    def make_disaster_event(self) -> Dict[str, Any]:
+        """Build a disaster event from a random scenario"""
+        scenario = random.choice(self.scenarios)
+        return {
+            "id": f"D{int(datetime.utcnow().timestamp())}",
+            "type": scenario["type"],
+            "location": scenario["location"],
+            "severity": scenario["severity"],
+            "timestamp": datetime.utcnow().isoformat(),
+            "affectedArea": random.randint(20, 150),
+            "name": scenario["name"]
+        }
+    
+    async def inject_mock_events(self, manager, interval: float = 10.0, report_delay: float = 5.0):
+        """Periodically inject mock disaster events
+        
+        interval and report_delay default to a realistic demo pace; load tests
+        shrink them to drive many events per second.
+        """
+        from app.core.orchestrator import orchestrator
+
         self.running = True
         logger.info("🎭 Simulation mode started - injecting mock disasters")
         
         while self.running:
             try:
-                await asyncio.sleep(10)  # Every 10 seconds
+                await asyncio.sleep(interval)
                 
-                # Select random scenario
-                scenario = random.choice(self.scenarios)
-                disaster_event = {
-                    "id": f"D{int(datetime.utcnow().timestamp())}",
-                    "type": scenario["type"],
-                    "location": scenario["location"],
-                    "severity": scenario["severity"],
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "affectedArea": random.randint(20, 150),
-                    "name": scenario["name"]
-                }
+                disaster_event = self.make_disaster_event()
                 
                 # Broadcast disaster detection
                 await manager.broadcast({
@@ -77,10 +86,11 @@ class DisasterSimulation:
                     "timestamp": datetime.utcnow().isoformat()
                 })
                 
-                logger.info(f"📍 Simulated disaster: {scenario['name']}")
+                logger.info(f"📍 Simulated disaster: {disaster_event['name']}")
                 
                 # Activate random agents to respond
-                affected_agents = random.sample(range(1, 101), random.randint(5, 15))
+                swarm_size = orchestrator.max_agents
+                affected_agents = random.sample(range(1, swarm_size + 1), min(random.randint(5, 15), swarm_size))
                 
                 for agent_id in affected_agents:
                     agent_status = random.choice(["active", "processing", "alert"])
@@ -88,14 +98,16 @@ class DisasterSimulation:
                         "type": "agent_status",
                         "data": {
                             "id": f"A{agent_id:03d}",
+                            "type": orchestrator.state.type_of(agent_id),
+                            "disaster_id": disaster_event["id"],
                             "status": agent_status,
-                            "task": f"Analyzing {scenario['type']} event..."
+                            "task": f"Analyzing {disaster_event['type']} event..."
                         },
                         "timestamp": datetime.utcnow().isoformat()
                     })
                 
                 # Generate mock report after disaster
-                await asyncio.sleep(5)
+                await asyncio.sleep(report_delay)
                 await self.generate_mock_report(manager, disaster_event)
                 
             except Exception as e:
@@ -103,37 +115,17 @@ class DisasterSimulation:
     
     async def generate_mock_report(self, manager, disaster: Dict[str, Any]):
         """Generate a mock situation report"""
+        from app.agents.reporter import report_engine
+
         report = {
             "id": f"R{int(datetime.utcnow().timestamp())}",
             "title": f"Situation Report: {disaster['name']}",
-            "content": f"""# {disaster['name']}
-
-## Overview
-Emergency response activated for {disaster['type']} event detected at {disaster['timestamp']}.
-
-## Status
-- **Severity**: {disaster['severity'].upper()}
-- **Location**: Lat {disaster['location']['lat']}, Lng {disaster['location']['lng']}
-- **Affected Area**: {disaster.get('affectedArea', 'Unknown')} km²
-
-## Agent Response
-Multiple AI agents activated for assessment and coordination:
-- Social media monitoring agents tracking public reports
-- Satellite imagery analysis in progress
-- IoT sensors providing real-time data
-- Resource allocation agents coordinating response
-
-## Recommendations
-1. Continue monitoring situation
-2. Prepare evacuation routes if needed
-3. Coordinate with local emergency services
-
----
-*Auto-generated by ResilienceGrid AI System*
-""",
+            "content": report_engine.render(disaster["id"], disaster),
             "timestamp": datetime.utcnow().isoformat(),
             "confidence": random.randint(75, 98),
             "affectedArea": f"{disaster.get('affectedArea', 50)} km²",
+            "disaster_id": disaster["id"],
+            "location": disaster["location"],
             "critical": disaster['severity'] == 'critical'
         }
         
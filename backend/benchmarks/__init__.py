@@ -0,0 +1 @@
+"""Load-testing and Benchmark Suite for ResilienceGrid"""
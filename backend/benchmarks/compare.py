@@ -0,0 +1,88 @@
+"""Compare Two Benchmark Result Files and Flag Regressions
+
+Usage (from backend/):
+
+    python -m benchmarks.compare benchmarks/results/<baseline>.json benchmarks/results/<candidate>.json
+    python -m benchmarks.compare base.json new.json --threshold 0.2
+
+Latency (*_ms) and memory (*_kb) metrics regress when they grow, throughput
+(*_per_sec) metrics regress when they shrink. Exits 1 if any metric regresses
+by more than the threshold (relative change, default 10%).
+"""
+
+from typing import Any, Dict, Iterator, Optional, Tuple
+import argparse
+import json
+import sys
+
+LOWER_IS_BETTER = ("_ms", "_kb")
+HIGHER_IS_BETTER = ("_per_sec",)
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """Yield (dotted.path, value) for every numeric leaf"""
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from flatten(value, path)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, float(value)
+
+
+def direction(metric: str) -> Optional[int]:
+    """+1 if higher is better, -1 if lower is better, None if not compared"""
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return None
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float):
+    """Get (metric, base, new, relative change, regressed) rows for shared metrics"""
+    base = dict(flatten(baseline["results"]))
+    new = dict(flatten(candidate["results"]))
+    rows = []
+    for metric in sorted(base.keys() & new.keys()):
+        sign = direction(metric)
+        if sign is None or base[metric] == 0:
+            continue
+        change = (new[metric] - base[metric]) / abs(base[metric])
+        rows.append((metric, base[metric], new[metric], change, sign * change < -threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ResilienceGrid benchmark results")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline  {baseline['meta']['commit']}  {baseline['meta']['timestamp']}")
+    print(f"candidate {candidate['meta']['commit']}  {candidate['meta']['timestamp']}")
+    if baseline["meta"].get("params") != candidate["meta"].get("params"):
+        print("⚠️  Runs used different parameters; comparison may not be meaningful")
+    print()
+
+    rows = compare(baseline, candidate, args.threshold)
+    width = max((len(row[0]) for row in rows), default=10)
+    for metric, base, new, change, regressed in rows:
+        flag = "❌ REGRESSION" if regressed else ""
+        print(f"{metric:<{width}}  {base:>12.4f}  {new:>12.4f}  {change:>+8.1%}  {flag}")
+
+    regressions = [row for row in rows if row[4]]
+    print()
+    if regressions:
+        print(f"❌ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"✅ No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
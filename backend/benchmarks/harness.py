@@ -0,0 +1,135 @@
+"""Benchmark Harness - In-process Server, Timing and Result Storage"""
+
+from typing import Any, Dict, Iterable, Optional
+from datetime import datetime
+from pathlib import Path
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import threading
+import time
+import numpy as np
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def summarize(samples: Iterable[float], scale: float = 1000.0) -> Dict[str, Any]:
+    """Summarize latency samples (seconds) as count/mean/p50/p99/max in ms"""
+    values = np.asarray(list(samples), dtype=np.float64) * scale
+    if values.size == 0:
+        return {"count": 0}
+    return {
+        "count": int(values.size),
+        "mean_ms": round(float(values.mean()), 4),
+        "p50_ms": round(float(np.percentile(values, 50)), 4),
+        "p99_ms": round(float(np.percentile(values, 99)), 4),
+        "max_ms": round(float(values.max()), 4),
+    }
+
+
+def rss_bytes() -> int:
+    """Resident set size of this process"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+
+    # ru_maxrss is the peak, in KB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if platform.system() == "Darwin" else peak * 1024
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class ServerThread:
+    """Runs the FastAPI app under uvicorn on its own event loop in a background thread
+
+    Keeping the server on a separate loop means the load generator's own
+    work does not show up as server latency.
+    """
+
+    def __init__(self, app, host: str = "127.0.0.1", port: Optional[int] = None):
+        import uvicorn
+
+        self.host = host
+        self.port = port or free_port()
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host=host, port=self.port, log_level="warning", lifespan="on")
+        )
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread = threading.Thread(target=self._run, name="bench-server", daemon=True)
+
+    @property
+    def http_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.server.serve())
+
+    def __enter__(self) -> "ServerThread":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Benchmark server failed to start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self._thread.join(timeout=10)
+
+    def call(self, coro, timeout: float = 30.0):
+        """Run a coroutine on the server's loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def call_async(self, coro):
+        """Await a coroutine scheduled on the server's loop from another loop"""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+
+def save_results(results: Dict[str, Any], params: Dict[str, Any], out_dir: Path = RESULTS_DIR) -> Path:
+    """Write results with run metadata to <out_dir>/<timestamp>-<commit>.json"""
+    commit = git_commit()
+    now = datetime.utcnow()
+    document = {
+        "meta": {
+            "commit": commit,
+            "timestamp": now.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": params,
+        },
+        "results": results,
+    }
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"{now.strftime('%Y%m%dT%H%M%S')}-{commit}.json"
+    path.write_text(json.dumps(document, indent=2))
+    return path
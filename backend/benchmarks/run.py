@@ -0,0 +1,1029 @@
+"""Run the ResilienceGrid Benchmark Suite
+
+Usage (from backend/):
+
+    python -m benchmarks.run                       # all scenarios, default load
+    python -m benchmarks.run --clients 500 --broadcast-rate 200
+    python -m benchmarks.run --scenarios swarm_status,deploy_agents --micro-agents 100,10000,100000
+
+Scenarios:
+    broadcast      N WebSocket clients on /api/v1/ws/swarm receiving disaster_detected
+                   frames at a fixed rate: delivery latency, messages/sec, RSS per connection
+    http           M deploy + report requests per second (open loop) against the REST API
+    startup        cold start in a fresh interpreter per swarm size: app import, orchestrator
+                   construction, first agent activation (time to first request), and loading
+                   every agent type up front for comparison
+    swarm_status   the serialized status snapshot on an in-process orchestrator per swarm size,
+                   unchanged and rebuilt after an agent changes
+    deploy_agents  deploy_agents() on an in-process orchestrator per swarm size
+    iot            SensorStore.ingest() batches across thousands of sensors: readings/sec
+    routing        A* queries on a synthetic grid city: cold pairs, and cached depot-to-zone
+                   routes while disaster closures are applied and lifted
+    resources      ResourcePlanner updates (new request, stock change, cancellation) with
+                   N depots and N open requests competing for scarce stock, per size
+    alerts         an alert storm (with repeats per recipient and area) through stub channel
+                   sinks: delivered alerts/sec, coalescing, and the peak send rate per channel
+    news           N RSS feeds on a local server, about 5% changing between polls: poll cycle
+                   time, 304 ratio, bytes and connections opened, against unpooled
+                   unconditional fetching
+    eventlog       --events records of mixed history (status changes, disasters, report batches):
+                   append cost, group-commit write rate, and restart recovery from the log
+                   alone vs from a snapshot plus the tail
+    metrics        cost of recording (counter inc, labelled histogram observe) and of rendering
+                   /metrics with every agent type and outcome populated
+    subscriptions  routing disaster_detected frames to --clients x 100 WebSocket subscribers, most
+                   filtered to one region and message type: clients visited per publish and
+                   route time, against delivering to every client
+    loop           event-loop monitoring: throughput of a busy loop with and without the lag
+                   monitor and while the sampling profiler runs, and whether a deliberate
+                   blocking call is caught with its stack
+    reports        situation reports regenerated for many incidents as a few inputs change:
+                   reports/sec and section cache hit rate
+    predictor      fire and flood spread ensembles on a --spread-grid grid: first forecast, and
+                   incremental updates as time passes and observations arrive
+    satellite      change detection over synthetic before/after rasters (--raster-mb each),
+                   whole scene and a disaster bbox: tiles/sec and peak RSS of the pool workers
+
+Results are written as JSON to benchmarks/results/ (see benchmarks.compare).
+"""
+
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.harness import RESULTS_DIR, ServerThread, rss_bytes, save_results, summarize
+
+SCENARIOS = ("broadcast", "http", "startup", "swarm_status", "deploy_agents", "iot", "routing", "resources", "alerts", "news", "eventlog", "metrics", "subscriptions", "loop", "reports", "predictor", "satellite")
+
+
+async def bench_broadcast(server: ServerThread, clients: int, messages: int, rate: float) -> Dict[str, Any]:
+    """Fan out disaster_detected frames to many WebSocket clients"""
+    import websockets
+    from app.api.websocket import manager
+    from app.simulation import simulation
+
+    rss_before = rss_bytes()
+    sockets = []
+    for _ in range(clients):
+        ws = await websockets.connect(f"{server.ws_url}/api/v1/ws/swarm", max_size=None)
+        await ws.recv()  # Initial swarm_status
+        sockets.append(ws)
+    await asyncio.sleep(0.2)
+    rss_after = rss_bytes()
+
+    latencies: List[float] = []
+    received_bytes = [0]
+    last_receive = [0.0]
+
+    async def reader(ws):
+        try:
+            async for raw in ws:
+                message = json.loads(raw)
+                if message.get("type") != "disaster_detected" or "sent_at" not in message:
+                    continue
+                now = time.perf_counter()
+                latencies.append(now - message["sent_at"])
+                received_bytes[0] += len(raw)
+                last_receive[0] = now
+                if message["seq"] == messages - 1:
+                    return
+        except websockets.ConnectionClosed:
+            return
+
+    readers = [asyncio.create_task(reader(ws)) for ws in sockets]
+
+    event = simulation.make_disaster_event()
+    interval = 1.0 / rate
+    started = time.perf_counter()
+    for seq in range(messages):
+        await server.call_async(manager.broadcast({
+            "type": "disaster_detected",
+            "data": event,
+            "seq": seq,
+            "sent_at": time.perf_counter(),
+        }))
+        # Open loop: keep the schedule regardless of how long delivery takes
+        await asyncio.sleep(max(0.0, started + (seq + 1) * interval - time.perf_counter()))
+
+    await asyncio.wait(readers, timeout=max(5.0, messages * interval))
+    for task in readers:
+        task.cancel()
+    ws_stats = server.call(_get_ws_stats())
+    for ws in sockets:
+        await ws.close()
+
+    elapsed = (last_receive[0] or time.perf_counter()) - started
+    expected = clients * messages
+    return {
+        "clients": clients,
+        "messages": messages,
+        "rate": rate,
+        "deliveries": len(latencies),
+        "lost": expected - len(latencies),
+        "latency": summarize(latencies),
+        "messages_per_sec": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        "bytes_per_sec": round(received_bytes[0] / elapsed, 1) if elapsed > 0 else 0.0,
+        "rss_per_connection_kb": round((rss_after - rss_before) / clients / 1024, 2),
+        "server_dropped": ws_stats["total_dropped"],
+        "server_evicted": ws_stats["evicted"],
+    }
+
+
+async def _get_ws_stats() -> Dict[str, Any]:
+    from app.api.websocket import manager
+
+    return manager.get_stats()
+
+
+async def bench_http(server: ServerThread, rate: float, duration: float) -> Dict[str, Any]:
+    """Drive deploy and report requests at a fixed open-loop rate"""
+    import httpx
+
+    latencies: Dict[str, List[float]] = {"deploy": [], "report": []}
+    errors = [0]
+
+    async with httpx.AsyncClient(
+        base_url=server.http_url,
+        limits=httpx.Limits(max_connections=256, max_keepalive_connections=256),
+        timeout=30.0,
+    ) as client:
+        await client.post("/api/swarm/initialize")
+
+        async def request(i: int):
+            kind = "deploy" if i % 2 == 0 else "report"
+            location = {"lat": random.uniform(25, 49), "lng": random.uniform(-124, -67)}
+            if kind == "deploy":
+                path, body = "/api/swarm/deploy", {
+                    "disaster_type": random.choice(["earthquake", "flood", "wildfire"]),
+                    "location": location,
+                    "severity": random.choice(["low", "medium", "high", "critical"]),
+                }
+            else:
+                path, body = "/api/disasters/report", {
+                    "type": "flood",
+                    "location": location,
+                    "description": f"bench report {i}",
+                }
+            t0 = time.perf_counter()
+            try:
+                response = await client.post(path, json=body)
+                if response.status_code >= 400:
+                    errors[0] += 1
+                    return
+            except httpx.HTTPError:
+                errors[0] += 1
+                return
+            latencies[kind].append(time.perf_counter() - t0)
+
+        total = int(rate * duration)
+        interval = 1.0 / rate
+        started = time.perf_counter()
+        tasks = []
+        for i in range(total):
+            tasks.append(asyncio.create_task(request(i)))
+            await asyncio.sleep(max(0.0, started + (i + 1) * interval - time.perf_counter()))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    completed = sum(len(v) for v in latencies.values())
+    return {
+        "rate": rate,
+        "duration": duration,
+        "requests": total,
+        "completed": completed,
+        "errors": errors[0],
+        "requests_per_sec": round(completed / elapsed, 1),
+        "deploy": summarize(latencies["deploy"]),
+        "report": summarize(latencies["report"]),
+    }
+
+
+STARTUP_PROBE = """
+import asyncio, contextlib, io, json, sys, time
+t0 = time.perf_counter()
+import app.main
+from app.core.orchestrator import SwarmOrchestrator
+from app.core.registry import AGENT_REGISTRY
+t1 = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    orchestrator = SwarmOrchestrator(max_agents=int(sys.argv[1]))
+    asyncio.run(orchestrator.initialize_swarm())
+t2 = time.perf_counter()
+loaded = sum(spec.split(":")[0] in sys.modules for spec in AGENT_REGISTRY.values())
+async def first_task():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return await orchestrator._acquire_agent({"agent_type": "classifier"})
+asyncio.run(first_task())
+t3 = time.perf_counter()
+async def preload():
+    with contextlib.redirect_stdout(io.StringIO()):
+        await orchestrator.registry.preload(AGENT_REGISTRY)
+asyncio.run(preload())
+t4 = time.perf_counter()
+print(json.dumps({
+    "import_s": round(t1 - t0, 3), "construct_s": round(t2 - t1, 3), "first_agent_ms": round((t3 - t2) * 1000, 2),
+    "agent_modules_at_start": loaded, "load_all_types_s": round(t4 - t3, 3)
+}))
+"""
+
+
+async def bench_startup(agents: int) -> Dict[str, Any]:
+    """Time a cold start (fresh interpreter) up to the first agent being ready for a task"""
+    env = {**os.environ, "MAX_AGENTS": str(agents)}
+    t0 = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", STARTUP_PROBE, str(agents)],
+        cwd=Path(__file__).resolve().parent.parent, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["process_s"] = round(time.perf_counter() - t0, 3)
+    return result
+
+
+async def bench_swarm_status(agents: int, iterations: int) -> Dict[str, Any]:
+    """Time fetching the serialized status snapshot on a partially deployed swarm"""
+    from app.core.orchestrator import SwarmOrchestrator
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        orchestrator = SwarmOrchestrator(max_agents=agents)
+        await orchestrator.initialize_swarm()
+        orchestrator.state.set_many(range(1, agents // 2 + 1), "active")
+
+    samples, rebuilds = [], []
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        orchestrator.status_snapshot().body
+        samples.append(time.perf_counter() - t0)
+        # One agent changes every tenth call, forcing a rebuild and re-serialization
+        if i % 10 == 9:
+            orchestrator.state.set(agents, "active" if i % 20 == 9 else "standby")
+            t0 = time.perf_counter()
+            orchestrator.status_snapshot().body
+            rebuilds.append(time.perf_counter() - t0)
+    result = summarize(samples)
+    result["ops_per_sec"] = round(iterations / sum(samples), 1)
+    result["rebuild"] = summarize(rebuilds)
+    return result
+
+
+async def bench_deploy_agents(agents: int, iterations: int) -> Dict[str, Any]:
+    """Time deploy_agents() at random locations, resetting the swarm between runs"""
+    from app.core.orchestrator import SwarmOrchestrator
+
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        orchestrator = SwarmOrchestrator(max_agents=agents)
+        await orchestrator.initialize_swarm()
+        await orchestrator.dispatcher.start()
+        try:
+            for _ in range(iterations):
+                location = {"lat": random.uniform(25, 49), "lng": random.uniform(-124, -67)}
+                t0 = time.perf_counter()
+                await orchestrator.deploy_agents("wildfire", location, "high")
+                samples.append(time.perf_counter() - t0)
+                orchestrator.state.set_all("standby")
+        finally:
+            await orchestrator.dispatcher.stop()
+    result = summarize(samples)
+    result["ops_per_sec"] = round(iterations / sum(samples), 1)
+    return result
+
+
+async def bench_iot(sensors: int, batch_size: int, batches: int) -> Dict[str, Any]:
+    """Time ring-buffer writes plus EWMA/z-score/threshold detection per batch"""
+    from app.agents.iot import SENSOR_TYPES, SensorStore
+
+    store = SensorStore(max_sensors=sensors, cooldown=0.0)
+    rows = store.rows([f"sensor-{i}" for i in range(sensors)],
+                      [SENSOR_TYPES[i % len(SENSOR_TYPES)] for i in range(sensors)])
+    rng = np.random.default_rng(0)
+    batch_rows = [rng.choice(rows, batch_size) for _ in range(batches)]
+    batch_values = [rng.normal(0.1, 0.02, batch_size).astype(np.float32) for _ in range(batches)]
+
+    samples = []
+    for r, v in zip(batch_rows, batch_values):
+        t0 = time.perf_counter()
+        store.ingest(r, v)
+        samples.append(time.perf_counter() - t0)
+    result = summarize(samples)
+    result["readings_per_sec"] = round(batch_size * batches / sum(samples), 1)
+    result["memory_kb"] = store.memory_bytes // 1024
+    return result
+
+
+def grid_city(side: int, spacing: float = 0.002, seed: int = 0):
+    """Edge list of a side x side street grid (~200 m blocks) with 5% of streets missing"""
+    rng = np.random.default_rng(seed)
+    rows, cols = np.divmod(np.arange(side * side), side)
+    lat, lng = 29.7 + rows * spacing, -95.4 + cols * spacing
+    ids = np.arange(side * side).reshape(side, side)
+    src = np.concatenate((ids[:, :-1].ravel(), ids[:-1, :].ravel()))
+    dst = np.concatenate((ids[:, 1:].ravel(), ids[1:, :].ravel()))
+    keep = rng.random(len(src)) > 0.05
+    seconds = spacing * 111.32 / rng.uniform(30, 70, keep.sum()) * 3600
+    return src[keep], dst[keep], seconds, lat, lng
+
+
+async def bench_routing(side: int, queries: int) -> Dict[str, Any]:
+    """Time uncached and depot-to-zone route queries while closures change"""
+    from app.agents.logistics import RoadGraph, RoutingEngine
+
+    graph = RoadGraph.from_edges(*grid_city(side))
+    t0 = time.perf_counter()
+    engine = RoutingEngine(graph, cache_size=4096)
+    preprocess = time.perf_counter() - t0
+    rng = random.Random(0)
+
+    cold = []
+    for _ in range(queries):
+        s, t = rng.randrange(graph.num_nodes), rng.randrange(graph.num_nodes)
+        t0 = time.perf_counter()
+        engine.route(s, t)
+        cold.append(time.perf_counter() - t0)
+
+    # 5 depots serving 20 zones; every 50 queries a disaster closes or reopens an area
+    depots = [rng.randrange(graph.num_nodes) for _ in range(5)]
+    zones = [rng.randrange(graph.num_nodes) for _ in range(20)]
+    engine.queries = engine.cache_hits = 0
+    mixed, closures = [], []
+    for i in range(queries):
+        if i % 50 == 0:
+            t0 = time.perf_counter()
+            if engine.closures:
+                engine.reopen(next(iter(engine.closures)))
+            else:
+                lat, lng = graph.lat[rng.choice(zones)], graph.lng[rng.choice(zones)]
+                engine.close(f"D{i}", [lat - 0.01, lng - 0.01, lat + 0.01, lng + 0.01])
+            closures.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        engine.route(rng.choice(depots), rng.choice(zones))
+        mixed.append(time.perf_counter() - t0)
+
+    stats = engine.get_stats()
+    return {
+        "nodes": graph.num_nodes,
+        "edges": graph.num_edges,
+        "preprocess_seconds": round(preprocess, 2),
+        "uncached": summarize(cold),
+        "depot_to_zone": summarize(mixed),
+        "closure_update": summarize(closures),
+        "cache_hit_rate": stats["cache_hit_rate"],
+        "avg_nodes_settled": stats["avg_nodes_settled"],
+    }
+
+
+async def bench_resources(size: int, updates: int) -> Dict[str, Any]:
+    """Time incremental re-allocation after single request and depot changes"""
+    from app.agents.resource import RESOURCE_TYPES, ResourcePlanner
+    from app.core.config import settings
+
+    planner = ResourcePlanner(max_distance_km=settings.resource_max_distance_km)
+    rng = random.Random(0)
+
+    def location():
+        return {"lat": rng.uniform(25, 49), "lng": rng.uniform(-124, -67)}
+
+    for i in range(size):
+        planner.set_depot(f"depot-{i}", location(), {t: rng.randrange(60) for t in RESOURCE_TYPES})
+    requests = [
+        planner.add_request(rng.choice(RESOURCE_TYPES), rng.randrange(10, 300), location(),
+                            rng.choice(("low", "medium", "high", "critical")))
+        for _ in range(size)
+    ]
+
+    planner.updates = planner.requests_touched = 0
+    samples = []
+    for i in range(updates):
+        t0 = time.perf_counter()
+        if i % 3 == 0:
+            requests.append(planner.add_request(
+                rng.choice(RESOURCE_TYPES), rng.randrange(10, 300), location(), "high"
+            ))
+        elif i % 3 == 1:
+            planner.adjust_stock(f"depot-{rng.randrange(size)}", rng.choice(RESOURCE_TYPES),
+                                 rng.randrange(-200, 200))
+        else:
+            planner.cancel_request(requests.pop(rng.randrange(len(requests))))
+        samples.append(time.perf_counter() - t0)
+
+    result = summarize(samples)
+    stats = planner.get_stats()
+    result["avg_requests_touched"] = stats["avg_requests_touched"]
+    result["unmet_requests"] = stats["unmet_requests"]
+    return result
+
+
+async def bench_alerts(alerts: int, recipients: int) -> Dict[str, Any]:
+    """Time a storm of alerts draining through rate-limited stub sinks"""
+    from app.agents.alert import Alert, AlertDispatcher, StubSink
+
+    rate_limits = {"sms": 500.0, "push": 20000.0}
+    sinks = {channel: StubSink(latency=0.005, history=alerts) for channel in rate_limits}
+    dispatcher = AlertDispatcher(rate_limits, sinks=sinks)
+    rng = random.Random(0)
+    storm = [
+        Alert(rng.choice(tuple(rate_limits)), f"user-{rng.randrange(recipients)}", f"area-{rng.randrange(4)}",
+              "Evacuate now", rng.choice(("medium", "high", "critical")))
+        for _ in range(alerts)
+    ]
+
+    t0 = time.perf_counter()
+    counts = await dispatcher.submit(storm)
+    await dispatcher.join()
+    elapsed = time.perf_counter() - t0
+    await dispatcher.stop()
+
+    result = {
+        **counts,
+        "seconds": round(elapsed, 2),
+        "delivered_per_sec": round(sum(s.messages for s in sinks.values()) / elapsed, 1),
+        "duplicates_sent": 0,
+        "peak_rate": {},
+    }
+    for channel, sink in sinks.items():
+        sent = [(r[2], r[3]) for r in sink.recent]
+        result["duplicates_sent"] += len(sent) - len(set(sent))
+        # Most sends in any one-second window
+        times = np.array([r[0] for r in sink.recent])
+        ends = np.searchsorted(times, times + 1.0)
+        result["peak_rate"][channel] = {
+            "limit": rate_limits[channel],
+            "observed": int((ends - np.arange(len(times))).max()) if len(times) else 0,
+        }
+    return result
+
+
+def feed_server(feeds: int, items: int):
+    """FastAPI app serving RSS feeds with ETag/Last-Modified; bump(i) adds an item to feed i"""
+    from email.utils import formatdate
+    from fastapi import FastAPI, Request, Response
+
+    app = FastAPI()
+    versions = [0] * feeds
+    modified = [formatdate(usegmt=True)] * feeds
+    ports = set()
+
+    def body(i: int) -> bytes:
+        entries = "".join(
+            f"<item><guid>feed-{i}-{n}</guid><title>Flood warning {n} for district {i}</title>"
+            f"<link>http://news.local/{i}/{n}</link><description>{'River levels rising. ' * 20}</description>"
+            f"<pubDate>{modified[i]}</pubDate></item>"
+            for n in range(versions[i], versions[i] + items)
+        )
+        return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed {i}</title>{entries}</channel></rss>'.encode()
+
+    @app.get("/feeds/{i}.xml")
+    async def feed(i: int, request: Request):
+        ports.add(request.client.port)
+        etag = f'"{i}-{versions[i]}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(
+            body(i), media_type="application/rss+xml", headers={"ETag": etag, "Last-Modified": modified[i]}
+        )
+
+    def bump(i: int):
+        versions[i] += 1
+        modified[i] = formatdate(usegmt=True)
+
+    return app, bump, ports
+
+
+async def bench_news(feeds: int, rounds: int) -> Dict[str, Any]:
+    """Time polling cycles over many feeds, pooled and conditional vs one-off unconditional requests"""
+    import httpx
+    from app.agents.news import FeedFetcher, parse_feed
+
+    app, bump, ports = feed_server(feeds, items=20)
+    rng = random.Random(0)
+    results: Dict[str, Any] = {"feeds": feeds, "rounds": rounds}
+    with ServerThread(app) as server:
+        urls = [f"{server.http_url}/feeds/{i}.xml" for i in range(feeds)]
+
+        async def unpooled(url: str) -> int:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(url)
+                parse_feed(response.content)
+                return len(response.content)
+
+        samples, received = [], 0
+        for _ in range(rounds):
+            for i in rng.sample(range(feeds), max(1, feeds // 20)):
+                bump(i)
+            t0 = time.perf_counter()
+            received += sum(await asyncio.gather(*(unpooled(url) for url in urls)))
+            samples.append(time.perf_counter() - t0)
+        results["unpooled"] = {**summarize(samples), "bytes": received, "connections": len(ports)}
+
+        ports.clear()
+        fetcher = FeedFetcher(max_per_host=feeds, min_interval=0)
+        await fetcher.poll(urls, force=True)
+        samples, new_items = [], 0
+        for _ in range(rounds):
+            for i in rng.sample(range(feeds), max(1, feeds // 20)):
+                bump(i)
+            t0 = time.perf_counter()
+            new_items += len(await fetcher.poll(urls, force=True))
+            samples.append(time.perf_counter() - t0)
+        stats = fetcher.get_stats()
+        await fetcher.close()
+        results["pooled"] = {
+            **summarize(samples),
+            "bytes": stats["bytes"],
+            "connections": len(ports),
+            "not_modified_ratio": round(stats["not_modified"] / stats["requests"], 4),
+            "new_items": new_items,
+        }
+    return results
+
+
+async def bench_eventlog(events: int, agents: int) -> Dict[str, Any]:
+    """Time event log appends and commits, then restarts from log-only and snapshot-plus-tail history"""
+    from app.core.eventlog import EventLog
+    from app.core.orchestrator import SwarmOrchestrator, report_content_key
+
+    rng = np.random.default_rng(0)
+    results: Dict[str, Any] = {"events": events, "agents": agents}
+
+    async def restart(directory: str):
+        with contextlib.redirect_stdout(io.StringIO()):
+            orchestrator = SwarmOrchestrator(max_agents=agents)
+        t0 = time.perf_counter()
+        summary = await orchestrator.attach_event_log(EventLog(directory), snapshot_interval=1e9)
+        elapsed = time.perf_counter() - t0
+        return orchestrator, {**summary, "seconds": round(elapsed, 3), "agents_active": orchestrator.state.count_active()}
+
+    with tempfile.TemporaryDirectory() as directory:
+        log = EventLog(directory)
+        log.load(lambda *_: None, lambda *_: None)
+        append_seconds = {"status": 0.0, "disaster": 0.0, "reports": 0.0}
+        counts = dict.fromkeys(append_seconds, 0)
+        commit_samples = []
+        for i in range(events):
+            kind = rng.random()
+            if kind < 0.8:
+                ids = rng.integers(1, agents + 1, 10)
+                codes = rng.integers(0, 3, 10)
+                t0 = time.perf_counter()
+                log.append_status(ids, codes)
+                append_seconds["status"] += time.perf_counter() - t0
+                counts["status"] += 1
+            elif kind < 0.95:
+                reports = [
+                    {"type": "flood", "description": f"Water rising on street {i}-{n}", "source": "bench",
+                     "severity": "medium", "id": f"R{i:08d}{n}", "received_at": "2024-01-01T00:00:00"}
+                    for n in range(10)
+                ]
+                batch = {"reports": reports, "keys": [report_content_key(r) for r in reports], "duplicates": 0}
+                t0 = time.perf_counter()
+                log.append_json(3, batch)
+                append_seconds["reports"] += time.perf_counter() - t0
+                counts["reports"] += 1
+            else:
+                disaster = {
+                    "id": f"D{i:012d}", "timestamp": "2024-01-01T00:00:00", "type": "wildfire",
+                    "location": {"lat": float(rng.uniform(25, 49)), "lng": float(rng.uniform(-124, -67))},
+                    "severity": "high"
+                }
+                t0 = time.perf_counter()
+                log.append_json(2, disaster)
+                append_seconds["disaster"] += time.perf_counter() - t0
+                counts["disaster"] += 1
+            # Group commit roughly every 2000 records, as the flusher would under heavy load
+            if i % 2000 == 1999:
+                t0 = time.perf_counter()
+                await log.commit()
+                commit_samples.append(time.perf_counter() - t0)
+        await log.close()
+        stats = log.get_stats()
+        results["append_us"] = {
+            kind: round(append_seconds[kind] / counts[kind] * 1e6, 2) for kind in counts if counts[kind]
+        }
+        results["commit"] = {
+            **summarize(commit_samples),
+            "mb_per_sec": round(stats["bytes"] / 1e6 / stats["flush_seconds"], 1),
+        }
+        results["log_mb"] = round(stats["bytes"] / 1e6, 1)
+        results["segments"] = stats["segments"]
+
+        orchestrator, results["recover_log_only"] = await restart(directory)
+        await orchestrator.snapshot_event_log()
+        for _ in range(1000):
+            orchestrator.event_log.append_status(rng.integers(1, agents + 1, 10), rng.integers(0, 3, 10))
+        await orchestrator.event_log.close()
+        _, results["recover_snapshot"] = await restart(directory)
+    return results
+
+
+async def bench_metrics(iterations: int) -> Dict[str, Any]:
+    """Time metric recording on the hot path and a full Prometheus text render"""
+    from app.core.metrics import MetricsRegistry
+    from app.core.state import AGENT_TYPES
+
+    registry = MetricsRegistry(prefix="bench_")
+    counter = registry.counter("events_total", "Events", ("status",))
+    histogram = registry.histogram("task_seconds", "Task latency", ("agent_type", "outcome"))
+    values = np.random.default_rng(0).exponential(0.01, iterations).tolist()
+    types = [AGENT_TYPES[i % len(AGENT_TYPES)] for i in range(iterations)]
+
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        counter.labels("accepted").inc()
+    counter_ns = (time.perf_counter() - t0) / iterations * 1e9
+
+    t0 = time.perf_counter()
+    for agent_type, value in zip(types, values):
+        histogram.labels(agent_type, "ok").observe(value)
+    observe_ns = (time.perf_counter() - t0) / iterations * 1e9
+
+    for agent_type in AGENT_TYPES:
+        histogram.labels(agent_type, "error").observe(0.1)
+    samples = []
+    for _ in range(50):
+        t0 = time.perf_counter()
+        text = registry.render()
+        samples.append(time.perf_counter() - t0)
+    return {
+        "counter_inc_ns": round(counter_ns, 1),
+        "histogram_observe_ns": round(observe_ns, 1),
+        "render": {**summarize(samples), "bytes": len(text), "lines": text.count("\n")},
+    }
+
+
+async def bench_subscriptions(clients: int, publishes: int) -> Dict[str, Any]:
+    """Time topic routing of located disasters to regionally subscribed clients"""
+    from app.api.frames import Frame
+    from app.api.subscriptions import SubscriptionIndex
+
+    rng = random.Random(0)
+    index = SubscriptionIndex(cell_deg=1.0, max_boxes=4)
+    for client in range(clients):
+        command: Dict[str, Any] = {"action": "subscribe"}
+        if client % 10:
+            # Regional operators: one message type, a 2-4 degree box somewhere in the US
+            lat, lng = rng.uniform(25, 47), rng.uniform(-124, -70)
+            size = rng.uniform(2, 4)
+            command.update(
+                types=[rng.choice(["disaster_detected", "new_report", "agent_status"])],
+                bbox=[lat, lng, lat + size, lng + size],
+            )
+        index.add(client)
+        index.update(client, command)
+
+    frames = [
+        Frame({"type": "disaster_detected", "data": {
+            "id": f"D{i}", "location": {"lat": rng.uniform(25, 49), "lng": rng.uniform(-124, -67)}
+        }})
+        for i in range(publishes)
+    ]
+    delivered = 0
+    t0 = time.perf_counter()
+    for frame in frames:
+        delivered += len(index.route(frame))
+    routed = time.perf_counter() - t0
+
+    everyone = list(range(clients))
+    t0 = time.perf_counter()
+    for frame in frames:
+        [(client, frame) for client in everyone]
+    broadcast = time.perf_counter() - t0
+    return {
+        "clients": clients,
+        "avg_recipients": round(delivered / publishes, 1),
+        "route_us": round(routed / publishes * 1e6, 2),
+        "deliver_all_us": round(broadcast / publishes * 1e6, 2),
+        "index": index.get_stats(),
+    }
+
+
+async def bench_loop(seconds: float) -> Dict[str, Any]:
+    """Measure monitor and profiler overhead on a busy loop, and catch a deliberate stall"""
+    from app.core.profiling import LoopMonitor, SamplingProfiler
+
+    async def churn(duration: float) -> float:
+        # Many short coroutines yielding to the loop, like a busy broadcaster
+        count = 0
+        deadline = time.perf_counter() + duration
+
+        async def step():
+            await asyncio.sleep(0)
+
+        while time.perf_counter() < deadline:
+            await asyncio.gather(*(step() for _ in range(100)))
+            count += 100
+        return count / duration
+
+    await churn(min(seconds, 0.5))  # Warm up
+    baseline = await churn(seconds)
+    monitor = LoopMonitor(interval=0.01, slow_threshold=0.1)
+    monitor.start()
+    monitored = await churn(seconds)
+
+    def blocking_call():
+        time.sleep(0.3)
+
+    blocking_call()  # Stalls the loop the monitor is watching
+    await asyncio.sleep(0.05)
+    stats = monitor.get_stats()
+    await monitor.stop()
+    caught = [stall for stall in stats["stalls"] if any("blocking_call" in line for line in stall["stack"])]
+
+    profiler = SamplingProfiler()
+    profile = asyncio.create_task(profiler.profile(seconds, 0.005))
+    profiled = await churn(seconds)
+    collapsed = await profile
+    return {
+        "ops_per_sec": {"baseline": round(baseline), "monitored": round(monitored), "profiled": round(profiled)},
+        "monitor_overhead_pct": round((1 - monitored / baseline) * 100, 2),
+        "profiler_overhead_pct": round((1 - profiled / baseline) * 100, 2),
+        "lag_ms": stats["lag_ms"],
+        "stall_caught": bool(caught),
+        "stall_ms": caught[0]["stalled_ms"] if caught else None,
+        "profile_stacks": collapsed.count("\n"),
+    }
+
+
+async def bench_reports(incidents: int, rounds: int) -> Dict[str, Any]:
+    """Time report regeneration when about 10% of incidents change between rounds"""
+    from app.agents.reporter import ReportEngine
+    from app.simulation import simulation
+
+    engine = ReportEngine()
+    rng = random.Random(0)
+    disasters = [dict(simulation.make_disaster_event(), id=f"D{i}") for i in range(incidents)]
+    agents = {"social": 10, "satellite": 4, "iot": 6, "resource": 3}
+
+    samples = []
+    for _ in range(rounds):
+        for disaster in disasters:
+            if rng.random() < 0.1:
+                disaster["affectedArea"] = rng.randint(20, 150)
+        t0 = time.perf_counter()
+        for disaster in disasters:
+            engine.render(disaster["id"], disaster, {"agents": agents})
+        samples.append(time.perf_counter() - t0)
+
+    stats = engine.get_stats()
+    result = summarize(samples)
+    result["reports_per_sec"] = round(incidents * rounds / sum(samples), 1)
+    result["section_hit_rate"] = stats["section_hit_rate"]
+    return result
+
+
+async def bench_predictor(grid_size: int, updates: int) -> Dict[str, Any]:
+    """Time ensemble spread forecasts, from scratch and resumed from the last state"""
+    from app.agents.predictor import SpreadEngine
+    from app.core.config import settings
+
+    engine = SpreadEngine(grid_size=grid_size, workers=settings.predictor_workers)
+    location = {"lat": 34.05, "lng": -118.25}
+    start = time.time()
+    step = settings.predictor_step_minutes * 60
+    results: Dict[str, Any] = {"members": engine.members, "workers": engine.workers}
+    scenarios = {
+        "fire": {"wind_speed_ms": 8.0, "wind_direction_deg": 270.0},
+        "flood": {"rainfall_mm_h": 30.0},
+    }
+    for model, conditions in scenarios.items():
+        incident = f"bench-{model}"
+        t0 = time.perf_counter()
+        engine.update(incident, model, {"location": location, "timestamp": start, **conditions})
+        first = time.perf_counter() - t0
+
+        samples = []
+        for i in range(1, updates + 1):
+            # Every update lands three steps later with a new observation near the incident
+            task = {
+                "timestamp": start + 3 * i * step,
+                "observations": [{"lat": location["lat"] + 0.01 * (i % 5), "lng": location["lng"], "depth_m": 0.5}],
+            }
+            t0 = time.perf_counter()
+            engine.update(incident, model, task)
+            samples.append(time.perf_counter() - t0)
+        results[model] = {"first_forecast_ms": round(first * 1000, 2), "update": summarize(samples)}
+    engine.shutdown()
+    results["steps_reused"] = engine.steps_reused
+    results["memory_kb"] = engine.get_stats()["memory_bytes"] // 1024
+    return results
+
+
+def write_synthetic_scene(path: Path, height: int, width: int, seed: int, damaged: bool):
+    """Write a uint16 .npy raster block by block, never holding the whole image
+
+    The "after" scene is the "before" scene plus sensor noise, with a bright
+    damaged patch over the central ninth.
+    """
+    header = {"descr": np.lib.format.dtype_to_descr(np.dtype(np.uint16)),
+              "fortran_order": False, "shape": (height, width)}
+    block = max(1, (64 << 20) // (width * 2))
+    with open(path, "wb") as f:
+        np.lib.format.write_array_header_2_0(f, header)
+        for r0 in range(0, height, block):
+            r1 = min(height, r0 + block)
+            rows = np.random.default_rng(seed + r0).integers(800, 1200, (r1 - r0, width), dtype=np.uint16)
+            if damaged:
+                rows += np.random.default_rng(r0).integers(0, 20, rows.shape, dtype=np.uint16)
+                lo, hi = max(r0, height // 3), min(r1, 2 * height // 3)
+                if lo < hi:
+                    rows[lo - r0:hi - r0, width // 3:2 * width // 3] += 1500
+            f.write(rows.tobytes())
+
+
+def _process_memory_kb(pid: int) -> Dict[str, int]:
+    """Peak and current anonymous RSS of a process from /proc (Linux only)"""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmHWM", "RssAnon", "RssFile"):
+                    fields[key] = int(value.split()[0])
+    except OSError:
+        pass
+    return fields
+
+
+async def bench_satellite(size_mb: int, tile_size: int, workers: int, raster_dir: str = "") -> Dict[str, Any]:
+    """Score change across synthetic rasters of size_mb each, whole scene and a bbox"""
+    from app.agents.satellite import TilePipeline
+
+    side = int((size_mb * (1 << 20) // 2) ** 0.5)
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(raster_dir or tmp)
+        directory.mkdir(parents=True, exist_ok=True)
+        before, after = directory / f"before-{side}.npy", directory / f"after-{side}.npy"
+        t0 = time.perf_counter()
+        if not (before.exists() and after.exists()):
+            write_synthetic_scene(before, side, side, seed=1, damaged=False)
+            write_synthetic_scene(after, side, side, seed=1, damaged=True)
+        generated = time.perf_counter() - t0
+
+        pipeline = TilePipeline(tile_size=tile_size, workers=workers, data_dir=str(directory))
+        # Spawn the workers before timing
+        for future in [pipeline.pool.submit(os.getpid) for _ in range(pipeline.workers)]:
+            future.result()
+
+        bounds = [30.0, -100.0, 31.0, -99.0]
+        bbox = [30.25, -99.75, 30.75, -99.25]
+        results = {}
+        for name, box in (("scene", None), ("bbox", bbox)):
+            analysis = await pipeline.analyze(before.name, after.name, bounds=bounds, bbox=box)
+            results[name] = {
+                "tiles": analysis["tiles_processed"],
+                "seconds": analysis["seconds"],
+                "tiles_per_sec": analysis["tiles_per_sec"],
+                "mb_per_sec": round(
+                    2 * size_mb * analysis["tiles_processed"] / analysis["tiles_total"] / analysis["seconds"], 1
+                ),
+                "damage_score": analysis["damage_score"],
+            }
+
+        worker_memory = [_process_memory_kb(pid) for pid in list(pipeline.pool._processes)]
+        pipeline.shutdown()
+
+    return {
+        "scene_mb": size_mb,
+        "shape": [side, side],
+        "tile_size": tile_size,
+        "workers": pipeline.workers,
+        "generate_seconds": round(generated, 2),
+        **results,
+        "parent_peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        # VmHWM includes mapped raster pages (reclaimable page cache); RssAnon is private memory
+        "worker_peak_rss_kb": max((m.get("VmHWM", 0) for m in worker_memory), default=0),
+        "worker_anon_rss_kb": max((m.get("RssAnon", 0) for m in worker_memory), default=0),
+    }
+
+
+async def run(args) -> Dict[str, Any]:
+    scenarios = SCENARIOS if args.scenarios == "all" else tuple(args.scenarios.split(","))
+    results: Dict[str, Any] = {}
+    random.seed(args.seed)
+
+    if "broadcast" in scenarios or "http" in scenarios:
+        from app.main import app
+
+        with ServerThread(app) as server:
+            if "broadcast" in scenarios:
+                print(f"▶ broadcast: {args.clients} clients, {args.messages} messages @ {args.broadcast_rate}/s")
+                results["broadcast"] = await bench_broadcast(
+                    server, args.clients, args.messages, args.broadcast_rate
+                )
+            if "http" in scenarios:
+                print(f"▶ http: {args.http_rate} req/s for {args.duration}s")
+                results["http"] = await bench_http(server, args.http_rate, args.duration)
+
+    sizes = [int(n) for n in args.micro_agents.split(",")]
+    if "startup" in scenarios:
+        results["startup"] = {}
+        for n in sizes:
+            print(f"▶ startup: {n} agents")
+            results["startup"][str(n)] = await bench_startup(n)
+    if "swarm_status" in scenarios:
+        results["swarm_status"] = {}
+        for n in sizes:
+            print(f"▶ swarm_status: {n} agents x {args.iterations}")
+            results["swarm_status"][str(n)] = await bench_swarm_status(n, args.iterations)
+    if "deploy_agents" in scenarios:
+        results["deploy_agents"] = {}
+        for n in sizes:
+            print(f"▶ deploy_agents: {n} agents x {args.iterations}")
+            results["deploy_agents"][str(n)] = await bench_deploy_agents(n, args.iterations)
+    if "iot" in scenarios:
+        print(f"▶ iot: {args.sensors} sensors, {args.iterations} batches of {args.sensor_batch}")
+        results["iot"] = await bench_iot(args.sensors, args.sensor_batch, args.iterations)
+    if "routing" in scenarios:
+        print(f"▶ routing: {args.road_grid}x{args.road_grid} grid, {args.iterations} queries")
+        results["routing"] = await bench_routing(args.road_grid, args.iterations)
+    if "resources" in scenarios:
+        results["resources"] = {}
+        for n in [int(n) for n in args.resource_sizes.split(",")]:
+            print(f"▶ resources: {n} depots, {n} requests, {args.iterations} updates")
+            results["resources"][str(n)] = await bench_resources(n, args.iterations)
+    if "alerts" in scenarios:
+        print(f"▶ alerts: {args.alerts} alerts to {args.alerts // 2} recipients")
+        results["alerts"] = await bench_alerts(args.alerts, args.alerts // 2)
+    if "news" in scenarios:
+        print(f"▶ news: {args.feeds} feeds x {args.iterations // 10} polls")
+        results["news"] = await bench_news(args.feeds, max(1, args.iterations // 10))
+    if "eventlog" in scenarios:
+        print(f"▶ eventlog: {args.events} events, 10000 agents")
+        results["eventlog"] = await bench_eventlog(args.events, 10000)
+    if "metrics" in scenarios:
+        print(f"▶ metrics: {args.iterations * 1000} observations")
+        results["metrics"] = await bench_metrics(args.iterations * 1000)
+    if "subscriptions" in scenarios:
+        print(f"▶ subscriptions: {args.clients * 100} subscribers, {args.iterations * 10} publishes")
+        results["subscriptions"] = await bench_subscriptions(args.clients * 100, args.iterations * 10)
+    if "loop" in scenarios:
+        print(f"▶ loop: {args.duration}s per phase")
+        results["loop"] = await bench_loop(args.duration)
+    if "reports" in scenarios:
+        print(f"▶ reports: 1000 incidents x {args.iterations} rounds")
+        results["reports"] = await bench_reports(1000, args.iterations)
+    if "predictor" in scenarios:
+        print(f"▶ predictor: {args.spread_grid}x{args.spread_grid} grid, 10 updates")
+        results["predictor"] = await bench_predictor(args.spread_grid, 10)
+    if "satellite" in scenarios:
+        print(f"▶ satellite: 2 x {args.raster_mb} MB rasters, {args.tile_size}px tiles")
+        results["satellite"] = await bench_satellite(
+            args.raster_mb, args.tile_size, args.satellite_workers, args.raster_dir
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ResilienceGrid benchmark suite")
+    parser.add_argument("--scenarios", default="all", help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--agents", type=int, default=100, help="max_agents for the in-process server")
+    parser.add_argument("--clients", type=int, default=50, help="WebSocket clients for the broadcast scenario")
+    parser.add_argument("--messages", type=int, default=200, help="Messages broadcast per run")
+    parser.add_argument("--broadcast-rate", type=float, default=100.0, help="Broadcasts per second")
+    parser.add_argument("--http-rate", type=float, default=50.0, help="REST requests per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds of REST load")
+    parser.add_argument("--micro-agents", default="100,10000", help="Swarm sizes for in-process benchmarks")
+    parser.add_argument("--iterations", type=int, default=200, help="Iterations per in-process benchmark")
+    parser.add_argument("--sensors", type=int, default=5000, help="Sensors in the IoT benchmark")
+    parser.add_argument("--sensor-batch", type=int, default=10000, help="Readings per IoT ingest batch")
+    parser.add_argument("--road-grid", type=int, default=300, help="Side of the synthetic street grid")
+    parser.add_argument("--resource-sizes", default="100,1000,5000", help="Depot/request counts for the resources benchmark")
+    parser.add_argument("--alerts", type=int, default=20000, help="Alerts in the alert storm")
+    parser.add_argument("--feeds", type=int, default=200, help="RSS feeds served in the news benchmark")
+    parser.add_argument("--events", type=int, default=500000, help="Records of history in the eventlog benchmark")
+    parser.add_argument("--spread-grid", type=int, default=1000, help="Grid side for the predictor benchmark")
+    parser.add_argument("--raster-mb", type=int, default=256, help="Size of each synthetic raster")
+    parser.add_argument("--tile-size", type=int, default=512, help="Satellite tile edge in pixels")
+    parser.add_argument("--satellite-workers", type=int, default=0, help="Change detection processes (0 = CPUs)")
+    parser.add_argument("--raster-dir", default="", help="Keep/reuse synthetic rasters here instead of a temp dir")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=str(RESULTS_DIR), help="Directory for result JSON")
+    parser.add_argument("--no-save", action="store_true", help="Print results without writing a file")
+    args = parser.parse_args()
+
+    # Must be set before the app (and its settings) are imported
+    os.environ["MAX_AGENTS"] = str(args.agents)
+    os.environ.setdefault("SIMULATION_MODE", "False")
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2))
+    if not args.no_save:
+        params = {k: v for k, v in vars(args).items() if k not in ("out", "no_save")}
+        path = save_results(results, params, Path(args.out))
+        print(f"💾 Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
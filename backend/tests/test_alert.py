@@ -0,0 +1,110 @@
+"""Coalescing, suppression, re-prioritization and channel validation in alert dispatch"""
+
+import pytest
+from app.agents.alert import Alert, AlertAgent, AlertDispatcher, AlertSink
+
+RATE_LIMITS = {"sms": 1000.0, "push": 1000.0}
+
+
+class RecordingSink(AlertSink):
+    def __init__(self):
+        self.batches = []
+
+    async def send(self, channel, alerts):
+        self.batches.append([(a.recipient, a.message, a.severity) for a in alerts])
+
+
+@pytest.fixture
+async def dispatcher():
+    dispatcher = AlertDispatcher(
+        RATE_LIMITS, sinks={"sms": RecordingSink(), "push": RecordingSink()},
+        batch_size=10, workers_per_channel=1, coalesce_window=60.0,
+    )
+    yield dispatcher
+    await dispatcher.stop()
+
+
+def sent(dispatcher: AlertDispatcher, channel: str = "sms") -> list:
+    return [alert for batch in dispatcher.sinks[channel].batches for alert in batch]
+
+
+async def test_queued_duplicate_is_coalesced_into_newest_message(dispatcher):
+    counts = await dispatcher.submit([
+        Alert("sms", "alice", "D1", "Evacuate zone A"),
+        Alert("sms", "alice", "D1", "Evacuate zones A and B"),
+        Alert("sms", "bob", "D1", "Evacuate zone A"),
+    ])
+    await dispatcher.join()
+
+    assert counts == {"queued": 2, "coalesced": 1, "suppressed": 0}
+    assert sorted(sent(dispatcher)) == [
+        ("alice", "Evacuate zones A and B", "medium"),
+        ("bob", "Evacuate zone A", "medium"),
+    ]
+
+
+async def test_repeat_within_window_is_suppressed_unless_more_severe(dispatcher):
+    await dispatcher.submit([Alert("sms", "alice", "D1", "Flood warning", "high")])
+    await dispatcher.join()
+
+    repeat = await dispatcher.submit([Alert("sms", "alice", "D1", "Flood warning", "high")])
+    assert repeat["suppressed"] == 1
+    other_area = await dispatcher.submit([Alert("sms", "alice", "D2", "Flood warning", "high")])
+    assert other_area["queued"] == 1
+    upgrade = await dispatcher.submit([Alert("sms", "alice", "D1", "Evacuate now", "critical")])
+    assert upgrade["queued"] == 1
+    await dispatcher.join()
+
+    assert sorted(sent(dispatcher)) == [
+        ("alice", "Evacuate now", "critical"),
+        ("alice", "Flood warning", "high"),
+        ("alice", "Flood warning", "high"),
+    ]
+    assert dispatcher.get_stats()["channels"]["sms"]["suppressed"] == 1
+
+
+async def test_upgraded_alert_jumps_the_queue(dispatcher):
+    alerts = [Alert("sms", f"r{n}", "D1", "Heads up", "low") for n in range(20)]
+    await dispatcher.submit(alerts)
+    await dispatcher.submit([Alert("sms", "r19", "D1", "Evacuate", "critical")])
+    await dispatcher.join()
+
+    messages = sent(dispatcher)
+    assert messages[0] == ("r19", "Evacuate", "critical")
+    assert len(messages) == 20
+
+
+async def test_unknown_channel_rejects_the_whole_batch(dispatcher):
+    with pytest.raises(ValueError, match="radio"):
+        await dispatcher.submit([Alert("sms", "alice", "D1", "Hi"), Alert("radio", "all", "D1", "Hi")])
+    assert dispatcher.stats["sms"].queued == 0
+    assert not dispatcher._pending
+
+
+async def test_agent_defaults_to_configured_channels(dispatcher):
+    agent = AlertAgent(96)
+    agent.dispatcher = dispatcher
+    agent.channels = list(dispatcher.channels)
+    result = await agent.process_task({"recipients": ["alice"], "message": "Shelter open", "disaster_id": "D1"})
+    await dispatcher.join()
+
+    assert result["queued"] == 2
+    assert sent(dispatcher, "sms") == sent(dispatcher, "push") == [("alice", "Shelter open", "medium")]
+
+
+def test_agent_channels_follow_rate_limits():
+    agent = AlertAgent(96)
+    assert agent.channels == list(agent.dispatcher.channels)
+
+
+def test_incomplete_sink_fails_at_construction():
+    class NoSend(AlertSink):
+        pass
+
+    with pytest.raises(TypeError):
+        NoSend()
+
+
+def test_sink_for_unknown_channel_is_rejected():
+    with pytest.raises(ValueError):
+        AlertDispatcher(RATE_LIMITS, sinks={"pager": RecordingSink()})
@@ -0,0 +1,155 @@
+"""Priority order, per-type concurrency caps and parking in the task dispatcher"""
+
+import asyncio
+import pytest
+from app.core.dispatcher import TaskDispatcher
+
+
+class GatedAgent:
+    """Processes a task once its gate opens, recording what ran concurrently"""
+
+    def __init__(self, pool: "AgentPool"):
+        self.pool = pool
+
+    async def process_task(self, task):
+        pool = self.pool
+        agent_type = task["agent_type"]
+        pool.running[agent_type] = pool.running.get(agent_type, 0) + 1
+        pool.peak[agent_type] = max(pool.peak.get(agent_type, 0), pool.running[agent_type])
+        pool.started.append(task["name"])
+        try:
+            await pool.gates.setdefault(agent_type, asyncio.Event()).wait()
+            if task.get("fail"):
+                raise RuntimeError(task["name"])
+            return task["name"]
+        finally:
+            pool.running[agent_type] -= 1
+
+
+class AgentPool:
+    def __init__(self):
+        self.running = {}
+        self.peak = {}
+        self.started = []
+        self.gates = {}
+        self.released = []
+
+    def open(self, agent_type: str):
+        self.gates.setdefault(agent_type, asyncio.Event()).set()
+
+    async def acquire(self, task):
+        return GatedAgent(self)
+
+    async def release(self, agent, ok: bool):
+        self.released.append(ok)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def pool():
+    return AgentPool()
+
+
+async def make_dispatcher(pool: AgentPool, **kwargs) -> TaskDispatcher:
+    dispatcher = TaskDispatcher(pool.acquire, pool.release, **kwargs)
+    await dispatcher.start()
+    return dispatcher
+
+
+async def test_type_concurrency_cap(pool):
+    dispatcher = await make_dispatcher(pool, num_workers=8, type_concurrency=2)
+    futures = [await dispatcher.submit({"agent_type": "social", "name": n}) for n in range(6)]
+    await settle()
+
+    assert pool.running["social"] == 2
+    assert dispatcher.get_stats()["deferred"] == {"social": 4}
+    assert dispatcher.pending == 4
+
+    pool.open("social")
+    assert await asyncio.gather(*futures) == list(range(6))
+    assert pool.peak["social"] == 2
+    assert dispatcher.pending == 0
+    await dispatcher.stop()
+
+
+async def test_type_limit_below_default_concurrency(pool):
+    dispatcher = await make_dispatcher(pool, num_workers=8, type_concurrency=5)
+    dispatcher.set_type_limit("alert", 1)
+    futures = [await dispatcher.submit({"agent_type": "alert", "name": n}) for n in range(3)]
+    await settle()
+    assert pool.running["alert"] == 1
+
+    pool.open("alert")
+    await asyncio.gather(*futures)
+    assert pool.peak["alert"] == 1
+    await dispatcher.stop()
+
+
+async def test_parked_tasks_do_not_block_other_types(pool):
+    dispatcher = await make_dispatcher(pool, num_workers=2, type_concurrency=1)
+    slow = [await dispatcher.submit({"agent_type": "satellite", "name": f"s{n}"}) for n in range(4)]
+    fast = await dispatcher.submit({"agent_type": "news", "name": "n0"})
+    pool.open("news")
+
+    assert await asyncio.wait_for(fast, 1) == "n0"
+    assert pool.running["satellite"] == 1
+
+    pool.open("satellite")
+    await asyncio.gather(*slow)
+    await dispatcher.stop()
+
+
+async def test_parked_tasks_run_in_priority_order(pool):
+    dispatcher = await make_dispatcher(pool, num_workers=4, type_concurrency=1)
+    first = await dispatcher.submit({"agent_type": "iot", "name": "first"})
+    await settle()
+    for name, severity in (("low", "low"), ("critical", "critical"), ("medium", "medium")):
+        await dispatcher.submit({"agent_type": "iot", "name": name, "severity": severity})
+    await settle()
+
+    pool.open("iot")
+    await first
+    await settle()
+    assert pool.started == ["first", "critical", "medium", "low"]
+    await dispatcher.stop()
+
+
+async def test_queue_full_backpressure(pool):
+    dispatcher = TaskDispatcher(pool.acquire, pool.release, num_workers=1, queue_size=2)
+    dispatcher.submit_nowait({"agent_type": "news", "name": 0})
+    dispatcher.submit_nowait({"agent_type": "news", "name": 1})
+    with pytest.raises(asyncio.QueueFull):
+        dispatcher.submit_nowait({"agent_type": "news", "name": 2})
+
+    blocked = asyncio.create_task(dispatcher.submit({"agent_type": "news", "name": 2}))
+    await settle()
+    assert not blocked.done()
+
+    # A worker starting a task frees its slot
+    await dispatcher.start()
+    future = await asyncio.wait_for(blocked, 1)
+    pool.open("news")
+    assert await future == 2
+    await dispatcher.stop()
+
+
+async def test_failed_task_sets_exception_and_releases_not_ok(pool):
+    dispatcher = await make_dispatcher(pool, num_workers=1)
+    pool.open("classifier")
+    future = await dispatcher.submit({"agent_type": "classifier", "name": "bad", "fail": True})
+    with pytest.raises(RuntimeError):
+        await future
+    assert pool.released == [False]
+    assert dispatcher.get_stats()["agent_types"]["classifier"]["failed"] == 1
+    await dispatcher.stop()
+
+
+async def test_task_without_agent_type_is_rejected(pool):
+    dispatcher = TaskDispatcher(pool.acquire, pool.release)
+    with pytest.raises(ValueError):
+        dispatcher.submit_nowait({"name": "orphan"})
+    assert dispatcher.pending == 0
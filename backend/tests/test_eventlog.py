@@ -0,0 +1,168 @@
+"""Event log recovery: CRC checks, torn tails, snapshots and the orchestrator restart round trip"""
+
+import numpy as np
+import pytest
+from app.core.eventlog import DISASTER, STATUS, EventLog, decode_json, decode_status
+from app.core.orchestrator import SwarmOrchestrator
+from app.core.state import STATUS_CODES
+
+
+class Replay:
+    """Collects what load() applies"""
+
+    def __init__(self):
+        self.snapshot = None
+        self.records = []
+
+    def apply_snapshot(self, seq, codes, meta):
+        self.snapshot = (seq, codes.tolist(), meta)
+
+    def apply_record(self, record_type, payload):
+        if record_type == STATUS:
+            ids, codes = decode_status(payload)
+            self.records.append((record_type, ids.tolist(), codes.tolist()))
+        else:
+            self.records.append((record_type, decode_json(payload)))
+
+
+def load(directory, **kwargs):
+    log = EventLog(str(directory), fsync=False, **kwargs)
+    replay = Replay()
+    summary = log.load(replay.apply_snapshot, replay.apply_record)
+    return log, replay, summary
+
+
+async def write_records(directory, count: int, **kwargs) -> EventLog:
+    log, _, _ = load(directory, **kwargs)
+    for n in range(count):
+        log.append_json(DISASTER, {"id": f"D{n}"})
+    await log.close()
+    return log
+
+
+def segment(directory):
+    [path] = sorted(directory.glob("segment-*.log"))
+    return path
+
+
+async def test_records_replay_in_order(tmp_path):
+    log, _, _ = load(tmp_path)
+    log.append_status(np.array([3, 7]), np.array([2, 3], dtype=np.uint8))
+    log.append_json(DISASTER, {"id": "D1"})
+    await log.close()
+
+    log, replay, summary = load(tmp_path)
+    assert replay.records == [(STATUS, [3, 7], [2, 3]), (DISASTER, {"id": "D1"})]
+    assert summary["seq"] == 2
+    # New records continue the sequence
+    assert log.append_json(DISASTER, {"id": "D2"}) == 3
+    await log.close()
+
+
+async def test_torn_tail_is_truncated(tmp_path):
+    await write_records(tmp_path, 3)
+    path = segment(tmp_path)
+    intact = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(b"\x40\x00\x00\x00partial")
+
+    log, replay, summary = load(tmp_path)
+    assert [r[1]["id"] for r in replay.records] == ["D0", "D1", "D2"]
+    assert path.stat().st_size == intact
+    assert log.get_stats()["truncated_bytes"] == 11
+    await log.close()
+
+
+async def test_corrupt_record_stops_replay_and_is_cut(tmp_path):
+    await write_records(tmp_path, 3)
+    path = segment(tmp_path)
+    data = bytearray(path.read_bytes())
+    first_end = data.index(b'"D0"}') + len(b'"D0"}')
+    # Flip a payload byte of the second record
+    data[data.index(b'"D1"') + 2] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    log, replay, _ = load(tmp_path)
+    assert [r[1]["id"] for r in replay.records] == ["D0"]
+    assert path.stat().st_size == first_end
+    # The log continues after the last intact record
+    assert log.append_json(DISASTER, {"id": "D9"}) == 2
+    await log.close()
+
+
+async def test_snapshot_replaces_covered_records(tmp_path):
+    log, _, _ = load(tmp_path, segment_bytes=64)
+    for n in range(4):
+        log.append_json(DISASTER, {"id": f"D{n}"})
+        await log.commit()
+    await log.snapshot(np.array([1, 2, 3], dtype=np.uint8), {"note": "after D3"})
+    log.append_json(DISASTER, {"id": "D4"})
+    await log.close()
+
+    log, replay, summary = load(tmp_path)
+    assert replay.snapshot == (4, [1, 2, 3], {"note": "after D3"})
+    assert replay.records == [(DISASTER, {"id": "D4"})]
+    assert summary["replayed_records"] == 1
+    # Segments wholly before the snapshot were deleted
+    assert len(list(tmp_path.glob("segment-*.log"))) <= 2
+    await log.close()
+
+
+async def test_unreadable_snapshot_falls_back_to_an_older_one(tmp_path):
+    log, _, _ = load(tmp_path)
+    log.append_json(DISASTER, {"id": "D0"})
+    await log.snapshot(np.array([1], dtype=np.uint8), {"n": 1})
+    log.append_json(DISASTER, {"id": "D1"})
+    await log.snapshot(np.array([2], dtype=np.uint8), {"n": 2})
+    await log.close()
+
+    newest = sorted(tmp_path.glob("snapshot-*.bin"))[-1]
+    data = bytearray(newest.read_bytes())
+    data[-1] ^= 0xFF
+    newest.write_bytes(bytes(data))
+
+    log, replay, _ = load(tmp_path)
+    assert replay.snapshot == (1, [1], {"n": 1})
+    assert replay.records == [(DISASTER, {"id": "D1"})]
+    await log.close()
+
+
+async def restart(directory, max_agents: int = 20) -> SwarmOrchestrator:
+    orchestrator = SwarmOrchestrator(max_agents=max_agents)
+    await orchestrator.attach_event_log(EventLog(str(directory), fsync=False), snapshot_interval=3600)
+    return orchestrator
+
+
+@pytest.mark.parametrize("clean_shutdown", [True, False])
+async def test_orchestrator_restart_round_trip(tmp_path, clean_shutdown):
+    orchestrator = await restart(tmp_path)
+    await orchestrator.initialize_swarm()
+    result = await orchestrator.deploy_agents("flood", {"lat": 29.76, "lng": -95.37}, "high")
+    await orchestrator.ingest_reports([{"type": "flood", "description": "Water rising on Main St"}])
+    orchestrator.state.set(5, "processing")
+    orchestrator.state.set(6, "error")
+    if clean_shutdown:
+        await orchestrator.detach_event_log()
+    else:
+        # Crash after the last group commit: no final snapshot
+        orchestrator._event_log_task.cancel()
+        orchestrator._log_status_changes()
+        await orchestrator.event_log.close()
+    expected = orchestrator.state.status.copy()
+
+    restored = await restart(tmp_path)
+    # Agent 5 was mid-task; its task is gone, so it comes back idle rather than processing
+    assert restored.state.get(5) == "active"
+    assert restored.state.get(6) == "error"
+    assert restored.state.count(["processing"]) == 0
+    expected[5] = STATUS_CODES["active"]
+    assert restored.state.status.tolist() == expected.tolist()
+    assert restored.get_active_by_type()["social"] == orchestrator.get_active_by_type()["social"]
+    assert not restored._busy_agents
+    assert [d["id"] for d in restored.active_disasters] == [result["disaster_id"]]
+    assert [r["description"] for r in restored.reports] == ["Water rising on Main St"]
+    assert restored.reports_ingested == 1
+    # A repeat of the restored report is still caught as a duplicate
+    [repeat] = await restored.ingest_reports([{"type": "flood", "description": "Water rising on Main St"}])
+    assert repeat["status"] == "duplicate"
+    await restored.detach_event_log()
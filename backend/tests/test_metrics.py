@@ -0,0 +1,48 @@
+"""Prometheus text rendering and the Metric base class"""
+
+import pytest
+from app.core.metrics import Metric, MetricsRegistry
+
+
+def test_render_counter_gauge_and_histogram():
+    registry = MetricsRegistry(prefix="test_")
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    depth = registry.gauge("depth", "Queue depth")
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+    requests.labels('/api/"x"').inc(2)
+    depth.set_function(lambda: 7)
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    assert registry.render().splitlines() == [
+        "# HELP test_requests_total Requests",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{route="/api/\\"x\\""} 2',
+        "# HELP test_depth Queue depth",
+        "# TYPE test_depth gauge",
+        "test_depth 7",
+        "# HELP test_latency_seconds Latency",
+        "# TYPE test_latency_seconds histogram",
+        'test_latency_seconds_bucket{le="0.1"} 1',
+        'test_latency_seconds_bucket{le="1"} 2',
+        'test_latency_seconds_bucket{le="+Inf"} 2',
+        "test_latency_seconds_sum 0.55",
+        "test_latency_seconds_count 2",
+    ]
+
+
+def test_wrong_label_count_is_rejected():
+    registry = MetricsRegistry()
+    counter = registry.counter("errors_total", "Errors", ("kind",))
+    with pytest.raises(ValueError):
+        counter.labels("a", "b")
+
+
+def test_incomplete_metric_fails_at_construction():
+    class NoSamples(Metric):
+        def _new_child(self):
+            return None
+
+    with pytest.raises(TypeError):
+        NoSamples("broken", "Missing _samples")
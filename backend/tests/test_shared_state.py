@@ -0,0 +1,90 @@
+"""Redis-backed shared swarm state and broadcast bus, against fakeredis"""
+
+import asyncio
+import numpy as np
+import pytest
+from app.api.websocket import SwarmConnectionManager
+from app.core.orchestrator import SwarmOrchestrator
+from app.core.redis_state import RedisSwarmState
+from app.core.state import STATUS_CODES
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def shared(server) -> RedisSwarmState:
+    return RedisSwarmState(fakeredis.aioredis.FakeRedis(server=server), prefix="test")
+
+
+async def test_write_and_read_round_trip(server):
+    state = shared(server)
+    ids = np.array([1, 2, 3, 7, 9, 10])
+    codes = np.array([1, 2, 3, 4, 5, 2], dtype=np.uint8)
+    version = await state.write(ids, codes, [{"id": "D1", "type": "flood"}])
+
+    read_version, read_codes, disasters = await state.read()
+    assert read_version == version == await state.get_version() == 1
+    assert read_codes[ids - 1].tolist() == codes.tolist()
+    assert read_codes[[3, 4, 5, 7]].tolist() == [0, 0, 0, 0]
+    assert disasters == [{"id": "D1", "type": "flood"}]
+    await state.close()
+
+
+async def test_workers_see_each_others_changes(server):
+    first, second = SwarmOrchestrator(max_agents=20), SwarmOrchestrator(max_agents=20)
+    await first.attach_shared_state(shared(server), sync_interval=60)
+    await second.attach_shared_state(shared(server), sync_interval=60)
+
+    first.state.set_many([1, 2, 3], "active")
+    await first.sync_shared_state()
+    await second.sync_shared_state()
+    assert [second.state.get(agent_id) for agent_id in (1, 2, 3, 4)] == ["active", "active", "active", "offline"]
+
+    await first.detach_shared_state()
+    await second.detach_shared_state()
+
+
+async def test_unsynced_local_changes_win_over_shared_state(server):
+    first, second = SwarmOrchestrator(max_agents=20), SwarmOrchestrator(max_agents=20)
+    await first.attach_shared_state(shared(server), sync_interval=60)
+    await second.attach_shared_state(shared(server), sync_interval=60)
+
+    first.state.set(5, "active")
+    await first.sync_shared_state()
+    second.state.set(5, "error")
+    changed = second.state.load_codes((await second.shared_state.read())[1])
+    assert changed == 0
+    assert second.state.status[5] == STATUS_CODES["error"]
+
+    # Once pushed, the local change becomes the shared one
+    await second.sync_shared_state()
+    await first.sync_shared_state()
+    assert first.state.get(5) == "error"
+
+    await first.detach_shared_state()
+    await second.detach_shared_state()
+
+
+async def test_bus_fans_broadcasts_out_to_every_worker(server):
+    managers = [SwarmConnectionManager(), SwarmConnectionManager()]
+    received = [[], []]
+    for manager, inbox in zip(managers, received):
+        async def record(message, inbox=inbox):
+            inbox.append(message.message)
+        manager.broadcast_local = record
+        manager.attach_bus(shared(server))
+    await asyncio.sleep(0.05)
+
+    await managers[0].broadcast({"type": "disaster_detected", "data": {"id": "D1"}})
+    for _ in range(50):
+        if all(received):
+            break
+        await asyncio.sleep(0.01)
+
+    assert received == [[{"type": "disaster_detected", "data": {"id": "D1"}}]] * 2
+    for manager in managers:
+        await manager.detach_bus()
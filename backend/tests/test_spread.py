@@ -0,0 +1,80 @@
+"""Incremental re-runs, eviction and terrain confinement in the spread engine"""
+
+import numpy as np
+import pytest
+from app.agents.predictor import SpreadEngine
+
+START = 1_700_000_000.0
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = SpreadEngine(
+        grid_size=40, cell_size_m=100.0, step_minutes=5.0, members=2, horizon_hours=1.0,
+        checkpoint_minutes=15.0, max_checkpoints=2, max_incidents=2, workers=1,
+        data_dir=str(tmp_path),
+    )
+    yield engine
+    engine.shutdown()
+
+
+def fire_task(**extra):
+    return {"location": {"lat": 34.05, "lng": -118.24}, "timestamp": START, "wind_speed_ms": 4.0, **extra}
+
+
+def test_unchanged_update_reuses_forecast(engine):
+    first = engine.update("F1", "fire", fire_task())
+    steps = engine.steps_run
+    again = engine.update("F1", "fire", fire_task())
+
+    assert again is first
+    assert engine.forecasts == 1
+    assert engine.steps_run == steps
+    assert first["area_km2"]["p10"] > 0
+
+
+def test_changed_conditions_rerun_the_forecast(engine):
+    calm = engine.update("F1", "fire", fire_task())
+    windy = engine.update("F1", "fire", fire_task(wind_speed_ms=15.0))
+
+    assert engine.forecasts == 2
+    assert windy["conditions"]["wind_speed_ms"] == 15.0
+    assert windy["area_km2"]["p10"] >= calm["area_km2"]["p10"]
+
+
+def test_advancing_time_resumes_from_checkpoints(engine):
+    engine.update("F1", "fire", fire_task())
+    # 30 minutes on: the 15 and 30 minute checkpoints of the last forecast cover it
+    forecast = engine.update("F1", "fire", fire_task(timestamp=START + 30 * 60))
+
+    assert engine.forecasts == 2
+    assert engine.steps_reused == 6
+    assert forecast["valid_from"] == START + 30 * 60
+
+
+def test_new_observations_refresh_the_forecast(engine):
+    engine.update("F1", "fire", fire_task())
+    engine.update("F1", "fire", fire_task(observations=[{"lat": 34.06, "lng": -118.24}]))
+    assert engine.forecasts == 2
+
+
+def test_least_recently_updated_incident_is_evicted(engine):
+    for incident_id in ("F1", "F2", "F3"):
+        engine.update(incident_id, "fire", fire_task())
+    assert list(engine.scenarios) == ["F2", "F3"]
+    assert engine.get_forecast("F1") is None
+    assert engine.get_stats()["incidents"] == 2
+
+
+def test_terrain_is_loaded_from_the_data_directory(engine, tmp_path):
+    np.save(tmp_path / "fuel.npy", np.zeros((40, 40), dtype=np.float32))
+    forecast = engine.update("F1", "fire", fire_task(fuel="fuel.npy"))
+    # Nothing to burn, so the fire does not spread past its ignition cell
+    assert forecast["area_km2"]["p10"] <= 0.01
+
+
+@pytest.mark.parametrize("path", ["../outside.npy", "/tmp/outside.npy", "sub/../../outside.npy"])
+def test_terrain_outside_the_data_directory_is_rejected(engine, tmp_path, path):
+    np.save(tmp_path.parent / "outside.npy", np.ones((40, 40), dtype=np.float32))
+    with pytest.raises(ValueError, match="outside"):
+        engine.update("F1", "fire", fire_task(fuel=path))
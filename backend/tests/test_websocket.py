@@ -0,0 +1,117 @@
+"""Fan-out queue overflow and eviction in the WebSocket manager"""
+
+import asyncio
+import pytest
+from app.api.frames import Frame
+from app.api.websocket import SwarmConnectionManager
+
+
+class StalledSocket:
+    """A socket whose sends block until released, so its queue backs up"""
+
+    def __init__(self):
+        self.released = asyncio.Event()
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        await self.released.wait()
+        self.sent.append(text)
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+async def connect(manager: SwarmConnectionManager) -> StalledSocket:
+    websocket = StalledSocket()
+    await manager.connect(websocket)
+    # Let the writer take the initial swarm_status frame and block on it
+    await asyncio.sleep(0)
+    return websocket
+
+
+def message(n: int) -> Frame:
+    return Frame({"type": "tick", "data": {"n": n}})
+
+
+def queued(manager: SwarmConnectionManager, websocket) -> list:
+    return [frame.message["data"]["n"] for frame in manager.active_connections[websocket].queue._queue]
+
+
+async def test_drop_oldest_keeps_newest_messages():
+    manager = SwarmConnectionManager(queue_size=3, overflow_policy="drop_oldest")
+    websocket = await connect(manager)
+    for n in range(5):
+        await manager.broadcast_local(message(n))
+
+    assert queued(manager, websocket) == [2, 3, 4]
+    assert manager.get_stats()["total_dropped"] == 2
+    await manager.disconnect(websocket)
+
+
+async def test_drop_newest_keeps_oldest_messages():
+    manager = SwarmConnectionManager(queue_size=3, overflow_policy="drop_newest")
+    websocket = await connect(manager)
+    for n in range(5):
+        await manager.broadcast_local(message(n))
+
+    assert queued(manager, websocket) == [0, 1, 2]
+    assert manager.get_stats()["total_dropped"] == 2
+    await manager.disconnect(websocket)
+
+
+async def test_evict_policy_closes_client_on_first_overflow():
+    manager = SwarmConnectionManager(queue_size=2, overflow_policy="evict")
+    slow = await connect(manager)
+    fast = await connect(manager)
+    fast.released.set()
+    for n in range(3):
+        await manager.broadcast_local(message(n))
+        # The fast client's writer drains between broadcasts
+        await asyncio.sleep(0.001)
+    await asyncio.sleep(0.01)
+
+    assert slow not in manager.active_connections
+    assert slow.closed_with == 1013
+    assert fast in manager.active_connections
+    assert manager.evicted == 1
+    assert not manager._closing
+    assert len(fast.sent) == 4
+    await manager.disconnect(fast)
+
+
+async def test_evict_after_consecutive_drops():
+    manager = SwarmConnectionManager(queue_size=1, overflow_policy="drop_newest", evict_after_drops=3)
+    websocket = await connect(manager)
+    for n in range(3):
+        await manager.broadcast_local(message(n))
+    assert websocket in manager.active_connections
+
+    await manager.broadcast_local(message(3))
+    await asyncio.sleep(0.01)
+    assert websocket not in manager.active_connections
+    assert websocket.closed_with == 1013
+
+
+async def test_successful_enqueue_resets_drop_streak():
+    manager = SwarmConnectionManager(queue_size=1, overflow_policy="drop_newest", evict_after_drops=2)
+    websocket = await connect(manager)
+    client = manager.active_connections[websocket]
+    await manager.broadcast_local(message(0))
+    await manager.broadcast_local(message(1))
+    assert client.consecutive_drops == 1
+
+    client.queue.get_nowait()
+    await manager.broadcast_local(message(2))
+    assert client.consecutive_drops == 0
+    await manager.broadcast_local(message(3))
+    assert websocket in manager.active_connections
+    await manager.disconnect(websocket)
+
+
+def test_unknown_overflow_policy_is_rejected():
+    with pytest.raises(ValueError):
+        SwarmConnectionManager(overflow_policy="block")